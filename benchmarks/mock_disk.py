@@ -0,0 +1,421 @@
+"""
+Локальная имитация API и хранилища Яндекс.Диска для бенчмарков
+"""
+
+import hashlib
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List
+from urllib.parse import urlparse, parse_qs, quote, unquote
+
+
+# Размер блока, которым сервер отдает данные файла
+SEND_CHUNK_SIZE = 64 * 1024
+
+
+def random_bytes(size: int, seed: int) -> bytes:
+    """Воспроизводимые псевдослучайные данные заданного размера"""
+    return random.Random(seed).randbytes(size)
+
+
+def project_fields(data: Any, fields: List[str]) -> Any:
+    """Оставляет в ответе только перечисленные поля (параметр fields API, через точку)"""
+    if isinstance(data, list):
+        return [project_fields(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    nested: Dict[str, List[str]] = {}
+    for field in fields:
+        key, _, rest = field.partition(".")
+        nested.setdefault(key, [])
+        if rest:
+            nested[key].append(rest)
+    return {key: project_fields(data[key], rest) if rest else data[key]
+            for key, rest in nested.items() if key in data}
+
+
+class MockDisk:
+    """
+    Дерево ресурсов и параметры поведения сервера
+
+    Папки хранят имена дочерних элементов, файлы - содержимое в памяти.
+    """
+
+    def __init__(self, latency: float = 0.0, bandwidth: Optional[float] = None,
+                 max_page_size: int = 1000, rate_limit: Optional[float] = None,
+                 retry_after: int = 1, operation_polls: int = 1):
+        """
+        Args:
+            latency: Задержка ответа API и начала передачи в секундах
+            bandwidth: Скорость отдачи одного файла в байтах в секунду (None - без ограничения)
+            max_page_size: Максимальный limit, который сервер соблюдает при листинге
+            rate_limit: Допустимое число запросов к API в секунду, сверх него - 429
+            retry_after: Значение Retry-After в ответах 429
+            operation_polls: Сколько опросов асинхронная операция остается in-progress
+        """
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.max_page_size = max_page_size
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.operation_polls = operation_polls
+        # Идентификатор операции -> [оставшиеся опросы, итоговый статус]
+        self.operations: Dict[str, List] = {}
+        # Исходные пути, перенос которых завершается статусом failed
+        self.failing_operations = set()
+        self.resources: Dict[str, Dict[str, Any]] = {"/": {"type": "dir", "children": []}}
+        self.contents: Dict[str, bytes] = {}
+        # Пути файлов в порядке загрузки (для /resources/last-uploaded)
+        self.uploads: List[str] = []
+        # Путь -> сколько раз оборвать соединение и после какого количества байт
+        self.drops: Dict[str, List[int]] = {}
+        self.requests_served = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        if path.startswith("disk:"):
+            path = path[len("disk:"):]
+        return "/" + path.strip("/")
+
+    def _add(self, path: str, resource: Dict[str, Any]):
+        path = self._normalize(path)
+        parent, _, name = path.rpartition("/")
+        parent = parent or "/"
+        if parent not in self.resources:
+            self.add_folder(parent)
+        self.resources[parent]["children"].append(name)
+        self.resources[path] = resource
+
+    def add_folder(self, path: str):
+        """Добавляет папку (и недостающие родительские)"""
+        if self._normalize(path) not in self.resources:
+            self._add(path, {"type": "dir", "children": []})
+
+    def add_file(self, path: str, content: bytes):
+        """Добавляет файл с заданным содержимым"""
+        path = self._normalize(path)
+        resource = {"type": "file", "size": len(content),
+                    "md5": hashlib.md5(content).hexdigest(),
+                    "sha256": hashlib.sha256(content).hexdigest()}
+        if path in self.resources:
+            # Перезапись существующего файла
+            self.resources[path] = resource
+            self.uploads.remove(path)
+        else:
+            self._add(path, resource)
+        self.contents[path] = content
+        self.uploads.append(path)
+
+    def remove(self, path: str):
+        """Удаляет файл"""
+        path = self._normalize(path)
+        parent, _, name = path.rpartition("/")
+        self.resources[parent or "/"]["children"].remove(name)
+        del self.resources[path]
+        self.contents.pop(path, None)
+        self.uploads.remove(path)
+
+    def transfer(self, source: str, target: str, keep_source: bool):
+        """Копирует (keep_source=True) или перемещает ресурс вместе с содержимым папки"""
+        source, target = self._normalize(source), self._normalize(target)
+        subtree = sorted(path for path in self.resources if path == source or path.startswith(source + "/"))
+        for path in subtree:
+            resource = dict(self.resources[path])
+            if resource["type"] == "dir":
+                resource["children"] = list(resource["children"])
+            new_path = target + path[len(source):]
+            if path == source:
+                self._add(new_path, resource)
+            else:
+                self.resources[new_path] = resource
+            if path in self.contents:
+                self.contents[new_path] = self.contents[path]
+                self.uploads.append(new_path)
+        if not keep_source:
+            parent, _, name = source.rpartition("/")
+            self.resources[parent or "/"]["children"].remove(name)
+            for path in subtree:
+                del self.resources[path]
+                if self.contents.pop(path, None) is not None:
+                    self.uploads.remove(path)
+
+    def start_operation(self, source: str) -> str:
+        """Регистрирует асинхронную операцию над ресурсом и возвращает ее идентификатор"""
+        with self._lock:
+            operation_id = str(len(self.operations) + 1)
+            status = "failed" if self._normalize(source) in self.failing_operations else "success"
+            self.operations[operation_id] = [self.operation_polls, status]
+            return operation_id
+
+    def operation_status(self, operation_id: str) -> Optional[str]:
+        """Статус операции: in-progress, пока не исчерпаны опросы, затем итоговый"""
+        with self._lock:
+            operation = self.operations.get(operation_id)
+            if operation is None:
+                return None
+            if operation[0] > 0:
+                operation[0] -= 1
+                return "in-progress"
+            return operation[1]
+
+    def drop_connection(self, path: str, after_bytes: int, times: int = 1):
+        """Обрывает соединение при отдаче файла после after_bytes байт указанное число раз"""
+        self.drops[self._normalize(path)] = [times, after_bytes]
+
+    def describe(self, path: str) -> Optional[Dict[str, Any]]:
+        """Ресурс в формате ответа API без списка дочерних элементов"""
+        path = self._normalize(path)
+        resource = self.resources.get(path)
+        if resource is None:
+            return None
+        name = path.rpartition("/")[2] or "disk"
+        data = {"name": name, "path": "disk:" + path, "type": resource["type"],
+                "modified": "2024-01-01T00:00:00+00:00", "created": "2024-01-01T00:00:00+00:00",
+                "resource_id": f"mock:{hashlib.md5(path.encode()).hexdigest()}",
+                "comment_ids": {"private_resource": "", "public_resource": ""}}
+        for field in ("size", "md5", "sha256"):
+            if field in resource:
+                data[field] = resource[field]
+        if resource["type"] == "file":
+            # Лишние поля реального API: превью и метаданные изображений
+            data.update({"mime_type": "application/octet-stream", "media_type": "data",
+                         "preview": f"https://downloader.disk.yandex.ru/preview/{data['resource_id']}",
+                         "exif": {}, "antivirus_status": "clean", "revision": 1700000000000000})
+        return data
+
+    def is_throttled(self) -> bool:
+        """Учитывает запрос к API и решает, ответить ли 429"""
+        with self._lock:
+            self.requests_served += 1
+            if self.rate_limit is None:
+                return False
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            if self._window_count > self.rate_limit:
+                self.throttled += 1
+                return True
+            return False
+
+    def take_drop(self, path: str) -> Optional[int]:
+        """Возвращает позицию обрыва, если для файла запланирован обрыв"""
+        with self._lock:
+            drop = self.drops.get(path)
+            if not drop or drop[0] <= 0:
+                return None
+            drop[0] -= 1
+            return drop[1]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело пишутся отдельно: без TCP_NODELAY каждый ответ ждет delayed ACK
+    disable_nagle_algorithm = True
+    server: "MockDiskServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        disk = self.server.disk
+        if url.path.startswith("/storage/"):
+            self._send_file(unquote(url.path[len("/storage"):]))
+            return
+        if disk.latency:
+            time.sleep(disk.latency)
+        if disk.is_throttled():
+            self._send_json(429, {"error": "TooManyRequestsError"}, {"Retry-After": str(disk.retry_after)})
+            return
+        if url.path.startswith("/v1/disk/operations/"):
+            status = disk.operation_status(url.path.rpartition("/")[2])
+            if status is None:
+                self._send_json(404, {"error": "NotFound"})
+            else:
+                self._send_json(200, {"status": status})
+        elif url.path == "/v1/disk/" or url.path == "/v1/disk":
+            self._send_json(200, {"display_name": "benchmark", "total_space": 0, "used_space": 0})
+        elif url.path == "/v1/disk/resources":
+            self._send_resources(query)
+        elif url.path in ("/v1/disk/resources/files", "/v1/disk/resources/last-uploaded"):
+            self._send_file_list(query, recent=url.path.endswith("/last-uploaded"))
+        elif url.path == "/v1/disk/resources/download":
+            path = disk._normalize(query.get("path", "/"))
+            if path not in disk.contents:
+                self._send_json(404, {"error": "DiskNotFoundError"})
+                return
+            host, port = self.server.server_address[:2]
+            self._send_json(200, {"href": f"http://{host}:{port}/storage{quote(path)}", "method": "GET"})
+        else:
+            self._send_json(404, {"error": "NotFound"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        disk = self.server.disk
+        if disk.latency:
+            time.sleep(disk.latency)
+        if disk.is_throttled():
+            self._send_json(429, {"error": "TooManyRequestsError"}, {"Retry-After": str(disk.retry_after)})
+            return
+        if url.path not in ("/v1/disk/resources/move", "/v1/disk/resources/copy"):
+            self._send_json(404, {"error": "NotFound"})
+            return
+        source, target = disk._normalize(query.get("from", "")), disk._normalize(query.get("path", ""))
+        if source not in disk.resources:
+            self._send_json(404, {"error": "DiskNotFoundError"})
+            return
+        if target in disk.resources and query.get("overwrite") != "true":
+            self._send_json(409, {"error": "DiskResourceAlreadyExistsError"})
+            return
+        is_dir = disk.resources[source]["type"] == "dir"
+        disk.transfer(source, target, keep_source=url.path.endswith("/copy"))
+        if not is_dir:
+            self._send_json(201, {"href": f"{self.server.base_url}/resources?path={quote(target)}"})
+            return
+        # Папки, как в реальном API, переносятся асинхронной операцией
+        operation_id = disk.start_operation(source)
+        self._send_json(202, {"href": f"{self.server.base_url}/operations/{operation_id}"})
+
+    def _send_resources(self, query: Dict[str, str]):
+        disk = self.server.disk
+        path = disk._normalize(query.get("path", "/"))
+        data = disk.describe(path)
+        if data is None:
+            self._send_json(404, {"error": "DiskNotFoundError"})
+            return
+        resource = disk.resources[path]
+        if resource["type"] == "dir":
+            limit = min(int(query.get("limit", 20)), disk.max_page_size)
+            offset = int(query.get("offset", 0))
+            children = resource["children"]
+            prefix = path.rstrip("/")
+            data["_embedded"] = {
+                "items": [disk.describe(f"{prefix}/{name}") for name in children[offset:offset + limit]],
+                "limit": limit, "offset": offset, "total": len(children), "path": data["path"],
+            }
+        if query.get("fields"):
+            data = project_fields(data, query["fields"].split(","))
+        self._send_json(200, data)
+
+    def _send_file_list(self, query: Dict[str, str], recent: bool):
+        """Плоский список файлов диска или последних загрузок (новые первыми)"""
+        disk = self.server.disk
+        paths = list(reversed(disk.uploads)) if recent else sorted(disk.contents)
+        limit = min(int(query.get("limit", 20)), disk.max_page_size)
+        offset = int(query.get("offset", 0)) if not recent else 0
+        data = {"items": [disk.describe(path) for path in paths[offset:offset + limit]],
+                "limit": limit, "offset": offset}
+        if query.get("fields"):
+            data = project_fields(data, query["fields"].split(","))
+        self._send_json(200, data)
+
+    def _send_file(self, path: str):
+        disk = self.server.disk
+        content = disk.contents.get(path)
+        if content is None:
+            self._send_json(404, {"error": "NotFound"})
+            return
+        if disk.latency:
+            time.sleep(disk.latency)
+        total = len(content)
+        start, end = 0, total - 1
+        status = 200
+        range_header = self.headers.get("Range")
+        if range_header and range_header.startswith("bytes="):
+            first, _, last = range_header[len("bytes="):].partition("-")
+            start = int(first) if first else 0
+            end = min(int(last), total - 1) if last else total - 1
+            if start >= total:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{total}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{total}")
+        self.end_headers()
+
+        drop_at = disk.take_drop(path)
+        pos = start
+        began = time.monotonic()
+        while pos <= end:
+            chunk = content[pos:min(pos + SEND_CHUNK_SIZE, end + 1)]
+            if drop_at is not None and pos + len(chunk) > drop_at:
+                self.wfile.write(chunk[:max(drop_at - pos, 0)])
+                self.wfile.flush()
+                self.close_connection = True
+                self.connection.shutdown(socket.SHUT_RDWR)
+                return
+            self.wfile.write(chunk)
+            pos += len(chunk)
+            if disk.bandwidth:
+                ahead = (pos - start) / disk.bandwidth - (time.monotonic() - began)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+
+class MockDiskServer(ThreadingHTTPServer):
+    """HTTP-сервер, отвечающий как API и хранилище Яндекс.Диска"""
+
+    daemon_threads = True
+    # Очередь соединений по умолчанию (5) переполняется при десятках одновременных запросов
+    request_queue_size = 256
+
+    def __init__(self, disk: MockDisk, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.disk = disk
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Значение для YandexDiskClient.base_url"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/disk"
+
+    def handle_error(self, request, client_address):
+        # Клиент закрывает потоковый ответ, не дочитав диапазон - это не ошибка сервера
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+    def start(self) -> "MockDiskServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,210 @@
+"""
+Воспроизводимые сценарии производительности против локальной имитации Яндекс.Диска
+
+Запуск из корня проекта:
+    python -m benchmarks.run_benchmarks --latency 20 --bandwidth 50
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from typing import Optional, Dict, Any, List, Callable
+
+from benchmarks.mock_disk import MockDisk, MockDiskServer, random_bytes
+from pipeline.extractor import ZipExtractor
+from yandex_disk.api_client import YandexDiskClient, pool_size_for
+from yandex_disk.download_manager import DownloadManager, STATUS_DONE
+from yandex_disk.scheduler import DEFAULT_RATE_LIMITS, RequestScheduler
+
+
+MB = 1024 * 1024
+
+
+def _make_client(server: MockDiskServer, args: argparse.Namespace) -> YandexDiskClient:
+    # По умолчанию измеряется клиент с настройками, которые получают пользователи
+    rate_limits = DEFAULT_RATE_LIMITS if args.fixed_limits else None
+    scheduler = RequestScheduler(rate_limits, adaptive=not args.no_client_limits)
+    client = YandexDiskClient("benchmark", pool_size=pool_size_for(args.workers, args.segments), backoff_factor=0.1,
+                              scheduler=scheduler)
+    client.base_url = server.base_url
+    return client
+
+
+def _latency_summary(client: YandexDiskClient) -> Dict[str, Any]:
+    """Средняя задержка и число запросов по endpoint из метрик клиента"""
+    summary = {}
+    for entry in client.metrics.to_dict()["requests"]:
+        latency = entry["latency"]
+        summary[f"{entry['method']} {entry['endpoint']}"] = {
+            "count": latency["count"], "mean_ms": round(latency["mean"] * 1000, 2)}
+    return summary
+
+
+def scenario_huge_listing(disk: MockDisk, server: MockDiskServer, args, work_dir: str) -> Dict[str, Any]:
+    """Постраничный обход папки с большим количеством элементов"""
+    disk.add_folder("/huge")
+    for i in range(args.listing_items):
+        # Содержимое не нужно: листинг читает только метаданные
+        disk.resources["/huge"]["children"].append(f"f{i:06d}.dcm")
+        disk.resources[f"/huge/f{i:06d}.dcm"] = {"type": "file", "size": 1024}
+    with _make_client(server, args) as client:
+        started = time.perf_counter()
+        count = sum(1 for _ in client.iter_files("/huge", page_size=args.page_size))
+        elapsed = time.perf_counter() - started
+        return {"items": count, "seconds": elapsed, "items_per_sec": count / elapsed,
+                "latency": _latency_summary(client)}
+
+
+def scenario_small_files(disk: MockDisk, server: MockDiskServer, args, work_dir: str) -> Dict[str, Any]:
+    """Параллельное скачивание множества мелких файлов"""
+    items = []
+    for i in range(args.small_files):
+        disk.add_file(f"/small/f{i:05d}.json", random_bytes(args.small_size, i))
+        items.append((f"/small/f{i:05d}.json", os.path.join(work_dir, f"f{i:05d}.json")))
+    with _make_client(server, args) as client:
+        manager = DownloadManager(client, max_workers=args.workers)
+        started = time.perf_counter()
+        manager.download_all(items)
+        elapsed = time.perf_counter() - started
+        return {"files": len(items), "ok": manager.count(STATUS_DONE), "seconds": elapsed,
+                "files_per_sec": len(items) / elapsed, "mb_per_sec": manager.bytes_done / MB / elapsed,
+                "latency": _latency_summary(client)}
+
+
+def _build_zip(member_count: int, member_size: int) -> bytes:
+    """Собирает zip со сжимаемыми членами, похожими на срезы DICOM"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i in range(member_count):
+            # Половина данных случайна, половина - нули: сжимается примерно вдвое
+            data = random_bytes(member_size // 2, i) + bytes(member_size - member_size // 2)
+            zf.writestr(f"study/series{i % 8}/IM{i:05d}.dcm", data)
+    return buffer.getvalue()
+
+
+def scenario_giant_zip(disk: MockDisk, server: MockDiskServer, args, work_dir: str) -> Dict[str, Any]:
+    """Скачивание одного большого архива одним и несколькими потоками и его распаковка"""
+    member_size = 512 * 1024
+    # Члены сжимаются примерно вдвое
+    content = _build_zip(max(1, args.zip_size * MB // (member_size // 2)), member_size)
+    disk.add_file("/giant/study.zip", content)
+    result = {"zip_mb": len(content) / MB}
+    with _make_client(server, args) as client:
+        for segments in (1, args.segments):
+            local_path = os.path.join(work_dir, f"study_{segments}.zip")
+            started = time.perf_counter()
+            ok = client.download_file("/giant/study.zip", local_path, segments=segments)
+            elapsed = time.perf_counter() - started
+            result[f"segments_{segments}"] = {"ok": ok, "seconds": elapsed,
+                                              "mb_per_sec": len(content) / MB / elapsed}
+        extractor = ZipExtractor(metrics=client.metrics)
+        try:
+            extract = extractor.extract(os.path.join(work_dir, "study_1.zip"), os.path.join(work_dir, "study"))
+        finally:
+            extractor.shutdown()
+        result["extract"] = {"ok": extract.ok, "members": extract.extracted, "seconds": extract.elapsed,
+                             "mb_per_sec": extract.bytes_written / MB / max(extract.elapsed, 1e-9)}
+        result["latency"] = _latency_summary(client)
+    return result
+
+
+def scenario_resume(disk: MockDisk, server: MockDiskServer, args, work_dir: str) -> Dict[str, Any]:
+    """Докачка файла после обрывов соединения"""
+    size = args.resume_size * MB
+    disk.add_file("/resume/scan.nii", random_bytes(size, 42))
+    disk.drop_connection("/resume/scan.nii", after_bytes=size * 2 // 5, times=2)
+    with _make_client(server, args) as client:
+        started = time.perf_counter()
+        ok = client.download_file("/resume/scan.nii", os.path.join(work_dir, "scan.nii"))
+        elapsed = time.perf_counter() - started
+        retries = client.metrics.to_dict()["retries"]
+        return {"ok": ok, "seconds": elapsed, "mb_per_sec": size / MB / elapsed, "retries": retries}
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "listing": scenario_huge_listing,
+    "small_files": scenario_small_files,
+    "giant_zip": scenario_giant_zip,
+    "resume": scenario_resume,
+}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Выполняет выбранные сценарии, каждый на собственном сервере
+
+    Returns:
+        Dict[str, Any]: Результаты по имени сценария
+    """
+    results = {}
+    for name in args.scenarios:
+        disk = MockDisk(latency=args.latency / 1000,
+                        bandwidth=args.bandwidth * MB if args.bandwidth else None,
+                        max_page_size=args.max_page_size,
+                        rate_limit=args.throttle)
+        work_dir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+        try:
+            with MockDiskServer(disk) as server:
+                result = SCENARIOS[name](disk, server, args, work_dir)
+            result["server_requests"] = disk.requests_served
+            result["server_throttled"] = disk.throttled
+            results[name] = result
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def _print_results(results: Dict[str, Any]):
+    for name, result in results.items():
+        print(f"== {name}")
+        for key, value in result.items():
+            if isinstance(value, float):
+                value = f"{value:.3f}"
+            elif isinstance(value, dict):
+                value = json.dumps(value, ensure_ascii=False)
+            print(f"   {key}: {value}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки клиента Яндекс.Диска на локальной имитации")
+    parser.add_argument("scenarios", nargs="*",
+                        help=f"Сценарии: {', '.join(SCENARIOS)} (по умолчанию все)")
+    parser.add_argument("--latency", type=float, default=10.0, help="Задержка ответа в мс")
+    parser.add_argument("--bandwidth", type=float, default=0, help="Скорость отдачи файла в МБ/с (0 - без ограничения)")
+    parser.add_argument("--page-size", type=int, default=1000, help="limit при листинге")
+    parser.add_argument("--max-page-size", type=int, default=1000, help="Максимальный limit на сервере")
+    parser.add_argument("--throttle", type=float, default=None, help="Запросов к API в секунду до ответа 429")
+    parser.add_argument("--no-client-limits", action="store_true",
+                        help="Отключить адаптивное ограничение частоты запросов клиента")
+    parser.add_argument("--fixed-limits", action="store_true",
+                        help="Включить фиксированные лимиты частоты DEFAULT_RATE_LIMITS")
+    parser.add_argument("--workers", type=int, default=8, help="Параллельных скачиваний")
+    parser.add_argument("--segments", type=int, default=4, help="Диапазонов для большого архива")
+    parser.add_argument("--listing-items", type=int, default=20000)
+    parser.add_argument("--small-files", type=int, default=500)
+    parser.add_argument("--small-size", type=int, default=16 * 1024, help="Размер мелкого файла в байтах")
+    parser.add_argument("--zip-size", type=int, default=128, help="Размер большого архива в МБ")
+    parser.add_argument("--resume-size", type=int, default=32, help="Размер файла для докачки в МБ")
+    parser.add_argument("--json", metavar="PATH", help="Сохранить результаты в JSON")
+    args = parser.parse_args(argv)
+    args.scenarios = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"неизвестные сценарии: {', '.join(unknown)}")
+
+    results = run(args)
+    _print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
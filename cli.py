@@ -0,0 +1,233 @@
+"""
+Командная строка для работы с Яндекс.Диском без графического интерфейса
+
+Модули клиента импортируются внутри команд, а GUI и хранилище ключей - только
+если токен не передан явно, чтобы запуск из планировщика задач был быстрым.
+"""
+
+import argparse
+import os
+import sys
+from typing import Optional, List
+
+
+# Клиенты, созданные командой: метрики последнего сохраняются по --metrics
+_clients: List = []
+
+
+def _resolve_token(args: argparse.Namespace) -> Optional[str]:
+    """
+    Находит OAuth токен: аргумент, переменная окружения, файл .env, хранилище ключей
+
+    Returns:
+        str или None: Токен
+    """
+    if args.token:
+        return args.token
+    token = os.environ.get("YANDEX_DISK_TOKEN")
+    if token:
+        return token
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+        token = os.environ.get("YANDEX_DISK_TOKEN")
+        if token:
+            return token
+    except ImportError:
+        pass
+    try:
+        from config.credentials_manager import CredentialsManager
+        return CredentialsManager().get_token()
+    except Exception as e:
+        print(f"Не удалось прочитать сохраненный токен: {e}", file=sys.stderr)
+        return None
+
+
+def _make_client(args: argparse.Namespace):
+    """Создает YandexDiskClient или завершает работу, если токен не найден"""
+    token = _resolve_token(args)
+    if not token:
+        print("Токен не найден: укажите --token или YANDEX_DISK_TOKEN", file=sys.stderr)
+        sys.exit(2)
+    from yandex_disk.api_client import YandexDiskClient, pool_size_for
+    bandwidth = args.bandwidth * 1024 * 1024 if args.bandwidth else None
+    cache = None
+    if args.cache:
+        from yandex_disk.download_cache import DownloadCache, DEFAULT_CACHE_SIZE
+        cache_size = int(args.cache_size * 1024 ** 3) if args.cache_size else DEFAULT_CACHE_SIZE
+        cache = DownloadCache(args.cache, cache_size, hardlinks=args.cache_hardlinks)
+    else:
+        from yandex_disk.download_cache import cache_from_env
+        cache = cache_from_env()
+    pool_size = pool_size_for(getattr(args, "workers", 0), getattr(args, "segments", 1))
+    client = YandexDiskClient(token, pool_size=pool_size,
+                              bandwidth_limit=bandwidth, cache=cache)
+    _clients.append(client)
+    return client
+
+
+def _format_size(size_bytes: int) -> str:
+    """Форматирование размера файла"""
+    for unit in ("Б", "КБ", "МБ", "ГБ"):
+        if size_bytes < 1024:
+            return f"{size_bytes:.0f} {unit}" if unit == "Б" else f"{size_bytes:.1f} {unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.1f} ТБ"
+
+
+def cmd_list(args: argparse.Namespace) -> int:
+    """Выводит содержимое папки"""
+    import requests
+    with _make_client(args) as client:
+        try:
+            for item in client.iter_files(args.path):
+                if args.long:
+                    size = _format_size(item.size or 0) if not item.is_dir else "<папка>"
+                    print(f"{size:>12}  {(item.modified or '')[:19]}  {item.name}")
+                else:
+                    print(item.name + ("/" if item.is_dir else ""))
+        except requests.exceptions.RequestException as e:
+            print(f"Ошибка при получении списка файлов: {e}", file=sys.stderr)
+            return 1
+    return 0
+
+
+def cmd_download(args: argparse.Namespace) -> int:
+    """Скачивает файлы и папки"""
+    import requests
+    from yandex_disk.download_manager import DownloadManager, STATUS_DONE
+    from yandex_disk.folder_download import walk_tree, plan_folder_download
+
+    with _make_client(args) as client:
+        items = []
+        os.makedirs(args.output, exist_ok=True)
+        for remote_path in args.paths:
+            info = client.get_file_info(remote_path)
+            if info is None:
+                print(f"Не найден: {remote_path}", file=sys.stderr)
+                return 1
+            local_path = os.path.join(args.output, info.name)
+            if info.is_dir:
+                try:
+                    tree = walk_tree(client, remote_path, max_workers=args.workers)
+                except requests.exceptions.RequestException as e:
+                    print(f"Ошибка обхода папки {remote_path}: {e}", file=sys.stderr)
+                    return 1
+                items.extend(plan_folder_download(tree, local_path))
+            else:
+                items.append((info.path, local_path, info.hashes))
+
+        def on_task_done(task):
+            mark = "OK" if task.status == STATUS_DONE else task.status.upper()
+            print(f"{mark:>7}  {task.remote_path}", flush=True)
+
+        manager = DownloadManager(client, max_workers=args.workers, segments=args.segments)
+        manager.download_all(items, on_task_done=on_task_done)
+        failed = len(manager.tasks) - manager.count(STATUS_DONE)
+        print(f"Скачано {manager.count(STATUS_DONE)} из {len(manager.tasks)} "
+              f"({_format_size(manager.throughput)}/s)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_sync(args: argparse.Namespace) -> int:
+    """Синхронизирует папку диска с локальной папкой"""
+    import requests
+    from yandex_disk.sync import sync_folder
+
+    with _make_client(args) as client:
+        try:
+            result = sync_folder(client, args.remote, args.local, max_workers=args.workers,
+                                 prune=args.prune, dry_run=args.dry_run)
+        except requests.exceptions.RequestException as e:
+            print(f"Ошибка синхронизации: {e}", file=sys.stderr)
+            return 1
+    print(result)
+    for rel_path in result.failed:
+        print(f"ошибка: {rel_path}", file=sys.stderr)
+    return 1 if result.failed else 0
+
+
+def cmd_upload(args: argparse.Namespace) -> int:
+    """Загружает локальную папку на диск"""
+    import requests
+    from yandex_disk.upload import upload_folder
+
+    with _make_client(args) as client:
+        try:
+            result = upload_folder(client, args.local, args.remote, max_workers=args.workers,
+                                   on_file_done=lambda rel_path, ok: print(
+                                       f"{'OK' if ok else 'FAILED':>7}  {rel_path}", flush=True))
+        except requests.exceptions.RequestException as e:
+            print(f"Ошибка загрузки: {e}", file=sys.stderr)
+            return 1
+    print(result)
+    return 1 if result.failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Создает разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(prog="main.py",
+                                     description="MRI pipeline: работа с Яндекс.Диском. "
+                                                 "Без аргументов запускается графический интерфейс.")
+    parser.add_argument("--token", help="OAuth токен (по умолчанию YANDEX_DISK_TOKEN или сохраненный)")
+    parser.add_argument("--bandwidth", type=float, help="Ограничение скорости передачи в МБ/с")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="Кэш скачанных файлов по sha256 (по умолчанию MRI_PIPELINE_CACHE); "
+                             "без reflink (ext4, NTFS) каждый файл хранится в кэше полной копией")
+    parser.add_argument("--cache-size", type=float, help="Размер кэша в ГБ")
+    parser.add_argument("--cache-hardlinks", action="store_true",
+                        help="Выдавать файлы из кэша жесткими ссылками (только для чтения)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Сохранить метрики по завершении (.json или текст Prometheus)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser("list", help="Показать содержимое папки")
+    p.add_argument("path", nargs="?", default="/", help="Путь к папке на диске")
+    p.add_argument("-l", "--long", action="store_true", help="Показать размер и дату изменения")
+    p.set_defaults(func=cmd_list)
+
+    p = subparsers.add_parser("download", help="Скачать файлы и папки")
+    p.add_argument("paths", nargs="+", help="Пути к файлам или папкам на диске")
+    p.add_argument("-o", "--output", default=".", help="Локальная папка для сохранения")
+    p.add_argument("-j", "--workers", type=int, default=4, help="Количество одновременных скачиваний")
+    p.add_argument("--segments", type=int, default=1, help="Количество диапазонов для больших файлов")
+    p.set_defaults(func=cmd_download)
+
+    p = subparsers.add_parser("sync", help="Скачать только новые и измененные файлы папки")
+    p.add_argument("remote", help="Папка на диске")
+    p.add_argument("local", help="Локальная папка")
+    p.add_argument("-j", "--workers", type=int, default=4, help="Количество одновременных скачиваний")
+    p.add_argument("--prune", action="store_true", help="Удалять локальные файлы, удаленные с диска")
+    p.add_argument("--dry-run", action="store_true", help="Только показать изменения")
+    p.set_defaults(func=cmd_sync)
+
+    p = subparsers.add_parser("upload", help="Загрузить локальную папку на диск")
+    p.add_argument("local", help="Локальная папка")
+    p.add_argument("remote", help="Папка на диске")
+    p.add_argument("-j", "--workers", type=int, default=8, help="Количество одновременных загрузок")
+    p.set_defaults(func=cmd_upload)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа командной строки
+
+    Args:
+        argv: Аргументы без имени программы (по умолчанию sys.argv[1:])
+
+    Returns:
+        int: Код завершения
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        print("\nОстановлено пользователем", file=sys.stderr)
+        return 130
+    finally:
+        if args.metrics and _clients:
+            try:
+                _clients[-1].metrics.export(args.metrics)
+            except OSError as e:
+                print(f"Не удалось сохранить метрики {args.metrics}: {e}", file=sys.stderr)
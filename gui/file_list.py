@@ -0,0 +1,199 @@
+"""
+Виртуализированный список файлов для папок с десятками тысяч элементов
+"""
+
+from tkinter import ttk
+from typing import Optional, List, Callable, Tuple
+
+from yandex_disk.resource import Resource
+
+
+class FileListModel:
+    """
+    Данные списка файлов вне Tk
+
+    Отметки чекбоксов хранятся как режим "все отмечены/все сняты" плюс множество
+    исключений, поэтому выбор всех элементов и подсчет отмеченных выполняются
+    за постоянное время независимо от размера папки.
+    """
+
+    def __init__(self):
+        self.rows: List[Resource] = []
+        self._all_checked = False
+        self._exceptions = set()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def clear(self):
+        """Удаляет все строки и отметки"""
+        self.rows = []
+        self._all_checked = False
+        self._exceptions = set()
+
+    def extend(self, items: List[Resource]):
+        """
+        Добавляет строки в конец списка
+
+        Если до этого были отмечены все элементы, новые строки тоже считаются отмеченными.
+        """
+        self.rows.extend(items)
+
+    def row(self, index: int) -> Resource:
+        return self.rows[index]
+
+    def is_checked(self, index: int) -> bool:
+        return (index in self._exceptions) != self._all_checked
+
+    def set_checked(self, index: int, checked: bool):
+        if checked == self._all_checked:
+            self._exceptions.discard(index)
+        else:
+            self._exceptions.add(index)
+
+    def toggle(self, index: int) -> bool:
+        """
+        Переключает отметку строки
+
+        Returns:
+            bool: Новое состояние отметки
+        """
+        checked = not self.is_checked(index)
+        self.set_checked(index, checked)
+        return checked
+
+    def set_all(self, checked: bool):
+        """Отмечает или снимает отметку со всех строк"""
+        self._all_checked = checked
+        self._exceptions = set()
+
+    @property
+    def checked_count(self) -> int:
+        if self._all_checked:
+            return len(self.rows) - len(self._exceptions)
+        return len(self._exceptions)
+
+    @property
+    def all_checked(self) -> bool:
+        return bool(self.rows) and self.checked_count == len(self.rows)
+
+    def checked_rows(self) -> List[Resource]:
+        """Отмеченные строки в порядке отображения"""
+        if self._all_checked:
+            return [row for index, row in enumerate(self.rows) if index not in self._exceptions]
+        return [self.rows[index] for index in sorted(self._exceptions)]
+
+
+class VirtualFileList:
+    """
+    Отображение FileListModel в ttk.Treeview, который содержит только видимые строки
+
+    Количество элементов Treeview равно количеству помещающихся на экране строк,
+    а прокрутка меняет только их значения. Вертикальная полоса прокрутки
+    управляется вручную по размеру модели.
+    """
+
+    def __init__(self, tree: ttk.Treeview, scrollbar: ttk.Scrollbar, model: FileListModel,
+                 format_row: Callable[[Resource, bool], Tuple]):
+        """
+        Args:
+            tree: Treeview со столбцами списка файлов
+            scrollbar: Вертикальная полоса прокрутки
+            model: Модель данных
+            format_row: Превращает строку модели и состояние отметки в значения столбцов
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.model = model
+        self.format_row = format_row
+        self.offset = 0
+        self._slots: List[str] = []
+        self._render_scheduled = False
+
+        style = ttk.Style(tree)
+        self._row_height = int(style.lookup("Treeview", "rowheight") or 20)
+
+        scrollbar.configure(command=self._on_scrollbar)
+        tree.bind("<Configure>", self._on_configure, add="+")
+        tree.bind("<MouseWheel>", self._on_mouse_wheel)
+        tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        tree.bind("<Button-5>", lambda event: self.scroll(3))
+
+    @property
+    def visible_rows(self) -> int:
+        return len(self._slots)
+
+    def index_of(self, item_id: str) -> Optional[int]:
+        """
+        Индекс строки модели, отображаемой элементом Treeview
+
+        Args:
+            item_id: Идентификатор элемента Treeview
+
+        Returns:
+            int или None: Индекс строки в модели
+        """
+        try:
+            index = self.offset + self._slots.index(item_id)
+        except ValueError:
+            return None
+        return index if index < len(self.model) else None
+
+    def refresh(self):
+        """Планирует перерисовку видимых строк (несколько вызовов объединяются в одну)"""
+        if not self._render_scheduled:
+            self._render_scheduled = True
+            self.tree.after_idle(self._render)
+
+    def scroll(self, delta_rows: int):
+        """Прокручивает список на указанное количество строк"""
+        self._set_offset(self.offset + delta_rows)
+        return "break"
+
+    def _set_offset(self, offset: int):
+        max_offset = max(0, len(self.model) - self.visible_rows)
+        offset = max(0, min(offset, max_offset))
+        if offset != self.offset:
+            self.offset = offset
+            self.tree.selection_set(())
+        self.refresh()
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self._set_offset(int(float(args[0]) * len(self.model)))
+        elif action == "scroll":
+            step = self.visible_rows if args[1] == "pages" else 1
+            self._set_offset(self.offset + int(args[0]) * step)
+
+    def _on_mouse_wheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_configure(self, event):
+        # Заголовок занимает примерно одну строку
+        rows = max(1, event.height // self._row_height - 1)
+        if rows != len(self._slots):
+            while len(self._slots) < rows:
+                self._slots.append(self.tree.insert("", "end", values=()))
+            while len(self._slots) > rows:
+                self.tree.delete(self._slots.pop())
+            self._set_offset(self.offset)
+
+    def _render(self):
+        """Обновляет значения видимых строк и полосу прокрутки"""
+        self._render_scheduled = False
+        total = len(self.model)
+        if self.offset > max(0, total - self.visible_rows):
+            self.offset = max(0, total - self.visible_rows)
+        for slot, item_id in enumerate(self._slots):
+            index = self.offset + slot
+            if index < total:
+                values = self.format_row(self.model.row(index), self.model.is_checked(index))
+            else:
+                values = ()
+            self.tree.item(item_id, values=values)
+        if total:
+            first = self.offset / total
+            last = min(1.0, (self.offset + self.visible_rows) / total)
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
@@ -2,13 +2,46 @@
 Главное окно GUI приложения для MRI-пайплайна
 """
 
+import os
+import zipfile
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
 from typing import Optional
 
 from config.credentials_manager import CredentialsManager
-from yandex_disk.api_client import YandexDiskClient
+from gui.file_list import FileListModel, VirtualFileList
+from yandex_disk.api_client import YandexDiskClient, pool_size_for
+from yandex_disk.scheduler import PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from yandex_disk.async_client import AsyncYandexDiskClient, AsyncClientRunner
+from yandex_disk.download_cache import cache_from_env
+from yandex_disk.download_manager import DownloadManager, STATUS_DONE, STATUS_CORRUPT, STATUS_CANCELLED
+from yandex_disk.progress import ProgressTracker, TransferControl, TransferCancelled
+from yandex_disk.remote_zip import RemoteZipFile, RemoteZipUnavailable
+from yandex_disk.search_index import DiskIndex
+from yandex_disk.listing_cache import ListingCache
+from yandex_disk.folder_download import should_use_server_zip, plan_folder_download
+from pipeline.extractor import ZipExtractor
+from pipeline.dicom_index import DicomIndex, create_header_pool
+from pipeline.stages import Pipeline, Stage
+
+
+# Размер страницы при постраничной загрузке папки
+LISTING_PAGE_SIZE = 500
+
+# Интервал обновления скорости передачи в статусной строке (мс)
+THROUGHPUT_REFRESH_MS = 1000
+
+# Интервал обновления прогресса скачивания (мс) и шкала прогрессбара
+PROGRESS_REFRESH_MS = 250
+PROGRESS_SCALE = 1000
+
+# Сколько подпапок текущей папки предзагружать в кэш
+PREFETCH_SUBFOLDERS = 16
+
+# Максимум потоков скачивания в настройках и диапазонов одного большого файла
+MAX_DOWNLOAD_WORKERS = 16
+DOWNLOAD_SEGMENTS = 4
 
 
 class MainWindow:
@@ -23,10 +56,20 @@ class MainWindow:
         # Инициализация компонентов
         self.credentials_manager = CredentialsManager()
         self.yandex_client: Optional[YandexDiskClient] = None
+        # Асинхронный клиент в общем фоновом цикле событий
+        self.async_runner: Optional[AsyncClientRunner] = None
+        self.disk_index: Optional[DiskIndex] = None
+        self.listing_cache: Optional[ListingCache] = None
+        # Управление и прогресс текущего пакета скачивания
+        self.transfer_control: Optional[TransferControl] = None
+        self.transfer_progress: Optional[ProgressTracker] = None
+        # Текущий шаг пакета, показываемый в статусе (обход папки, распаковка)
+        self._transfer_note = ""
         self.current_path = "/"
-        # Храним состояние чекбоксов
-        self._item_checked = {}
-        self._all_checked = False
+        # Номер текущей загрузки списка: страницы устаревших загрузок отбрасываются
+        self._listing_generation = 0
+        # Данные списка файлов и состояние чекбоксов хранятся вне Tk
+        self.file_model = FileListModel()
         self._CHECKED = "☑"
         self._UNCHECKED = "☐"
         
@@ -97,7 +140,7 @@ class MainWindow:
         
         # Кнопки навигации
         ttk.Button(nav_frame, text="← Назад", command=self._go_back).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(nav_frame, text="Обновить", command=self._refresh_files).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(nav_frame, text="Обновить", command=lambda: self._refresh_files(force=True)).pack(side=tk.LEFT, padx=(0, 5))
         
         # Поле пути
         ttk.Label(nav_frame, text="Путь:").pack(side=tk.LEFT, padx=(10, 5))
@@ -107,6 +150,14 @@ class MainWindow:
         path_entry.bind('<Return>', self._navigate_to_path)
         
         ttk.Button(nav_frame, text="Перейти", command=self._navigate_to_path).pack(side=tk.LEFT)
+        
+        # Поиск по локальному индексу
+        ttk.Label(nav_frame, text="Поиск:").pack(side=tk.LEFT, padx=(10, 5))
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(nav_frame, textvariable=self.search_var, width=20)
+        search_entry.pack(side=tk.LEFT, padx=(0, 5))
+        search_entry.bind('<Return>', self._search_files)
+        ttk.Button(nav_frame, text="Найти", command=self._search_files).pack(side=tk.LEFT)
     
     def _setup_file_list(self, parent):
         """Настройка списка файлов"""
@@ -137,9 +188,11 @@ class MainWindow:
         self.file_tree.column("modified", width=150, stretch=False)
         
         # Скроллбары
-        v_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.file_tree.yview)
+        v_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL)
         h_scrollbar = ttk.Scrollbar(list_frame, orient=tk.HORIZONTAL, command=self.file_tree.xview)
-        self.file_tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.file_tree.configure(xscrollcommand=h_scrollbar.set)
+        # Treeview содержит только видимые строки, вертикальной прокруткой управляет VirtualFileList
+        self.file_list = VirtualFileList(self.file_tree, v_scrollbar, self.file_model, self._format_row)
 
         # Обработчик клика для чекбоксов
         self.file_tree.bind("<Button-1>", self._on_tree_click)
@@ -156,8 +209,24 @@ class MainWindow:
     def _setup_status_bar(self, parent):
         """Настройка статусной строки"""
         self.status_var = tk.StringVar(value="Готов")
-        status_bar = ttk.Label(parent, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
-        status_bar.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        status_frame = ttk.Frame(parent)
+        status_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        status_frame.columnconfigure(0, weight=1)
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
+        status_bar.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        # Текущая скорость передачи по метрикам клиента
+        self.throughput_var = tk.StringVar(value="")
+        throughput_label = ttk.Label(status_frame, textvariable=self.throughput_var, relief=tk.SUNKEN,
+                                     anchor=tk.E, width=14)
+        throughput_label.grid(row=0, column=1, sticky=(tk.W, tk.E))
+        self._update_throughput()
+    
+    def _update_throughput(self):
+        """Периодическое обновление скорости передачи в статусной строке"""
+        client = self.yandex_client
+        rate = client.metrics.current_throughput() if client is not None else 0.0
+        self.throughput_var.set(f"{self._format_size(rate)}/s" if rate else "")
+        self.root.after(THROUGHPUT_REFRESH_MS, self._update_throughput)
     
     def _check_credentials(self):
         """Проверка сохраненных учетных данных и переменных окружения"""
@@ -175,25 +244,68 @@ class MainWindow:
         
         self.status_var.set("Подключение к Яндекс.Диску...")
         
-        def connect_thread():
+        # Клиенты прежнего токена не должны продолжать работу с ним
+        self._close_clients()
+        # Пул рассчитан на максимум потоков и диапазонов: иначе они ждут соединения в urllib3
+        self.yandex_client = YandexDiskClient(token, pool_size=pool_size_for(MAX_DOWNLOAD_WORKERS, DOWNLOAD_SEGMENTS),
+                                              cache=cache_from_env())
+        # Асинхронный клиент делит с блокирующим лимиты частоты и метрики
+        self.async_runner = AsyncClientRunner(AsyncYandexDiskClient(
+            token, scheduler=self.yandex_client.scheduler, metrics=self.yandex_client.metrics))
+        
+        def on_user_info(future):
             try:
-                self.yandex_client = YandexDiskClient(token)
-                user_info = self.yandex_client.get_user_info()
-                
-                if user_info:
-                    self.root.after(0, lambda: self._on_connection_success(user_info))
-                else:
-                    self.root.after(0, lambda: self._on_connection_error("Не удалось получить информацию о пользователе"))
+                user_info = future.result()
             except Exception as e:
-                self.root.after(0, lambda: self._on_connection_error(f"Ошибка подключения: {e}"))
+                message = f"Ошибка подключения: {e}"
+                self.root.after(0, lambda: self._on_connection_error(message))
+                return
+            if user_info:
+                self.root.after(0, lambda: self._on_connection_success(user_info))
+            else:
+                self.root.after(0, lambda: self._on_connection_error("Не удалось получить информацию о пользователе"))
         
-        threading.Thread(target=connect_thread, daemon=True).start()
+        self.async_runner.submit(self.async_runner.client.get_user_info(), on_user_info)
     
     def _on_connection_success(self, user_info):
         """Обработка успешного подключения"""
         self.status_var.set(f"Подключено: {user_info.get('display_name', 'Пользователь')}")
+        if self.listing_cache is not None:
+            self.listing_cache.shutdown()
+        self.listing_cache = ListingCache(self.yandex_client, page_size=LISTING_PAGE_SIZE)
+        self._start_index_refresh()
         self._refresh_files()
     
+    def _start_index_refresh(self):
+        """Открытие локального индекса и запуск его фонового обновления"""
+        if self.disk_index is None:
+            try:
+                self.disk_index = DiskIndex()
+            except Exception as e:
+                print(f"Не удалось открыть индекс поиска: {e}")
+                return
+        self.disk_index.start_background_refresh(
+            self.yandex_client,
+            on_refreshed=lambda stats: print(f"Индекс обновлен: {stats}")
+        )
+    
+    def _search_files(self, event=None):
+        """Поиск файлов по локальному индексу"""
+        query = self.search_var.get().strip()
+        if not query:
+            return
+        if self.disk_index is None:
+            messagebox.showwarning("Предупреждение", "Сначала подключитесь к Яндекс.Диску")
+            return
+        results = self.disk_index.search(query)
+        self._listing_generation += 1
+        self._display_files(results, self._listing_generation, True)
+        self.path_var.set(f"Поиск: {query}")
+        status = f"Найдено {len(results)} файлов"
+        if self.disk_index.last_refresh is None:
+            status += " (индекс еще строится, результаты могут быть неполными)"
+        self.status_var.set(status)
+    
     def _on_connection_error(self, error_message):
         """Обработка ошибки подключения"""
         self.status_var.set("Ошибка подключения")
@@ -225,71 +337,143 @@ class MainWindow:
         else:
             messagebox.showerror("Ошибка", "Не удалось сохранить токен")
     
+    def _close_clients(self):
+        """
+        Закрывает клиенты текущего токена: сессии, цикл событий и кэш скачиваний
+
+        Текущее скачивание, обновление индекса и предзагрузка папок останавливаются,
+        так как их потоки используют эти клиенты.
+        """
+        if self.transfer_control is not None:
+            self.transfer_control.cancel()
+        if self.disk_index is not None:
+            self.disk_index.stop_background_refresh()
+        if self.listing_cache is not None:
+            self.listing_cache.shutdown()
+            self.listing_cache = None
+        if self.async_runner is not None:
+            self.async_runner.close()
+            self.async_runner = None
+        if self.yandex_client is not None:
+            self.yandex_client.close()
+            if self.yandex_client.cache is not None:
+                self.yandex_client.cache.close()
+            self.yandex_client = None
+    
     def _clear_token(self):
         """Очистка токена"""
         self.token_var.set("")
         self.credentials_manager.clear_credentials()
-        self.yandex_client = None
+        self._close_clients()
         self.status_var.set("Токен очищен")
         self._clear_file_list()
     
-    def _refresh_files(self):
-        """Обновление списка файлов"""
+    def _refresh_files(self, force=False):
+        """
+        Обновление списка файлов
+        
+        Кэшированный список показывается сразу, а актуальный запрашивается в фоне.
+        Недавно полученный список повторно не запрашивается, если не передан force.
+        """
         if not self.yandex_client:
             messagebox.showwarning("Предупреждение", "Сначала подключитесь к Яндекс.Диску")
             return
         
-        self.status_var.set("Загрузка файлов...")
+        self._listing_generation += 1
+        generation = self._listing_generation
+        path = self.current_path
+        cache = self.listing_cache
+        cached = cache.get(path) if cache else None
+        if cached is not None:
+            self._show_listing(cached.items, generation)
+            if not force and cache.is_fresh(path):
+                return
+        else:
+            self.status_var.set("Загрузка файлов...")
         
         def load_files_thread():
+            # Список, который ждет пользователь, обслуживается раньше фоновых скачиваний
+            with self.yandex_client.priority(PRIORITY_INTERACTIVE):
+                load_files()
+        
+        def load_files():
             try:
-                files_data = self.yandex_client.list_files(self.current_path)
-                self.root.after(0, lambda: self._display_files(files_data))
+                if cached is not None:
+                    # Фоновая проверка кэша: перерисовываем только при изменениях
+                    items = cache.fetch(path)
+                    if items != cached.items:
+                        self.root.after(0, lambda: self._show_listing(items, generation))
+                    return
+                all_items = []
+                first_page = True
+                for items in self.yandex_client.iter_file_pages(path, page_size=LISTING_PAGE_SIZE):
+                    all_items.extend(items)
+                    self.root.after(0, lambda items=items, first=first_page: self._display_files(items, generation, first))
+                    first_page = False
+                if first_page:
+                    self.root.after(0, lambda: self._display_files([], generation, True))
+                if cache:
+                    cache.put(path, all_items)
+                self.root.after(0, lambda: self._on_listing_complete(generation))
+                self._prefetch_subfolders(all_items)
             except Exception as e:
-                self.root.after(0, lambda: self._on_load_error(f"Ошибка загрузки файлов: {e}"))
+                message = f"Ошибка загрузки файлов: {e}"
+                self.root.after(0, lambda: self._on_load_error(message))
         
         threading.Thread(target=load_files_thread, daemon=True).start()
     
-    def _display_files(self, files_data):
-        """Отображение файлов в списке"""
-        self._clear_file_list()
-        # Сброс чекбоксов
-        self._item_checked.clear()
-        self._all_checked = False
-        if hasattr(self, 'file_tree'):
+    def _show_listing(self, items, generation):
+        """Отображение полного списка папки (из кэша)"""
+        self._display_files(items, generation, True)
+        self._on_listing_complete(generation)
+        self._prefetch_subfolders(items)
+    
+    def _prefetch_subfolders(self, items):
+        """Фоновая загрузка списков подпапок для мгновенного перехода"""
+        if self.listing_cache is None:
+            return
+        subfolders = [item.path for item in items if item.is_dir and item.path]
+        self.listing_cache.prefetch(subfolders[:PREFETCH_SUBFOLDERS])
+    
+    def _display_files(self, items, generation, first_page):
+        """Отображение очередной страницы файлов в списке"""
+        if generation != self._listing_generation:
+            return
+        if first_page:
+            # Сброс списка и чекбоксов
+            self.file_model.clear()
+            self.file_list.offset = 0
             self.file_tree.heading('sel', text=self._UNCHECKED)
+            self.path_var.set(self.current_path)
         
-        if not files_data:
-            self.status_var.set("Нет файлов")
+        self.file_model.extend(items)
+        self.file_list.refresh()
+        self.status_var.set(f"Загрузка файлов... {len(self.file_model)} элементов")
+    
+    def _format_row(self, item, checked):
+        """Значения столбцов Treeview для строки списка файлов"""
+        return (
+            self._CHECKED if checked else self._UNCHECKED,
+            item.name,
+            "Папка" if item.is_dir else "Файл",
+            self._format_size(item.size or 0),
+            item.modified or ""
+        )
+    
+    def _on_listing_complete(self, generation):
+        """Завершение постраничной загрузки списка"""
+        if generation != self._listing_generation:
             return
-            
-        # Проверяем, есть ли items в корне или в _embedded
-        if "items" in files_data:
-            items = files_data["items"]
-        elif "_embedded" in files_data and "items" in files_data["_embedded"]:
-            items = files_data["_embedded"]["items"]
+        if len(self.file_model):
+            self.status_var.set(f"Загружено {len(self.file_model)} элементов")
         else:
             self.status_var.set("Нет файлов")
-            return
-        
-        for item in items:
-            name = item.get("name", "")
-            path = item.get("path", "")
-            type_ = "Папка" if item.get("type") == "dir" else "Файл"
-            size = self._format_size(item.get("size", 0))
-            modified = item.get("modified", "")
-            
-            # Иконка не используем, вместо этого чекбокс
-            item_id = self.file_tree.insert("", "end", values=(self._UNCHECKED, name, type_, size, modified), tags=(path,))
-            self._item_checked[item_id] = False
-        
-        self.path_var.set(self.current_path)
-        self.status_var.set(f"Загружено {len(items)} элементов")
     
     def _clear_file_list(self):
         """Очистка списка файлов"""
-        for item in self.file_tree.get_children():
-            self.file_tree.delete(item)
+        self.file_model.clear()
+        self.file_tree.heading('sel', text=self._UNCHECKED)
+        self.file_list.refresh()
     
     def _format_size(self, size_bytes):
         """Форматирование размера файла"""
@@ -310,12 +494,13 @@ class MainWindow:
         if not selection:
             return
         
-        item = self.file_tree.item(selection[0])
-        path = item["tags"][0] if item["tags"] else ""
-        item_type = item["values"][2] if item["values"] else ""
+        index = self.file_list.index_of(selection[0])
+        if index is None:
+            return
+        item = self.file_model.row(index)
         
-        if item_type == "Папка":
-            self.current_path = path
+        if item.is_dir:
+            self.current_path = item.path
             self._refresh_files()
     
     def _on_file_right_click(self, event):
@@ -373,13 +558,33 @@ class MainWindow:
         # Чекбокс разархивации
         self.decompress_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(controls_frame, text="Разархивировать zip", variable=self.decompress_var).grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        self.delete_archive_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(controls_frame, text="Удалять zip после распаковки", variable=self.delete_archive_var).grid(row=1, column=3, sticky=tk.W, padx=(10, 0), pady=(5, 0))
 
         # Кнопка скачивания
         ttk.Button(controls_frame, text="Скачать выбранные", command=self._download_selected).grid(row=1, column=1, sticky=tk.W, pady=(5, 0))
 
-        # Прогрессбар
+        # Количество параллельных скачиваний
+        workers_frame = ttk.Frame(controls_frame)
+        workers_frame.grid(row=1, column=2, sticky=tk.E, pady=(5, 0))
+        ttk.Label(workers_frame, text="Потоков:").pack(side=tk.LEFT, padx=(0, 5))
+        self.download_workers_var = tk.IntVar(value=4)
+        ttk.Spinbox(workers_frame, from_=1, to=MAX_DOWNLOAD_WORKERS, width=4, textvariable=self.download_workers_var).pack(side=tk.LEFT)
+
+        # Маска файлов внутри zip: распаковываются только совпавшие, архив целиком не скачивается
+        ttk.Label(controls_frame, text="Маска файлов в zip:").grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
+        self.zip_filter_var = tk.StringVar(value="")
+        ttk.Entry(controls_frame, textvariable=self.zip_filter_var).grid(row=2, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 0))
+
+        # Прогрессбар по байтам и управление текущим скачиванием
         self.progress = ttk.Progressbar(controls_frame, orient=tk.HORIZONTAL, length=400, mode="determinate")
-        self.progress.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 0))
+        self.progress.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(5, 0))
+        transfer_frame = ttk.Frame(controls_frame)
+        transfer_frame.grid(row=3, column=3, sticky=tk.W, padx=(10, 0), pady=(5, 0))
+        self.pause_button = ttk.Button(transfer_frame, text="Пауза", command=self._toggle_pause, state=tk.DISABLED)
+        self.pause_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.cancel_button = ttk.Button(transfer_frame, text="Отмена", command=self._cancel_transfer, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT)
 
     def _choose_download_dir(self):
         directory = filedialog.askdirectory()
@@ -394,47 +599,262 @@ class MainWindow:
         if not dest_dir:
             messagebox.showwarning("Ошибка", "Сначала выберите папку для скачивания")
             return
-        selected_items = [iid for iid, checked in self._item_checked.items() if checked]
+        selected_items = self.file_model.checked_rows()
         if not selected_items:
             messagebox.showinfo("Выбор", "Выберите файлы (чекбоксы) для скачивания")
             return
 
-        self.status_var.set("Скачивание файлов...")
+        if self.transfer_control is not None:
+            messagebox.showinfo("Скачивание", "Дождитесь завершения или отмените текущее скачивание")
+            return
+
         decompress = self.decompress_var.get()
-        # Настройка прогрессбара
-        if hasattr(self, 'progress'):
-            self.progress["maximum"] = len(selected_items)
-            self.progress["value"] = 0
+        zip_filter = self.zip_filter_var.get().strip()
+        try:
+            workers = int(self.download_workers_var.get())
+        except (tk.TclError, ValueError):
+            workers = 4
+        # Значение, введенное вручную, не должно превышать рассчитанный пул соединений
+        workers = min(max(workers, 1), MAX_DOWNLOAD_WORKERS)
+        control = TransferControl()
+        tracker = ProgressTracker()
+
+        # Список отмеченных строк берем в главном потоке
+        downloads = []
+        remote_zips = []
+        folders = []
+        for item in selected_items:
+            local_path = os.path.join(dest_dir, item.name)
+            if item.is_dir:
+                folders.append((item.path, local_path))
+            elif decompress and zip_filter and item.name.lower().endswith(".zip"):
+                # Объем выборочной распаковки известен только после чтения каталога архива
+                remote_zips.append((item.path, local_path))
+                tracker.add_total(None)
+            else:
+                # Суммы из листинга избавляют download_file от запроса метаданных
+                downloads.append((item.path, local_path, item.hashes))
+                tracker.add_total(item.size)
+
+        # Большие архивы дополнительно делятся на диапазоны
+        manager = DownloadManager(self.yandex_client, max_workers=workers, segments=DOWNLOAD_SEGMENTS,
+                                  control=control, progress=tracker)
+        # Члены одного архива распаковываются параллельно внутри extract
+        extractor = ZipExtractor(delete_archive=self.delete_archive_var.get(),
+                                 metrics=self.yandex_client.metrics, control=control)
+        # Один пул процессов чтения заголовков DICOM на весь пакет
+        header_pool = create_header_pool()
+        # Серверные zip папок: путь архива -> папка распаковки
+        folder_zips = {}
+        # Успешно распакованные выборочно удаленные архивы
+        remote_zip_done = []
+
+        def on_extracted(result):
+            name = os.path.basename(result.zip_path)
+            if result.ok:
+                print(f"{name}: распаковано {result.extracted}, пропущено {result.skipped} "
+                      f"за {result.elapsed:.1f} с")
+            else:
+                print(f"Ошибка разархивации {name}: {'; '.join(result.errors)}")
+
+        runner = self.async_runner
+
+        def source():
+            """Выдает элементы скачивания, обходя выбранные папки по мере продвижения конвейера"""
+            for item in remote_zips:
+                yield "remote_zip", item
+            for item in downloads:
+                yield "file", item
+            for remote_path, local_path in folders:
+                self._transfer_note = f"обход папки {os.path.basename(local_path)}"
+                try:
+                    # Папки дерева запрашиваются одновременно в цикле событий асинхронного клиента
+                    tree = runner.run(runner.client.walk_tree(remote_path))
+                except Exception as e:
+                    print(f"Ошибка обхода папки {remote_path}: {e}")
+                    continue
+                finally:
+                    self._transfer_note = ""
+                if should_use_server_zip(tree):
+                    zip_path = local_path + ".zip"
+                    folder_zips[zip_path] = os.path.dirname(local_path)
+                    items = [(remote_path, zip_path)]
+                else:
+                    items = plan_folder_download(tree, local_path)
+                # Размер серверного zip неизвестен, оценкой служит размер файлов папки
+                tracker.add_total(tree.total_size, len(items))
+                for item in items:
+                    yield "file", item
+
+        def download_stage(entry):
+            """Скачивает файл; архивы передает на распаковку"""
+            kind, item = entry
+            if kind == "remote_zip":
+                return download_remote_zip(*item)
+            task = manager.download(item)
+            print(f"{os.path.basename(task.local_path)}: {task.status}, {self._format_size(task.throughput)}/s")
+            if task.status == STATUS_CANCELLED:
+                raise TransferCancelled()
+            if task.status != STATUS_DONE:
+                return []
+            if task.local_path in folder_zips:
+                # Архив папки распаковываем всегда и удаляем после проверки
+                return [("archive", task.local_path, folder_zips[task.local_path], True, None)]
+            if decompress and task.local_path.lower().endswith(".zip"):
+                return [("archive", task.local_path, os.path.splitext(task.local_path)[0], None, zip_filter or None)]
+            return []
+
+        def download_remote_zip(remote_path, local_path):
+            """Распаковывает подходящие члены архива без скачивания всего zip"""
+            extract_dir = os.path.splitext(local_path)[0]
+            # Учтенное в прогрессе снимается, если архив придется скачать целиком
+            fetched = [0]
+            planned = 0
+
+            def on_bytes(count):
+                fetched[0] += count
+                tracker.add_bytes(count)
+
+            with self.yandex_client.priority(PRIORITY_BACKGROUND):
+                try:
+                    with RemoteZipFile(self.yandex_client, remote_path, progress_callback=on_bytes,
+                                       control=control) as remote_zip:
+                        # После чтения каталога объем распаковки известен: уже прочитанное и сжатые члены
+                        planned = remote_zip.bytes_fetched + sum(
+                            info.compress_size for info in remote_zip.select(zip_filter))
+                        tracker.add_total(planned, files=0)
+                        extracted = remote_zip.extract(extract_dir, zip_filter)
+                        remote_zip_done.append(remote_path)
+                        tracker.file_done()
+                        print(f"{os.path.basename(local_path)}: распаковано {len(extracted)} файлов, "
+                              f"получено {self._format_size(remote_zip.bytes_fetched)}")
+                        return [("extracted", extract_dir)]
+                except (RemoteZipUnavailable, zipfile.BadZipFile) as e:
+                    # Частичное чтение недоступно - скачиваем архив целиком и распаковываем по тому же
+                    # фильтру; локальные ошибки записи (OSError) не повторяются полным скачиванием
+                    print(f"Выборочная распаковка {os.path.basename(local_path)} недоступна: {e}")
+                    tracker.add_total(-planned, files=0)
+                    tracker.add_bytes(-fetched[0])
+            return download_stage(("file", (remote_path, local_path)))
+
+        def extract_stage(entry):
+            """Распаковывает архив и передает папку на индексацию"""
+            if entry[0] == "extracted":
+                return [entry[1]]
+            _, zip_path, extract_dir, delete_archive, match = entry
+            self._transfer_note = f"распаковка {os.path.basename(zip_path)}"
+            result = extractor.extract(zip_path, extract_dir, delete_archive=delete_archive, match=match)
+            self._transfer_note = ""
+            on_extracted(result)
+            return [extract_dir] if result.ok else []
+
+        def index_stage(extract_dir):
+            """Обновляет таблицу серий распакованной папки для шага конвертации"""
+            with DicomIndex(extract_dir) as index:
+                stats = index.update(pool=header_pool)
+            print(f"{extract_dir}: DICOM {stats['dicom']} из {stats['read']} прочитанных, "
+                  f"серий {stats['series']} за {stats['elapsed']:.1f} с")
+            return [extract_dir]
+
+        # Очередь перед распаковкой ограничивает число скачанных, но не распакованных архивов;
+        # индекс одной папки пишет один поток, чтение заголовков параллельно внутри update
+        pipeline = Pipeline([
+            Stage("download", download_stage, workers=workers),
+            Stage("extract", extract_stage, workers=2, queue_size=2),
+            Stage("index", index_stage, workers=1, queue_size=4),
+        ], control=control)
 
         def download_thread():
-            import os, zipfile
-            success_count = 0
-            for item_id in selected_items:
-                item = self.file_tree.item(item_id)
-                remote_path = item["tags"][0] if item["tags"] else ""
-                filename = item["values"][1]
-                local_path = os.path.join(dest_dir, filename)
-                if self.yandex_client.download_file(remote_path, local_path):
-                    success_count += 1
-                    if decompress and filename.lower().endswith(".zip"):
-                        try:
-                            with zipfile.ZipFile(local_path, 'r') as zip_ref:
-                                extract_dir = os.path.join(dest_dir, os.path.splitext(filename)[0])
-                                zip_ref.extractall(extract_dir)
-                        except Exception as e:
-                            print(f"Ошибка разархивации {filename}: {e}")
-                # шаг прогресса
-                if hasattr(self, 'progress'):
-                    self.root.after(0, self.progress.step, 1)
-            self.root.after(0, lambda: self.status_var.set(f"Скачивание завершено: {success_count} файлов"))
-            if hasattr(self, 'progress'):
-                self.root.after(0, lambda: self.progress.stop())
+            pipeline.run(source())
+            extractor.shutdown()
+            header_pool.shutdown()
+            for stage in pipeline.stats():
+                print(f"Стадия {stage['name']}: {stage['processed']} за {stage['busy_seconds']:.1f} с, "
+                      f"ошибок {stage['failed']}, отменено {stage['cancelled']}, "
+                      f"ожидание очереди {stage['blocked_seconds']:.1f} с")
+            success_count = manager.count(STATUS_DONE) + len(remote_zip_done)
+            rate = self._format_size(manager.throughput)
+            if control.cancelled:
+                message = f"Скачивание отменено: готово {success_count} файлов, недокачанные файлы продолжатся при повторном скачивании"
+            else:
+                message = f"Скачивание завершено: {success_count} файлов ({rate}/s) за {pipeline.elapsed:.1f} с"
+            corrupt_count = manager.count(STATUS_CORRUPT)
+            if corrupt_count:
+                message += f", повреждено: {corrupt_count} (*.corrupt)"
+            self.root.after(0, lambda: self._on_transfer_finished(message))
 
+        self.transfer_control = control
+        self.transfer_progress = tracker
+        self._transfer_note = ""
+        self.pause_button.configure(text="Пауза", state=tk.NORMAL)
+        self.cancel_button.configure(state=tk.NORMAL)
+        self.progress["maximum"] = PROGRESS_SCALE
+        self.progress["value"] = 0
+        self.status_var.set("Скачивание файлов...")
         threading.Thread(target=download_thread, daemon=True).start()
+        self._poll_transfer_progress()
+
+    def _poll_transfer_progress(self):
+        """Обновляет прогрессбар и статус по счетчикам пакета с фиксированной частотой"""
+        tracker = self.transfer_progress
+        if tracker is None:
+            return
+        snapshot = tracker.snapshot()
+        self.progress["value"] = snapshot.fraction * PROGRESS_SCALE
+        text = (f"Скачано {self._format_size(snapshot.bytes_done)} из {self._format_size(snapshot.bytes_total)} "
+                f"({snapshot.files_done} из {snapshot.files_total} файлов), "
+                f"{self._format_size(snapshot.rate)}/s")
+        if snapshot.eta is not None:
+            text += f", осталось {self._format_eta(snapshot.eta)}"
+        if self._transfer_note:
+            text += f" - {self._transfer_note}"
+        if self.transfer_control.cancelled:
+            text = "Отмена... " + text
+        elif self.transfer_control.paused:
+            text = "Пауза. " + text
+        self.status_var.set(text)
+        self.root.after(PROGRESS_REFRESH_MS, self._poll_transfer_progress)
+
+    def _format_eta(self, seconds):
+        """Форматирование оставшегося времени"""
+        seconds = int(seconds)
+        if seconds >= 3600:
+            return f"{seconds // 3600} ч {seconds % 3600 // 60:02d} мин"
+        return f"{seconds // 60}:{seconds % 60:02d}"
+
+    def _toggle_pause(self):
+        """Приостанавливает или продолжает текущее скачивание"""
+        control = self.transfer_control
+        if control is None:
+            return
+        if control.paused:
+            control.resume()
+            self.pause_button.configure(text="Пауза")
+        else:
+            control.pause()
+            self.pause_button.configure(text="Продолжить")
+
+    def _cancel_transfer(self):
+        """Отменяет текущее скачивание: потоки останавливаются после текущего блока"""
+        if self.transfer_control is not None:
+            self.transfer_control.cancel()
+            self.pause_button.configure(text="Пауза", state=tk.DISABLED)
+            self.cancel_button.configure(state=tk.DISABLED)
+
+    def _on_transfer_finished(self, message):
+        """Завершение пакета скачивания"""
+        if self.transfer_control is not None and not self.transfer_control.cancelled:
+            self.progress["value"] = PROGRESS_SCALE
+        self.transfer_control = None
+        self.transfer_progress = None
+        self.pause_button.configure(text="Пауза", state=tk.DISABLED)
+        self.cancel_button.configure(state=tk.DISABLED)
+        self.status_var.set(message)
     
     def run(self):
         """Запуск приложения"""
-        self.root.mainloop() 
+        self.root.mainloop()
+        self._close_clients()
 
     def _on_tree_click(self, event):
         """Обработка клика по Treeview для переключения чекбоксов"""
@@ -442,30 +862,20 @@ class MainWindow:
         column = self.file_tree.identify_column(event.x)
         handled = False
         if region == "heading" and column == "#1":  # колонка sel
-            # Переключить все
-            self._all_checked = not self._all_checked
-            new_symbol = self._CHECKED if self._all_checked else self._UNCHECKED
-            self.file_tree.heading("sel", text=new_symbol)
-            for item_id in self.file_tree.get_children():
-                self._item_checked[item_id] = self._all_checked
-                self.file_tree.set(item_id, "sel", new_symbol)
+            # Переключить все: меняется только режим модели и видимые строки
+            new_state = not self.file_model.all_checked
+            self.file_model.set_all(new_state)
+            self.file_tree.heading("sel", text=self._CHECKED if new_state else self._UNCHECKED)
+            self.file_list.refresh()
             handled = True
         elif region == "cell" and column == "#1":
-            item_id = self.file_tree.identify_row(event.y)
-            if item_id:
-                current = self._item_checked.get(item_id, False)
-                new_state = not current
-                self._item_checked[item_id] = new_state
-                self.file_tree.set(item_id, "sel", self._CHECKED if new_state else self._UNCHECKED)
-                # Сбросить header чекбокс если нужно
-                if not new_state:
-                    self._all_checked = False
-                    self.file_tree.heading("sel", text=self._UNCHECKED)
-                else:
-                    # Проверяем все ли отмечены
-                    if all(self._item_checked.values()):
-                        self._all_checked = True
-                        self.file_tree.heading("sel", text=self._CHECKED)
+            index = self.file_list.index_of(self.file_tree.identify_row(event.y))
+            if index is not None:
+                self.file_model.toggle(index)
+                self.file_list.refresh()
+                # Заголовок отмечен, только если отмечены все строки
+                all_checked = self.file_model.all_checked
+                self.file_tree.heading("sel", text=self._CHECKED if all_checked else self._UNCHECKED)
             handled = True
         # если обработали чекбокс, прервать дальнейшую обработку события Treeview
         if handled:
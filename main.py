@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
 Главный файл для запуска MRI Pipeline приложения
+
+Без аргументов открывает графический интерфейс, с аргументами работает как
+командная строка (см. ``python main.py --help``).
 """
 
 import sys
@@ -9,12 +12,16 @@ import os
 # Добавляем текущую директорию в путь для импорта модулей
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from gui.main_window import MainWindow
-
 
 def main():
     """Главная функция приложения"""
+    if len(sys.argv) > 1:
+        # tkinter и модули GUI не нужны на узлах без дисплея
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
     try:
+        from gui.main_window import MainWindow
         app = MainWindow()
         app.run()
     except KeyboardInterrupt:
@@ -25,4 +32,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
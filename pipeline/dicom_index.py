@@ -0,0 +1,304 @@
+"""
+Индексация DICOM-файлов распакованных исследований по сериям
+
+Из каждого файла читаются только теги заголовка: чтение останавливается перед
+пиксельными данными. Итог сохраняется в SQLite рядом с данными, чтобы шаг
+конвертации (dcm2bids) выбирал серии без повторного чтения файлов.
+"""
+
+import os
+import sqlite3
+import time
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional, List, Dict, Any, Tuple, Iterable
+
+import pydicom
+from pydicom.errors import InvalidDicomError
+from pydicom.multival import MultiValue
+
+
+# Имя файла индекса в корне папки исследования
+DICOM_INDEX_NAME = ".dicom_index.db"
+
+# Смещение и значение метки "DICM" после 128-байтной преамбулы
+DICM_OFFSET = 128
+DICM_MAGIC = b"DICM"
+
+# Теги уровня серии
+SERIES_FIELDS = (
+    "StudyInstanceUID", "PatientID", "StudyDate", "SeriesNumber", "SeriesDescription",
+    "ProtocolName", "Modality", "ImageType", "SequenceName", "EchoTime", "RepetitionTime",
+)
+
+# Теги уровня файла
+INSTANCE_FIELDS = ("SeriesInstanceUID", "SOPInstanceUID", "InstanceNumber")
+
+HEADER_TAGS = list(INSTANCE_FIELDS + SERIES_FIELDS)
+
+# Ниже этого количества файлов процессы не запускаются
+MIN_FILES_FOR_POOL = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    series_uid TEXT,
+    sop_uid TEXT,
+    instance_number INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_series ON files(series_uid);
+CREATE TABLE IF NOT EXISTS series (
+    series_uid TEXT PRIMARY KEY,
+    study_uid TEXT,
+    patient_id TEXT,
+    study_date TEXT,
+    series_number INTEGER,
+    series_description TEXT,
+    protocol_name TEXT,
+    modality TEXT,
+    image_type TEXT,
+    sequence_name TEXT,
+    echo_time REAL,
+    repetition_time REAL,
+    file_count INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+SERIES_COLUMNS = ("study_uid", "patient_id", "study_date", "series_number", "series_description",
+                  "protocol_name", "modality", "image_type", "sequence_name", "echo_time",
+                  "repetition_time")
+
+
+def _value(element_value: Any) -> Any:
+    """Приводит значение тега к типу, который можно сохранить в SQLite"""
+    if element_value is None or element_value == "":
+        return None
+    if isinstance(element_value, (int, float, str)):
+        return element_value
+    if isinstance(element_value, (list, tuple, MultiValue)):
+        return "\\".join(str(v) for v in element_value)
+    try:
+        return float(element_value) if "." in str(element_value) else int(element_value)
+    except (TypeError, ValueError):
+        return str(element_value)
+
+
+def read_header(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Читает теги серии из заголовка DICOM-файла, не загружая пиксельные данные
+
+    Файлы без метки "DICM" после преамбулы считаются не-DICOM и пропускаются
+    после чтения 132 байт.
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        Dict[str, Any] или None: Значения HEADER_TAGS или None, если файл не DICOM
+    """
+    try:
+        with open(path, 'rb') as f:
+            f.seek(DICM_OFFSET)
+            if f.read(len(DICM_MAGIC)) != DICM_MAGIC:
+                return None
+            f.seek(0)
+            dataset = pydicom.dcmread(f, stop_before_pixels=True, specific_tags=HEADER_TAGS)
+    except (OSError, InvalidDicomError, ValueError, EOFError) as e:
+        print(f"Не удалось прочитать заголовок {path}: {e}")
+        return None
+    header = {name: _value(dataset.get(name)) for name in HEADER_TAGS}
+    if not header["SeriesInstanceUID"]:
+        return None
+    return header
+
+
+def _read_headers(paths: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """Читает заголовки пачки файлов в одном процессе пула"""
+    return [read_header(path) for path in paths]
+
+
+class DicomIndex:
+    """
+    Таблица серий и файлов распакованного исследования в SQLite
+
+    Повторная индексация читает только новые и измененные файлы (по размеру и
+    времени изменения) и удаляет записи исчезнувших файлов.
+    """
+
+    def __init__(self, root_dir: str, db_path: Optional[str] = None):
+        """
+        Args:
+            root_dir: Папка с DICOM-файлами (пути в индексе хранятся относительно нее)
+            db_path: Путь к базе (по умолчанию root_dir/.dicom_index.db)
+        """
+        self.root_dir = root_dir
+        self.db_path = db_path or os.path.join(root_dir, DICOM_INDEX_NAME)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Относительные пути всех файлов папки с размером и временем изменения"""
+        found = {}
+        index_names = {os.path.basename(self.db_path) + suffix for suffix in ("", "-wal", "-shm", "-journal")}
+        for current, _, names in os.walk(self.root_dir):
+            for name in names:
+                if name in index_names or name.endswith(".part"):
+                    continue
+                path = os.path.join(current, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                rel_path = os.path.relpath(path, self.root_dir).replace(os.sep, "/")
+                found[rel_path] = (st.st_size, st.st_mtime_ns)
+        return found
+
+    def update(self, max_workers: Optional[int] = None, batch_size: int = 32,
+               pool: Optional[Executor] = None) -> Dict[str, Any]:
+        """
+        Индексирует новые и измененные файлы папки
+
+        Args:
+            max_workers: Количество процессов чтения заголовков (по умолчанию число ядер)
+            batch_size: Количество файлов, передаваемых процессу за раз
+            pool: Общий пул из create_header_pool для нескольких папок; без него пул
+                создается на время вызова
+
+        Returns:
+            Dict[str, Any]: Количество прочитанных, пропущенных, удаленных файлов,
+                число серий и время работы
+        """
+        started = time.monotonic()
+        found = self._scan()
+        known = {row["path"]: (row["size"], row["mtime_ns"])
+                 for row in self._conn.execute("SELECT path, size, mtime_ns FROM files")}
+        to_read = [rel_path for rel_path, stat in found.items() if known.get(rel_path) != stat]
+        removed = [rel_path for rel_path in known if rel_path not in found]
+
+        abs_paths = [os.path.join(self.root_dir, *rel_path.split("/")) for rel_path in to_read]
+        batches = [abs_paths[i:i + batch_size] for i in range(0, len(abs_paths), batch_size)]
+        if len(abs_paths) < MIN_FILES_FOR_POOL or max_workers == 1:
+            headers = _read_headers(abs_paths)
+        elif pool is not None:
+            headers = [header for batch in pool.map(_read_headers, batches) for header in batch]
+        else:
+            with create_header_pool(max_workers) as own_pool:
+                headers = [header for batch in own_pool.map(_read_headers, batches) for header in batch]
+
+        dicom_count = 0
+        with self._conn:
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in removed])
+            file_rows = []
+            series_rows = {}
+            for rel_path, header in zip(to_read, headers):
+                size, mtime_ns = found[rel_path]
+                if header is None:
+                    # Не-DICOM файлы тоже запоминаются, чтобы не читать их повторно
+                    file_rows.append((rel_path, size, mtime_ns, None, None, None))
+                    continue
+                dicom_count += 1
+                file_rows.append((rel_path, size, mtime_ns, header["SeriesInstanceUID"],
+                                  header["SOPInstanceUID"], header["InstanceNumber"]))
+                series_rows.setdefault(header["SeriesInstanceUID"],
+                                       tuple(header[field] for field in SERIES_FIELDS))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files(path, size, mtime_ns, series_uid, sop_uid, instance_number) "
+                "VALUES (?, ?, ?, ?, ?, ?)", file_rows)
+            self._conn.executemany(
+                "INSERT INTO series(series_uid, %s) VALUES (?, %s) ON CONFLICT(series_uid) DO UPDATE SET %s"
+                % (", ".join(SERIES_COLUMNS), ", ".join("?" * len(SERIES_COLUMNS)),
+                   ", ".join(f"{column} = excluded.{column}" for column in SERIES_COLUMNS)),
+                [(uid,) + row for uid, row in series_rows.items()])
+            self._conn.execute(
+                "UPDATE series SET file_count = "
+                "(SELECT COUNT(*) FROM files WHERE files.series_uid = series.series_uid)")
+            self._conn.execute("DELETE FROM series WHERE file_count = 0")
+            series_count = self._conn.execute("SELECT COUNT(*) FROM series").fetchone()[0]
+        return {"read": len(to_read), "dicom": dicom_count, "skipped": len(found) - len(to_read),
+                "removed": len(removed), "series": series_count, "elapsed": time.monotonic() - started}
+
+    def series(self, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Возвращает серии, отсортированные по исследованию и номеру серии
+
+        Args:
+            **filters: Точное совпадение колонок, например modality="MR"
+
+        Returns:
+            List[Dict[str, Any]]: Строки таблицы series
+        """
+        unknown = set(filters) - set(SERIES_COLUMNS)
+        if unknown:
+            raise ValueError(f"Неизвестные колонки: {', '.join(sorted(unknown))}")
+        where = " AND ".join(f"{column} = ?" for column in filters)
+        rows = self._conn.execute(
+            "SELECT * FROM series" + (f" WHERE {where}" if where else "") +
+            " ORDER BY study_uid, series_number", list(filters.values()))
+        return [dict(row) for row in rows]
+
+    def series_files(self, series_uid: str) -> List[str]:
+        """
+        Возвращает абсолютные пути файлов серии в порядке InstanceNumber
+
+        Args:
+            series_uid: SeriesInstanceUID
+
+        Returns:
+            List[str]: Пути к файлам
+        """
+        rows = self._conn.execute(
+            "SELECT path FROM files WHERE series_uid = ? ORDER BY instance_number, path", (series_uid,))
+        return [os.path.join(self.root_dir, *row["path"].split("/")) for row in rows]
+
+
+def create_header_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Создает пул процессов чтения заголовков
+
+    Индексация вызывается из многопоточного конвейера, где другие потоки держат
+    блокировки (пулы соединений, SQLite, Tk). fork копирует их в дочерний процесс
+    в захваченном состоянии, поэтому процессы запускаются через forkserver
+    (spawn там, где forkserver недоступен). Процессы стартуют при первой задаче.
+
+    Args:
+        max_workers: Количество процессов (по умолчанию число ядер)
+
+    Returns:
+        ProcessPoolExecutor: Пул, который вызывающий код закрывает через shutdown()
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+
+
+def index_dicom_dirs(root_dirs: Iterable[str], max_workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Обновляет индексы нескольких папок исследований одним пулом процессов
+
+    Args:
+        root_dirs: Папки распакованных исследований
+        max_workers: Количество процессов чтения заголовков
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Статистика по каждой папке
+    """
+    stats = {}
+    with create_header_pool(max_workers) as pool:
+        for root_dir in root_dirs:
+            with DicomIndex(root_dir) as index:
+                stats[root_dir] = index.update(max_workers=max_workers, pool=pool)
+    return stats
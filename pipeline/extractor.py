@@ -0,0 +1,227 @@
+"""
+Параллельная инкрементальная распаковка zip-архивов
+"""
+
+import os
+import time
+import threading
+import zipfile
+import zlib
+import shutil
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, List, Callable, Union
+
+from yandex_disk.progress import TransferControl, TransferCancelled
+from yandex_disk.remote_zip import select_members
+
+
+# Размер буфера копирования при распаковке
+EXTRACT_BUFFER_SIZE = 1024 * 1024
+
+
+class ExtractResult:
+    """Итог распаковки одного архива"""
+
+    def __init__(self, zip_path: str, dest_dir: str):
+        self.zip_path = zip_path
+        self.dest_dir = dest_dir
+        self.extracted = 0
+        self.skipped = 0
+        self.bytes_written = 0
+        self.errors: List[str] = []
+        self.archive_deleted = False
+        self.elapsed = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def ok(self) -> bool:
+        """True если все члены архива распакованы и проверены"""
+        return not self.errors
+
+
+def file_crc32(path: str) -> int:
+    """
+    Считает CRC32 локального файла
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        int: Значение CRC32
+    """
+    crc = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(EXTRACT_BUFFER_SIZE), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def safe_member_path(dest_dir: str, member_name: str) -> Optional[str]:
+    """
+    Строит путь распаковки члена архива внутри dest_dir
+
+    Args:
+        dest_dir: Папка распаковки
+        member_name: Имя члена архива
+
+    Returns:
+        str или None: Путь к файлу или None, если имя выходит за пределы dest_dir
+    """
+    parts = [p for p in member_name.replace("\\", "/").split("/") if p not in ("", ".")]
+    if not parts or ".." in parts or os.path.splitdrive(parts[0])[0]:
+        return None
+    return os.path.join(dest_dir, *parts)
+
+
+class ZipExtractor:
+    """
+    Пул распаковки, работающий независимо от потоков скачивания
+
+    Члены одного архива распаковываются несколькими потоками (zlib отпускает GIL),
+    у каждого потока свой дескриптор ZipFile. Уже распакованные файлы с тем же
+    размером и CRC пропускаются.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, archive_workers: int = 2,
+                 delete_archive: bool = False, check_crc: bool = True, metrics=None,
+                 control: Optional[TransferControl] = None):
+        """
+        Args:
+            max_workers: Количество потоков распаковки членов (по умолчанию число ядер)
+            archive_workers: Количество архивов, обрабатываемых одновременно
+            delete_archive: Удалять архив после успешной проверенной распаковки
+            check_crc: Сверять CRC существующих файлов перед пропуском
+            metrics: Сборщик метрик (yandex_disk.metrics.Metrics) для учета времени распаковки
+            control: Пауза и отмена, проверяемые перед каждым членом архива
+        """
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.delete_archive = delete_archive
+        self.check_crc = check_crc
+        self.metrics = metrics
+        self.control = control
+        self._member_pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._archive_pool = ThreadPoolExecutor(max_workers=max(1, archive_workers))
+
+    def submit(self, zip_path: str, dest_dir: str,
+               on_done: Optional[Callable[[ExtractResult], None]] = None,
+               delete_archive: Optional[bool] = None,
+               match: Union[str, Callable[[zipfile.ZipInfo], bool], None] = None) -> Future:
+        """
+        Ставит архив в очередь распаковки
+
+        Args:
+            zip_path: Путь к локальному архиву
+            dest_dir: Папка распаковки
+            on_done: Вызывается из потока распаковки с итогом
+            delete_archive: Переопределяет настройку удаления архива для этого архива
+            match: Фильтр членов архива, см. yandex_disk.remote_zip.select_members
+
+        Returns:
+            Future: Результат ExtractResult
+        """
+        def run():
+            result = self.extract(zip_path, dest_dir, delete_archive, match)
+            if on_done:
+                on_done(result)
+            return result
+        return self._archive_pool.submit(run)
+
+    def extract(self, zip_path: str, dest_dir: str, delete_archive: Optional[bool] = None,
+                match: Union[str, Callable[[zipfile.ZipInfo], bool], None] = None) -> ExtractResult:
+        """
+        Распаковывает архив, блокируя до завершения
+
+        Args:
+            zip_path: Путь к локальному архиву
+            dest_dir: Папка распаковки
+            delete_archive: Переопределяет настройку удаления архива
+            match: Фильтр членов архива (маска или функция от ZipInfo), по умолчанию все
+
+        Returns:
+            ExtractResult: Итог распаковки
+        """
+        result = ExtractResult(zip_path, dest_dir)
+        started = time.monotonic()
+        try:
+            with zipfile.ZipFile(zip_path, 'r') as zf:
+                members = select_members(zf.infolist(), match)
+        except (OSError, zipfile.BadZipFile) as e:
+            result.errors.append(f"{zip_path}: {e}")
+            result.elapsed = time.monotonic() - started
+            return result
+
+        # Крупные члены первыми, чтобы потоки заканчивали примерно одновременно
+        members.sort(key=lambda info: info.file_size, reverse=True)
+        groups = [members[i::self.max_workers] for i in range(self.max_workers)]
+        futures = [self._member_pool.submit(self._extract_group, zip_path, dest_dir, group, result)
+                   for group in groups if group]
+        for future in futures:
+            future.result()
+
+        if delete_archive is None:
+            delete_archive = self.delete_archive
+        if result.ok and delete_archive:
+            try:
+                os.remove(zip_path)
+                result.archive_deleted = True
+            except OSError as e:
+                print(f"Не удалось удалить архив {zip_path}: {e}")
+        result.elapsed = time.monotonic() - started
+        if self.metrics is not None:
+            self.metrics.record_extraction(zip_path, result.bytes_written, result.elapsed)
+        return result
+
+    def _is_up_to_date(self, info: zipfile.ZipInfo, target: str) -> bool:
+        """Проверяет, что файл уже распакован с тем же размером и CRC"""
+        try:
+            if os.path.getsize(target) != info.file_size:
+                return False
+            return not self.check_crc or file_crc32(target) == info.CRC
+        except OSError:
+            return False
+
+    def _extract_group(self, zip_path: str, dest_dir: str,
+                       group: List[zipfile.ZipInfo], result: ExtractResult):
+        """Распаковывает группу членов архива через собственный дескриптор ZipFile"""
+        try:
+            zf = zipfile.ZipFile(zip_path, 'r')
+        except (OSError, zipfile.BadZipFile) as e:
+            result.errors.append(f"{zip_path}: {e}")
+            return
+        with zf:
+            for info in group:
+                if self.control is not None:
+                    try:
+                        self.control.checkpoint()
+                    except TransferCancelled:
+                        with result.lock:
+                            result.errors.append(f"{zip_path}: распаковка отменена")
+                        return
+                target = safe_member_path(dest_dir, info.filename)
+                if target is None:
+                    result.errors.append(f"{info.filename}: недопустимый путь в архиве")
+                    continue
+                if self._is_up_to_date(info, target):
+                    with result.lock:
+                        result.skipped += 1
+                    continue
+                tmp_path = target + ".part"
+                try:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    # zipfile проверяет CRC при чтении и бросает BadZipFile при несовпадении
+                    with zf.open(info) as src, open(tmp_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, EXTRACT_BUFFER_SIZE)
+                    os.replace(tmp_path, target)
+                    with result.lock:
+                        result.extracted += 1
+                        result.bytes_written += info.file_size
+                except (OSError, zipfile.BadZipFile) as e:
+                    with result.lock:
+                        result.errors.append(f"{info.filename}: {e}")
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+
+    def shutdown(self, wait: bool = True):
+        """Останавливает пулы потоков"""
+        self._archive_pool.shutdown(wait=wait)
+        self._member_pool.shutdown(wait=wait)
@@ -0,0 +1,166 @@
+"""
+Конвейер обработки из стадий, связанных ограниченными очередями
+
+Каждая стадия работает в собственных потоках. Если следующая стадия не
+успевает, ее входная очередь заполняется и предыдущая стадия ждет, поэтому
+количество данных между стадиями (например, скачанных, но не распакованных
+архивов) остается ограниченным.
+"""
+
+import threading
+import time
+import queue
+from typing import Optional, List, Callable, Iterable, Any, Dict
+
+from yandex_disk.progress import TransferControl, TransferCancelled
+
+
+# Маркер конца потока элементов
+_END = object()
+
+
+class Stage:
+    """Стадия конвейера и ее статистика"""
+
+    def __init__(self, name: str, func: Callable[[Any], Iterable[Any]],
+                 workers: int = 1, queue_size: Optional[int] = None):
+        """
+        Args:
+            name: Имя стадии для статистики
+            func: Обрабатывает элемент и возвращает элементы для следующей стадии
+                (пустой список - элемент дальше не передается)
+            workers: Количество потоков стадии
+            queue_size: Размер входной очереди (по умолчанию удвоенное число потоков)
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue_size = queue_size or self.workers * 2
+        self.processed = 0
+        self.failed = 0
+        self.cancelled = 0
+        # Время обработки элементов, суммарно по потокам
+        self.busy_seconds = 0.0
+        # Время ожидания места в очереди следующей стадии
+        self.blocked_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "workers": self.workers, "processed": self.processed,
+                "failed": self.failed, "cancelled": self.cancelled, "busy_seconds": self.busy_seconds,
+                "blocked_seconds": self.blocked_seconds}
+
+
+class Pipeline:
+    """
+    Последовательность стадий, работающих одновременно
+
+    Время обработки пакета определяется самой медленной стадией, а не суммой
+    времени всех стадий.
+    """
+
+    def __init__(self, stages: List[Stage], control: Optional[TransferControl] = None):
+        """
+        Args:
+            stages: Стадии в порядке обработки
+            control: Пауза и отмена: проверяются перед каждым элементом; после отмены
+                источник больше не читается, а оставшиеся в очередях элементы пропускаются
+        """
+        if not stages:
+            raise ValueError("Конвейер без стадий")
+        self.stages = stages
+        self.control = control
+        self.elapsed = 0.0
+
+    def run(self, items: Iterable[Any]) -> List[Any]:
+        """
+        Пропускает элементы через все стадии и блокирует до завершения
+
+        Источник читается в отдельном потоке по мере освобождения места в
+        первой очереди, поэтому может быть генератором, который сам ходит в сеть.
+
+        Args:
+            items: Входные элементы первой стадии
+
+        Returns:
+            List[Any]: Элементы, возвращенные последней стадией
+        """
+        started = time.monotonic()
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        results: List[Any] = []
+        results_lock = threading.Lock()
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+
+        def feed():
+            try:
+                for item in items:
+                    if self.control is not None and self.control.cancelled:
+                        break
+                    queues[0].put(item)
+            except Exception as e:
+                print(f"Ошибка источника конвейера: {e}")
+            finally:
+                for _ in range(self.stages[0].workers):
+                    queues[0].put(_END)
+
+        def work(index: int):
+            stage = self.stages[index]
+            is_last = index == len(self.stages) - 1
+            while True:
+                item = queues[index].get()
+                if item is _END:
+                    break
+                began = time.monotonic()
+                cancelled = False
+                try:
+                    if self.control is not None:
+                        self.control.checkpoint()
+                    outputs = list(stage.func(item) or ())
+                except TransferCancelled:
+                    cancelled = True
+                    outputs = None
+                except Exception as e:
+                    print(f"Ошибка стадии {stage.name}: {e}")
+                    outputs = None
+                busy = time.monotonic() - began
+                waited = time.monotonic()
+                if outputs and is_last:
+                    with results_lock:
+                        results.extend(outputs)
+                elif outputs:
+                    for output in outputs:
+                        queues[index + 1].put(output)
+                waited = time.monotonic() - waited
+                with stage._lock:
+                    stage.busy_seconds += busy
+                    stage.blocked_seconds += waited
+                    if cancelled:
+                        stage.cancelled += 1
+                    elif outputs is None:
+                        stage.failed += 1
+                    else:
+                        stage.processed += 1
+            # Последний завершившийся поток стадии закрывает вход следующей
+            with remaining_lock:
+                remaining[index] -= 1
+                last_worker = remaining[index] == 0
+            if last_worker and not is_last:
+                for _ in range(self.stages[index + 1].workers):
+                    queues[index + 1].put(_END)
+
+        threads = [threading.Thread(target=feed, name="pipeline-source", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads.extend(threading.Thread(target=work, args=(index,), name=f"pipeline-{stage.name}-{n}",
+                                            daemon=True)
+                           for n in range(stage.workers))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.monotonic() - started
+        return results
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Статистика стадий последнего запуска"""
+        return [stage.to_dict() for stage in self.stages]
@@ -0,0 +1,56 @@
+"""
+Пакетные перемещение и копирование на имитации Яндекс.Диска
+"""
+
+import unittest
+
+from benchmarks.mock_disk import MockDisk, MockDiskServer
+from yandex_disk.api_client import YandexDiskClient
+from yandex_disk import bulk
+from yandex_disk.bulk import bulk_move, bulk_copy, OP_SUCCESS, OP_FAILED
+
+
+class BulkOperationsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.disk = MockDisk(retry_after=0)
+        for i in range(6):
+            self.disk.add_file(f"/src/file{i}.dcm", b"x" * 100)
+        self.disk.add_file("/study/a/im1.dcm", b"a")
+        self.disk.add_file("/study/b/im1.dcm", b"b")
+        self.server = MockDiskServer(self.disk).start()
+        self.client = YandexDiskClient("test", backoff_factor=0.01)
+        self.client.base_url = self.server.base_url
+        # Опрос операций без секундных пауз
+        self.initial_delay = bulk.POLL_INITIAL_DELAY
+        bulk.POLL_INITIAL_DELAY = 0.01
+
+    def tearDown(self):
+        bulk.POLL_INITIAL_DELAY = self.initial_delay
+        self.server.stop()
+
+    def test_throttled_post_is_retried(self):
+        self.disk.rate_limit = 3
+        pairs = [(f"/src/file{i}.dcm", f"/dst/file{i}.dcm") for i in range(6)]
+        result = bulk_move(self.client, pairs, max_workers=6)
+        self.assertEqual([item.status for item in result.items], [OP_SUCCESS] * 6)
+        self.assertGreater(self.disk.throttled, 0)
+        self.assertIn("/dst/file5.dcm", self.disk.contents)
+        self.assertNotIn("/src/file5.dcm", self.disk.contents)
+
+    def test_poller_reports_each_operation(self):
+        self.disk.operation_polls = 2
+        self.disk.failing_operations.add("/study/b")
+        result = bulk_copy(self.client, [("/study/a", "/copy/a"), ("/study/b", "/copy/b"),
+                                         ("/study/missing", "/copy/missing")])
+        statuses = {item.path: item.status for item in result.items}
+        self.assertEqual(statuses, {"/study/a": OP_SUCCESS, "/study/b": OP_FAILED,
+                                    "/study/missing": OP_FAILED})
+        self.assertTrue(all(item.operation_href for item in result.items[:2]))
+        self.assertIn("404", result.items[2].error)
+        self.assertEqual(self.disk.contents["/copy/a/im1.dcm"], b"a")
+        self.assertEqual(result.succeeded, ["/study/a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Кэш скачанных файлов по sha256
+"""
+
+import hashlib
+import os
+import stat
+import tempfile
+import unittest
+
+from yandex_disk.download_cache import DownloadCache
+
+
+class DownloadCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = DownloadCache(os.path.join(self.tmp.name, "cache"))
+        self.content = os.urandom(256 * 1024)
+        self.sha256 = hashlib.sha256(self.content).hexdigest()
+        self.source = self._write("download/scan.nii", self.content)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def _write(self, rel_path: str, content: bytes) -> str:
+        path = os.path.join(self.tmp.name, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_store_async_then_fetch_independent_copy(self):
+        self.assertTrue(self.cache.store_async(self.sha256, self.source).result())
+        dest = os.path.join(self.tmp.name, "job", "scan.nii")
+        self.assertTrue(self.cache.fetch(self.sha256, dest))
+        with open(dest, 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+        # Правка выданной копии не меняет объект кэша
+        with open(dest, 'r+b') as f:
+            f.write(b"changed")
+        again = os.path.join(self.tmp.name, "job2", "scan.nii")
+        self.assertTrue(self.cache.fetch(self.sha256, again))
+        with open(again, 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(self.cache.stats()["hits"], 2)
+
+    def test_objects_are_read_only(self):
+        self.cache.store(self.sha256, self.source)
+        object_path = self.cache._object_path(self.sha256)
+        self.assertFalse(os.stat(object_path).st_mode & stat.S_IWUSR)
+
+    def test_tampered_object_is_discarded(self):
+        self.cache.store(self.sha256, self.source)
+        object_path = self.cache._object_path(self.sha256)
+        st = os.stat(object_path)
+        os.chmod(object_path, stat.S_IRUSR | stat.S_IWUSR)
+        with open(object_path, 'r+b') as f:
+            f.write(b"X")
+        os.utime(object_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        self.assertFalse(self.cache.fetch(self.sha256, os.path.join(self.tmp.name, "job", "scan.nii")))
+        self.assertFalse(os.path.exists(object_path))
+
+    def test_missing_source_is_not_stored(self):
+        os.remove(self.source)
+        self.assertFalse(self.cache.store_async(self.sha256, self.source).result())
+        self.assertEqual(self.cache.size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
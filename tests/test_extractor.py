@@ -0,0 +1,57 @@
+"""
+Распаковка локальных zip-архивов
+"""
+
+import os
+import tempfile
+import unittest
+import zipfile
+
+from pipeline.extractor import ZipExtractor, safe_member_path
+
+
+class SafeMemberPathTest(unittest.TestCase):
+
+    def test_paths_stay_inside_destination(self):
+        dest = os.path.join("out", "study")
+        self.assertEqual(safe_member_path(dest, "series/./im1.dcm"), os.path.join(dest, "series", "im1.dcm"))
+        self.assertEqual(safe_member_path(dest, "/series\\im1.dcm"), os.path.join(dest, "series", "im1.dcm"))
+        for name in ("../im1.dcm", "series/../../im1.dcm", "", "./"):
+            self.assertIsNone(safe_member_path(dest, name), name)
+
+
+class ZipExtractorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.zip_path = os.path.join(self.tmp.name, "scans.zip")
+        with zipfile.ZipFile(self.zip_path, "w") as zf:
+            zf.writestr("study/im1.dcm", b"one" * 1000)
+            zf.writestr("study/im2.dcm", b"two" * 1000)
+            zf.writestr("../evil.dcm", b"evil")
+        self.dest = os.path.join(self.tmp.name, "out")
+        self.extractor = ZipExtractor(max_workers=2)
+
+    def tearDown(self):
+        self.extractor.shutdown()
+        self.tmp.cleanup()
+
+    def test_unsafe_member_is_rejected(self):
+        result = self.extractor.extract(self.zip_path, self.dest)
+        self.assertEqual(result.extracted, 2)
+        self.assertEqual(len(result.errors), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "evil.dcm")))
+
+    def test_up_to_date_members_are_skipped(self):
+        self.extractor.extract(self.zip_path, self.dest, match="*.dcm")
+        # Файл той же длины, но с другим содержимым распаковывается заново
+        with open(os.path.join(self.dest, "study", "im2.dcm"), 'wb') as f:
+            f.write(b"TWO" * 1000)
+        result = self.extractor.extract(self.zip_path, self.dest, match="study/*")
+        self.assertEqual((result.extracted, result.skipped), (1, 1))
+        with open(os.path.join(self.dest, "study", "im2.dcm"), 'rb') as f:
+            self.assertEqual(f.read(), b"two" * 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Выборочная распаковка zip-архива на имитации Яндекс.Диска
+"""
+
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+
+from benchmarks.mock_disk import MockDisk, MockDiskServer, random_bytes
+from pipeline.extractor import ZipExtractor
+from yandex_disk.api_client import YandexDiskClient
+from yandex_disk.progress import TransferControl, TransferCancelled
+from yandex_disk.remote_zip import RemoteZipFile, STREAM_CHUNK_SIZE
+
+
+MB = 1024 * 1024
+MEMBER_SIZE = 3 * MB
+
+
+class RemoteZipTest(unittest.TestCase):
+
+    def setUp(self):
+        self.members = {f"study/im{i}.dcm": random_bytes(MEMBER_SIZE, i) for i in range(4)}
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zf:
+            for name, content in self.members.items():
+                zf.writestr(name, content)
+            zf.writestr("study/readme.txt", b"notes")
+        self.archive = buffer.getvalue()
+        disk = MockDisk()
+        disk.add_file("/scans.zip", self.archive)
+        self.server = MockDiskServer(disk).start()
+        self.client = YandexDiskClient("test", backoff_factor=0.01)
+        self.client.base_url = self.server.base_url
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def _files(self, root):
+        return sorted(os.path.relpath(os.path.join(path, name), root)
+                      for path, _, names in os.walk(root) for name in names)
+
+    def test_extract_reports_every_chunk(self):
+        received = []
+        with RemoteZipFile(self.client, "/scans.zip", progress_callback=received.append) as remote_zip:
+            extracted = remote_zip.extract(self.tmp.name, "*.dcm")
+            self.assertEqual(sum(received), remote_zip.bytes_fetched)
+        self.assertEqual(len(extracted), 4)
+        self.assertLessEqual(max(received), STREAM_CHUNK_SIZE)
+        self.assertNotIn(os.path.join("study", "readme.txt"), self._files(self.tmp.name))
+        with open(os.path.join(self.tmp.name, "study", "im2.dcm"), 'rb') as f:
+            self.assertEqual(f.read(), self.members["study/im2.dcm"])
+
+    def test_cancel_leaves_only_complete_members(self):
+        control = TransferControl()
+        received = [0]
+
+        def on_bytes(count):
+            received[0] += count
+            if received[0] > MEMBER_SIZE + MB:
+                control.cancel()
+
+        with self.assertRaises(TransferCancelled):
+            with RemoteZipFile(self.client, "/scans.zip", progress_callback=on_bytes,
+                               control=control) as remote_zip:
+                remote_zip.extract(self.tmp.name, "*.dcm")
+        self.assertEqual(self._files(self.tmp.name), [os.path.join("study", "im0.dcm")])
+        self.assertEqual(os.path.getsize(os.path.join(self.tmp.name, "study", "im0.dcm")), MEMBER_SIZE)
+
+    def test_local_extract_uses_same_filter(self):
+        zip_path = os.path.join(self.tmp.name, "scans.zip")
+        with open(zip_path, 'wb') as f:
+            f.write(self.archive)
+        extractor = ZipExtractor(max_workers=2)
+        result = extractor.extract(zip_path, os.path.join(self.tmp.name, "out"), match="*.dcm")
+        extractor.shutdown()
+        self.assertTrue(result.ok)
+        self.assertEqual(result.extracted, 4)
+        self.assertEqual(self._files(os.path.join(self.tmp.name, "out")),
+                         [os.path.join("study", f"im{i}.dcm") for i in range(4)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Приоритеты и адаптивные лимиты планировщика запросов
+"""
+
+import threading
+import time
+import unittest
+
+from benchmarks.mock_disk import MockDisk, MockDiskServer
+from yandex_disk.api_client import YandexDiskClient
+from yandex_disk.scheduler import (RequestScheduler, TokenBucket, ENDPOINT_READ,
+                                   PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND, ADAPTIVE_MIN_RATE)
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def test_interactive_waiter_goes_first(self):
+        bucket = TokenBucket(rate=5, capacity=1)
+        bucket.acquire()
+        order = []
+
+        def wait(name, priority):
+            bucket.acquire(1, priority)
+            order.append(name)
+
+        background = threading.Thread(target=wait, args=("background", PRIORITY_BACKGROUND))
+        background.start()
+        while not bucket._waiters:
+            time.sleep(0.001)
+        # Интерактивный запрос пришел позже, но получает первый токен
+        interactive = threading.Thread(target=wait, args=("interactive", PRIORITY_INTERACTIVE))
+        interactive.start()
+        background.join()
+        interactive.join()
+        self.assertEqual(order, ["interactive", "background"])
+
+
+class AdaptiveLimitTest(unittest.TestCase):
+
+    def test_no_limit_until_throttled(self):
+        scheduler = RequestScheduler()
+        for _ in range(20):
+            self.assertEqual(scheduler.acquire_request(ENDPOINT_READ), 0.0)
+        self.assertEqual(scheduler.current_limits(), {})
+
+    def test_throttling_halves_observed_rate_once_per_wave(self):
+        scheduler = RequestScheduler()
+        for _ in range(20):
+            scheduler.acquire_request(ENDPOINT_READ)
+        scheduler.report_throttled(ENDPOINT_READ)
+        rate = scheduler.current_limits()[ENDPOINT_READ]
+        self.assertGreaterEqual(rate, ADAPTIVE_MIN_RATE)
+        # Отказы той же волны запросов не снижают частоту повторно
+        scheduler.report_throttled(ENDPOINT_READ)
+        self.assertEqual(scheduler.current_limits()[ENDPOINT_READ], rate)
+
+        bucket = scheduler._adaptive[ENDPOINT_READ]
+        bucket.set_rate(10, 1)
+        scheduler.acquire_request(ENDPOINT_READ)
+        started = time.monotonic()
+        for _ in range(3):
+            scheduler.acquire_request(ENDPOINT_READ)
+        self.assertGreaterEqual(time.monotonic() - started, 0.25)
+
+    def test_fixed_limit_is_not_adapted(self):
+        scheduler = RequestScheduler(rate_limits={ENDPOINT_READ: (50, 5)})
+        scheduler.report_throttled(ENDPOINT_READ)
+        self.assertEqual(scheduler.current_limits(), {ENDPOINT_READ: 50})
+
+
+class InteractiveSessionTest(unittest.TestCase):
+
+    def test_interactive_requests_use_own_pool(self):
+        disk = MockDisk()
+        disk.add_file("/a.dcm", b"a")
+        with MockDiskServer(disk) as server:
+            client = YandexDiskClient("test", backoff_factor=0.01)
+            client.base_url = server.base_url
+            used = []
+            request = client.interactive_session.request
+
+            def counting_request(*args, **kwargs):
+                used.append(args[1])
+                return request(*args, **kwargs)
+
+            client.interactive_session.request = counting_request
+            client.get_file_info("/a.dcm")
+            self.assertEqual(used, [])
+            with client.priority(PRIORITY_INTERACTIVE):
+                client.get_file_info("/a.dcm")
+            self.assertEqual(len(used), 1)
+            client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Локальный индекс поиска на имитации Яндекс.Диска
+"""
+
+import unittest
+
+from benchmarks.mock_disk import MockDisk, MockDiskServer
+from yandex_disk.api_client import YandexDiskClient
+from yandex_disk.search_index import DiskIndex
+
+
+class DiskIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        # Сервер отдает не больше 50 элементов за запрос при page_size 1000
+        self.disk = MockDisk(max_page_size=50)
+        for i in range(120):
+            self.disk.add_file(f"/MRI/sub-{i:03d}/anat/T1w.nii.gz", f"scan {i}".encode())
+        self.server = MockDiskServer(self.disk).start()
+        self.client = YandexDiskClient("test", backoff_factor=0.01)
+        self.client.base_url = self.server.base_url
+        self.index = DiskIndex(":memory:")
+
+    def tearDown(self):
+        self.index.close()
+        self.server.stop()
+
+    def test_full_refresh_follows_server_limit(self):
+        stats = self.index.refresh(self.client, page_size=1000)
+        self.assertEqual(stats["added"], 120)
+        self.assertEqual(self.index.count(), 120)
+        self.assertEqual([r.path for r in self.index.search("sub 117")], ["disk:/MRI/sub-117/anat/T1w.nii.gz"])
+
+    def test_full_refresh_removes_deleted_files(self):
+        self.index.refresh(self.client)
+        self.disk.remove("/MRI/sub-000/anat/T1w.nii.gz")
+        self.disk.add_file("/MRI/sub-001/anat/T1w.nii.gz", b"rescanned")
+        stats = self.index.refresh(self.client)
+        self.assertEqual((stats["added"], stats["updated"], stats["removed"]), (0, 1, 1))
+        self.assertEqual(self.index.count(), 119)
+
+    def test_recent_refresh_costs_one_request(self):
+        self.index.refresh(self.client)
+        self.disk.add_file("/MRI/sub-200/anat/T1w.nii.gz", b"new scan")
+        before = self.disk.requests_served
+        stats = self.index.refresh_recent(self.client, limit=10)
+        self.assertEqual(self.disk.requests_served - before, 1)
+        self.assertEqual(stats["added"], 1)
+        self.assertTrue(stats["complete"])
+        self.assertEqual(len(self.index.search("sub 200")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Докачка скачивания после отмены и согласованный байтовый прогресс на имитации Яндекс.Диска
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.mock_disk import MockDisk, MockDiskServer, random_bytes
+from yandex_disk import api_client
+from yandex_disk.api_client import YandexDiskClient, PART_SUFFIX, SEGMENTS_SUFFIX
+from yandex_disk.progress import TransferControl, TransferCancelled
+
+
+MB = 1024 * 1024
+SIZE = 8 * MB
+REMOTE_PATH = "/resume/scan.nii"
+
+
+class SegmentedResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.content = random_bytes(SIZE, 7)
+        disk = MockDisk()
+        disk.add_file(REMOTE_PATH, self.content)
+        self.server = MockDiskServer(disk).start()
+        self.client = YandexDiskClient("test", backoff_factor=0.01)
+        self.client.base_url = self.server.base_url
+        self.tmp = tempfile.TemporaryDirectory()
+        self.local_path = os.path.join(self.tmp.name, "scan.nii")
+        # Маленький порог, чтобы файл теста скачивался диапазонами
+        patcher = mock.patch.object(api_client, "SEGMENTED_MIN_SIZE", MB)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def _cancel_segmented(self, after_bytes: int):
+        """Запускает сегментное скачивание и отменяет его после after_bytes байт"""
+        control = TransferControl()
+        received = [0]
+
+        def on_bytes(count):
+            received[0] += count
+            if received[0] >= after_bytes:
+                control.cancel()
+
+        with self.assertRaises(TransferCancelled):
+            self.client.download_file(REMOTE_PATH, self.local_path, progress_callback=on_bytes,
+                                      segments=4, control=control)
+        return received[0]
+
+    def _download(self, **kwargs):
+        """Скачивает файл и возвращает (сумму прогресса, байт получено по сети)"""
+        reported = [0]
+        received = [0]
+        account_transfer = self.client.account_transfer
+
+        def count_transfer(count):
+            received[0] += count
+            account_transfer(count)
+
+        with mock.patch.object(self.client, "account_transfer", count_transfer):
+            ok = self.client.download_file(REMOTE_PATH, self.local_path,
+                                           progress_callback=lambda n: reported.__setitem__(0, reported[0] + n),
+                                           **kwargs)
+        return ok, reported[0], received[0]
+
+    def _read(self) -> bytes:
+        with open(self.local_path, 'rb') as f:
+            return f.read()
+
+    def test_cancelled_segments_are_not_a_part_prefix(self):
+        self._cancel_segmented(3 * MB)
+        self.assertFalse(os.path.exists(self.local_path + PART_SUFFIX))
+        self.assertTrue(self.client.download_file(REMOTE_PATH, self.local_path, segments=1, verify=False))
+        self.assertEqual(self._read(), self.content)
+
+    def test_segmented_download_resumes_after_cancel(self):
+        first = self._cancel_segmented(3 * MB)
+        ok, reported, received = self._download(segments=4)
+        self.assertTrue(ok)
+        self.assertEqual(self._read(), self.content)
+        self.assertLessEqual(first + received, SIZE + 4 * MB)
+        self.assertLess(received, SIZE)
+        # Скачанное до отмены сообщается в прогресс при докачке
+        self.assertEqual(reported, SIZE)
+        self.assertFalse(os.path.exists(self.local_path + SEGMENTS_SUFFIX))
+
+    def test_single_stream_prefix_continues_in_segments(self):
+        control = TransferControl()
+        received = [0]
+
+        def on_bytes(count):
+            received[0] += count
+            if received[0] >= 2 * MB:
+                control.cancel()
+
+        with self.assertRaises(TransferCancelled):
+            self.client.download_file(REMOTE_PATH, self.local_path, progress_callback=on_bytes,
+                                      segments=1, control=control)
+        prefix = os.path.getsize(self.local_path + PART_SUFFIX)
+        ok, reported, received = self._download(segments=4)
+        self.assertTrue(ok)
+        self.assertEqual(self._read(), self.content)
+        self.assertEqual(received, SIZE - prefix)
+        self.assertEqual(reported, SIZE)
+
+    def test_progress_counts_file_once(self):
+        with open(self.local_path + PART_SUFFIX, 'wb') as f:
+            f.write(self.content[:3 * MB])
+        ok, reported, received = self._download(segments=1, verify=False)
+        self.assertTrue(ok)
+        self.assertEqual((reported, received), (SIZE, SIZE - 3 * MB))
+
+    def test_verify_retry_discards_reported_bytes(self):
+        ok, reported, received = self._download(segments=1, expected_hashes={"md5": "0" * 32})
+        self.assertFalse(ok)
+        self.assertTrue(os.path.exists(self.local_path + api_client.CORRUPT_SUFFIX))
+        self.assertEqual(received, 2 * SIZE)
+        self.assertEqual(reported, SIZE)
+
+
+if __name__ == "__main__":
+    unittest.main()
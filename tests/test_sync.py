@@ -0,0 +1,64 @@
+"""
+Инкрементальная синхронизация папки на имитации Яндекс.Диска
+"""
+
+import os
+import tempfile
+import unittest
+
+from benchmarks.mock_disk import MockDisk, MockDiskServer
+from yandex_disk.api_client import YandexDiskClient
+from yandex_disk.sync import sync_folder, load_manifest
+
+
+class SyncFolderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.disk = MockDisk()
+        self.disk.add_file("/study/im1.dcm", b"one")
+        self.disk.add_file("/study/series/im2.dcm", b"two")
+        self.server = MockDiskServer(self.disk).start()
+        self.client = YandexDiskClient("test", backoff_factor=0.01)
+        self.client.base_url = self.server.base_url
+        self.tmp = tempfile.TemporaryDirectory()
+        self.local = self.tmp.name
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def _read(self, *parts):
+        with open(os.path.join(self.local, *parts), 'rb') as f:
+            return f.read()
+
+    def test_second_run_skips_unchanged_files(self):
+        first = sync_folder(self.client, "/study", self.local)
+        self.assertEqual(sorted(first.downloaded), ["im1.dcm", "series/im2.dcm"])
+        self.assertEqual(self._read("series", "im2.dcm"), b"two")
+
+        self.disk.add_file("/study/im1.dcm", b"changed")
+        second = sync_folder(self.client, "/study", self.local)
+        self.assertEqual(second.downloaded, ["im1.dcm"])
+        self.assertEqual(second.skipped, ["series/im2.dcm"])
+        self.assertEqual(self._read("im1.dcm"), b"changed")
+
+    def test_prune_removes_only_manifest_files(self):
+        sync_folder(self.client, "/study", self.local)
+        with open(os.path.join(self.local, "notes.txt"), 'w') as f:
+            f.write("local")
+        self.disk.remove("/study/series/im2.dcm")
+
+        dry = sync_folder(self.client, "/study", self.local, prune=True, dry_run=True)
+        self.assertEqual(dry.pruned, ["series/im2.dcm"])
+        self.assertTrue(os.path.exists(os.path.join(self.local, "series", "im2.dcm")))
+
+        result = sync_folder(self.client, "/study", self.local, prune=True)
+        self.assertEqual(result.pruned, ["series/im2.dcm"])
+        self.assertFalse(os.path.exists(os.path.join(self.local, "series", "im2.dcm")))
+        self.assertTrue(os.path.exists(os.path.join(self.local, "notes.txt")))
+        self.assertEqual(sorted(load_manifest(self.local)), ["im1.dcm"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,22 +2,246 @@
 Клиент для работы с API Яндекс.Диска
 """
 
+import os
+import time
+import threading
 import requests
+import urllib3
 import json
-from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Union, Callable, Iterator
 from urllib.parse import urlencode
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from yandex_disk.download_cache import DownloadCache
+from yandex_disk.hashing import StreamHasher
+from yandex_disk.resource import Resource, fields_param
+from yandex_disk.metrics import Metrics
+from yandex_disk.progress import TransferControl, PartProgress
+from yandex_disk.scheduler import RequestScheduler, ENDPOINT_READ, PRIORITY_INTERACTIVE
+
+
+# Статусы, при которых запрос повторяется с экспоненциальной задержкой
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Статусы, которыми сервер сообщает о превышении частоты запросов
+THROTTLE_STATUS_CODES = (429, 503)
+
+# Методы, которые повторяет urllib3; POST повторяет только start_operation при 429/503,
+# когда запрос заведомо не был выполнен
+RETRY_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+
+# Максимальная задержка повтора после 429/503 в секундах
+MAX_RETRY_DELAY = 30
+
+# Статусы хоста хранилища, означающие истекшую подписанную ссылку
+EXPIRED_LINK_STATUS_CODES = (403, 404, 410)
+
+# Суффикс временного файла незавершенного скачивания
+PART_SUFFIX = ".part"
+
+# Заранее выделенный файл сегментного скачивания и файл с позициями его диапазонов;
+# в .part он переименовывается только после завершения всех диапазонов
+SEGMENTS_SUFFIX = ".segments"
+SEGMENTS_STATE_SUFFIX = ".segments.json"
+
+# Как часто диапазон сохраняет свою позицию в файл состояния (байт)
+SEGMENTS_STATE_INTERVAL = 16 * 1024 * 1024
+
+# Суффикс файла, не прошедшего проверку контрольной суммы
+CORRUPT_SUFFIX = ".corrupt"
+
+# Сколько раз скачивать файл заново при несовпадении контрольной суммы
+VERIFY_ATTEMPTS = 2
+
+# Размер буфера чтения при скачивании
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+
+# Поля ответов API, запрашиваемые при листинге: без превью, custom_properties и exif
+RESOURCE_FIELDS_PARAM = fields_param()
+FOLDER_FIELDS_PARAM = fields_param("_embedded.items.", ("_embedded.total", "_embedded.limit",
+                                                        "_embedded.offset", "name", "path", "type"))
+FILES_FIELDS_PARAM = fields_param("items.", ("limit", "offset"))
+
+# Файлы меньше этого размера скачиваются одним потоком даже в сегментном режиме
+SEGMENTED_MIN_SIZE = 64 * 1024 * 1024
+
+# Размер пула соединений на один хост по умолчанию
+DEFAULT_POOL_SIZE = 10
+
+# Отдельный пул запросов к API с приоритетом PRIORITY_INTERACTIVE: они не ждут
+# соединений, занятых фоновыми потоками
+INTERACTIVE_POOL_SIZE = 4
+
+
+def pool_size_for(workers: int, segments: int = 1) -> int:
+    """
+    Размер пула, при котором потоки скачивания не ждут свободного соединения
+
+    Пул блокирующий: поток без соединения ждет его внутри urllib3, вне планировщика
+    и его приоритетов. Каждому потоку нужно соединение к API и по одному на диапазон.
+
+    Args:
+        workers: Количество одновременных скачиваний
+        segments: Количество диапазонов одного файла
+
+    Returns:
+        int: Значение pool_size для YandexDiskClient
+    """
+    return max(DEFAULT_POOL_SIZE, workers * (max(segments, 1) + 1))
 
 
 class YandexDiskClient:
     """Клиент для работы с API Яндекс.Диска"""
     
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: str, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: Union[float, Tuple[float, float]] = (10, 60),
+                 max_retries: int = 5, backoff_factor: float = 0.5,
+                 rate_limits: Optional[Dict[str, Optional[Tuple[float, float]]]] = None,
+                 bandwidth_limit: Optional[float] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 metrics: Optional[Metrics] = None,
+                 cache: Optional[DownloadCache] = None):
+        """
+        Args:
+            access_token: OAuth токен
+            pool_size: Размер пула keep-alive соединений на один хост; должен покрывать
+                все потоки, которые одновременно обращаются к хосту, см. pool_size_for()
+            timeout: Таймаут (connect, read) в секундах
+            max_retries: Максимальное количество повторов при сетевых ошибках и 429/5xx
+            backoff_factor: Базовая задержка экспоненциального backoff в секундах
+            rate_limits: Фиксированные лимиты (запросов в секунду, всплеск) по классам запросов
+                к API; по умолчанию запросы не ограничиваются до первых ответов 429/503
+            bandwidth_limit: Ограничение суммарной скорости передачи в байтах в секунду
+            scheduler: Общий планировщик (вместо rate_limits/bandwidth_limit), например
+                для нескольких клиентов с одним токеном
+            metrics: Сборщик метрик (по умолчанию создается собственный)
+            cache: Локальный кэш скачанных файлов по sha256
+        """
         self.access_token = access_token
         self.base_url = "https://cloud-api.yandex.net/v1/disk"
         self.headers = {
             "Authorization": f"OAuth {access_token}",
             "Content-Type": "application/json"
         }
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.scheduler = scheduler or RequestScheduler(rate_limits, bandwidth_limit)
+        self.metrics = metrics or Metrics()
+        self.cache = cache
+        self.session = self._create_session(pool_size, max_retries, backoff_factor)
+        self.interactive_session = self._create_session(INTERACTIVE_POOL_SIZE, max_retries, backoff_factor)
+        # Тело загрузки нельзя повторить после частичной отправки: повторы выполняет upload_file
+        self.upload_session = self._create_session(pool_size, 0, backoff_factor)
+    
+    @staticmethod
+    def _create_session(pool_size: int, max_retries: int, backoff_factor: float) -> requests.Session:
+        """
+        Создает сессию с пулом соединений и автоматическими повторами
+        
+        Сессия не хранит заголовок авторизации: он передается только в запросы
+        к API, чтобы токен не уходил на хосты хранилища по ссылкам href.
+        Retry-After в ответах 429/503 учитывается автоматически.
+        """
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=retry, pool_block=True)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+    
+    def _api_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """
+        Выполняет запрос к API через общую сессию
+        
+        Запросы потока с приоритетом PRIORITY_INTERACTIVE идут через собственный
+        пул соединений, поэтому не ждут соединений, занятых фоновыми потоками.
+        
+        Args:
+            method: HTTP метод
+            endpoint: Путь относительно base_url (например, "/resources")
+            **kwargs: Дополнительные аргументы для requests
+            
+        Returns:
+            requests.Response: Ответ сервера
+        """
+        kwargs.setdefault("headers", self.headers)
+        kwargs.setdefault("timeout", self.timeout)
+        endpoint_class = self.scheduler.classify(method, endpoint)
+        self.scheduler.acquire_request(endpoint_class)
+        session = (self.interactive_session if self.scheduler.current_priority == PRIORITY_INTERACTIVE
+                   else self.session)
+        started = time.perf_counter()
+        try:
+            response = session.request(method, f"{self.base_url}{endpoint}", **kwargs)
+        except requests.exceptions.RequestException:
+            self.metrics.record_request(method, endpoint, 0, time.perf_counter() - started)
+            raise
+        history = self._note_throttling(endpoint_class, response)
+        self.metrics.record_request(method, endpoint, response.status_code, time.perf_counter() - started,
+                                    len(history))
+        return response
+    
+    def _note_throttling(self, endpoint_class: str, response: requests.Response) -> tuple:
+        """
+        Сообщает планировщику об ответах 429/503, включая повторенные urllib3
+        
+        Returns:
+            tuple: История повторов запроса
+        """
+        retries = getattr(response.raw, "retries", None)
+        history = retries.history if retries is not None else ()
+        if (response.status_code in THROTTLE_STATUS_CODES
+                or any(entry.status in THROTTLE_STATUS_CODES for entry in history)):
+            self.scheduler.report_throttled(endpoint_class)
+        return history
+    
+    def _retry_delay(self, response: requests.Response, attempt: int) -> float:
+        """Задержка перед повтором: Retry-After ответа или экспоненциальный backoff"""
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_DELAY)
+        return min(self.backoff_factor * (2 ** attempt), MAX_RETRY_DELAY)
+    
+    def account_transfer(self, count: int):
+        """
+        Учитывает переданный блок данных в ограничении скорости и метриках
+        
+        Args:
+            count: Количество байт
+        """
+        self.scheduler.acquire_bytes(count)
+        self.metrics.add_transfer_bytes(count)
+    
+    def priority(self, priority: int):
+        """
+        Задает приоритет запросов текущего потока (см. RequestScheduler.priority)
+        
+        Пример: ``with client.priority(PRIORITY_INTERACTIVE): client.list_files(path)``
+        """
+        return self.scheduler.priority(priority)
+    
+    def close(self):
+        """Закрывает пулы соединений"""
+        self.session.close()
+        self.interactive_session.close()
+        self.upload_session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
     
     def get_user_info(self) -> Optional[Dict[str, Any]]:
         """
@@ -27,7 +251,7 @@ class YandexDiskClient:
             Dict[str, Any] или None: Информация о пользователе
         """
         try:
-            response = requests.get(f"{self.base_url}/", headers=self.headers)
+            response = self._api_request("GET", "/")
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -47,22 +271,26 @@ class YandexDiskClient:
             offset: Смещение для пагинации
             
         Returns:
-            Dict[str, Any] или None: Список файлов
+            Dict[str, Any] или None: Ответ API, в котором _embedded.items - записи Resource
         """
         try:
             params = {
                 "path": path,
                 "limit": limit,
-                "offset": offset
+                "offset": offset,
+                "fields": FOLDER_FIELDS_PARAM
             }
             
-            response = requests.get(
-                f"{self.base_url}/resources",
-                headers=self.headers,
+            response = self._api_request(
+                "GET",
+                "/resources",
                 params=params
             )
             response.raise_for_status()
             data = response.json()
+            embedded = data.get("_embedded")
+            if embedded:
+                embedded["items"] = [Resource.from_api(item) for item in embedded.get("items", [])]
             return data
         except requests.exceptions.RequestException as e:
             print(f"Ошибка при получении списка файлов: {e}")
@@ -71,7 +299,105 @@ class YandexDiskClient:
                 print(f"Ответ сервера: {e.response.text}")
             return None
     
-    def get_file_info(self, path: str) -> Optional[Dict[str, Any]]:
+    def iter_file_pages(self, path: str = "/", page_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Постранично обходит содержимое папки, пока не получены все _embedded.total элементов
+        
+        Args:
+            path: Путь к папке
+            page_size: Количество элементов в одном запросе
+            
+        Yields:
+            List[Resource]: Элементы очередной страницы
+            
+        Raises:
+            requests.exceptions.RequestException: При ошибке запроса
+        """
+        offset = 0
+        while True:
+            response = self._api_request(
+                "GET",
+                "/resources",
+                params={"path": path, "limit": page_size, "offset": offset, "fields": FOLDER_FIELDS_PARAM}
+            )
+            response.raise_for_status()
+            embedded = response.json().get("_embedded") or {}
+            items = [Resource.from_api(item) for item in embedded.get("items", [])]
+            if items:
+                yield items
+            offset += len(items)
+            total = embedded.get("total")
+            if not items or (total is not None and offset >= total) or (total is None and len(items) < page_size):
+                return
+    
+    def iter_files(self, path: str = "/", page_size: int = 1000) -> Iterator[Resource]:
+        """
+        Обходит все элементы папки с автоматической пагинацией
+        
+        Args:
+            path: Путь к папке
+            page_size: Количество элементов в одном запросе
+            
+        Yields:
+            Resource: Файл или папка
+        """
+        for page in self.iter_file_pages(path, page_size):
+            yield from page
+    
+    def iter_all_files(self, page_size: int = 1000, media_type: Optional[str] = None) -> Iterator[List[Resource]]:
+        """
+        Постранично обходит плоский список всех файлов диска (/resources/files)
+        
+        Сервер может уменьшить limit; конец списка определяется по limit из ответа,
+        а не по запрошенному page_size.
+        
+        Args:
+            page_size: Количество элементов в одном запросе
+            media_type: Фильтр по типу файлов (например, "compressed")
+            
+        Yields:
+            List[Resource]: Файлы очередной страницы
+            
+        Raises:
+            requests.exceptions.RequestException: При ошибке запроса
+        """
+        offset = 0
+        while True:
+            params = {"limit": page_size, "offset": offset, "fields": FILES_FIELDS_PARAM}
+            if media_type:
+                params["media_type"] = media_type
+            response = self._api_request("GET", "/resources/files", params=params)
+            response.raise_for_status()
+            data = response.json()
+            items = [Resource.from_api(item) for item in data.get("items", [])]
+            if items:
+                yield items
+            if not items or len(items) < min(data.get("limit") or page_size, page_size):
+                return
+            offset += len(items)
+    
+    def get_last_uploaded(self, limit: int = 1000, media_type: Optional[str] = None) -> List[Resource]:
+        """
+        Получает последние загруженные файлы (/resources/last-uploaded), новые первыми
+        
+        Args:
+            limit: Максимальное количество файлов
+            media_type: Фильтр по типу файлов
+            
+        Returns:
+            List[Resource]: Файлы в порядке убывания времени загрузки
+            
+        Raises:
+            requests.exceptions.RequestException: При ошибке запроса
+        """
+        params = {"limit": limit, "fields": FILES_FIELDS_PARAM}
+        if media_type:
+            params["media_type"] = media_type
+        response = self._api_request("GET", "/resources/last-uploaded", params=params)
+        response.raise_for_status()
+        return [Resource.from_api(item) for item in response.json().get("items", [])]
+    
+    def get_file_info(self, path: str) -> Optional[Resource]:
         """
         Получает информацию о файле
         
@@ -79,38 +405,41 @@ class YandexDiskClient:
             path: Путь к файлу
             
         Returns:
-            Dict[str, Any] или None: Информация о файле
+            Resource или None: Информация о файле
         """
         try:
-            params = {"path": path}
-            response = requests.get(
-                f"{self.base_url}/resources",
-                headers=self.headers,
+            params = {"path": path, "fields": RESOURCE_FIELDS_PARAM}
+            response = self._api_request(
+                "GET",
+                "/resources",
                 params=params
             )
             response.raise_for_status()
-            return response.json()
+            return Resource.from_api(response.json())
         except requests.exceptions.RequestException as e:
             print(f"Ошибка при получении информации о файле: {e}")
             return None
     
-    def create_folder(self, path: str) -> bool:
+    def create_folder(self, path: str, exist_ok: bool = False) -> bool:
         """
         Создает папку
         
         Args:
             path: Путь к создаваемой папке
+            exist_ok: Считать успехом, если папка уже существует
             
         Returns:
             bool: True если папка создана успешно
         """
         try:
             params = {"path": path}
-            response = requests.put(
-                f"{self.base_url}/resources",
-                headers=self.headers,
+            response = self._api_request(
+                "PUT",
+                "/resources",
                 params=params
             )
+            if exist_ok and response.status_code == 409:
+                return True
             response.raise_for_status()
             return True
         except requests.exceptions.RequestException as e:
@@ -133,9 +462,9 @@ class YandexDiskClient:
                 "path": path,
                 "permanently": permanently
             }
-            response = requests.delete(
-                f"{self.base_url}/resources",
-                headers=self.headers,
+            response = self._api_request(
+                "DELETE",
+                "/resources",
                 params=params
             )
             response.raise_for_status()
@@ -144,6 +473,61 @@ class YandexDiskClient:
             print(f"Ошибка при удалении файла: {e}")
             return False
     
+    def start_operation(self, method: str, endpoint: str, params: Dict[str, Any]) -> Optional[str]:
+        """
+        Выполняет изменяющий запрос к ресурсам и возвращает ссылку на операцию
+        
+        Для папок API отвечает 202 и ссылкой на асинхронную операцию, которая
+        завершается позже; для файлов изменение выполняется сразу.
+        
+        Ответ 429/503 означает, что запрос не выполнялся, поэтому он повторяется
+        (до max_retries раз) и для POST, который не повторяет urllib3: после паузы
+        из Retry-After и через планировщик, уже снизивший частоту запросов.
+        
+        Args:
+            method: HTTP метод ("PUT", "DELETE", "POST")
+            endpoint: Путь относительно base_url (например, "/resources/move")
+            params: Параметры запроса
+            
+        Returns:
+            str или None: Ссылка на операцию или None, если запрос уже выполнен
+            
+        Raises:
+            requests.exceptions.RequestException: При ошибке запроса
+        """
+        for attempt in range(self.max_retries + 1):
+            response = self._api_request(method, endpoint, params=params)
+            if (response.status_code not in THROTTLE_STATUS_CODES or method in RETRY_METHODS
+                    or attempt == self.max_retries):
+                break
+            time.sleep(self._retry_delay(response, attempt))
+        response.raise_for_status()
+        if response.status_code == 202:
+            return response.json().get("href")
+        return None
+    
+    def get_operation_status(self, href: str) -> str:
+        """
+        Получает статус асинхронной операции
+        
+        Args:
+            href: Ссылка на операцию из ответа 202
+            
+        Returns:
+            str: "success", "failed" или "in-progress"
+            
+        Raises:
+            requests.exceptions.RequestException: При ошибке запроса
+        """
+        self.scheduler.acquire_request(ENDPOINT_READ)
+        started = time.perf_counter()
+        response = self.session.get(href, headers=self.headers, timeout=self.timeout)
+        history = self._note_throttling(ENDPOINT_READ, response)
+        self.metrics.record_request("GET", "/operations", response.status_code, time.perf_counter() - started,
+                                    len(history))
+        response.raise_for_status()
+        return response.json().get("status", "in-progress")
+    
     def get_download_link(self, path: str) -> Optional[str]:
         """
         Получает ссылку для скачивания файла
@@ -156,9 +540,9 @@ class YandexDiskClient:
         """
         try:
             params = {"path": path}
-            response = requests.get(
-                f"{self.base_url}/resources/download",
-                headers=self.headers,
+            response = self._api_request(
+                "GET",
+                "/resources/download",
                 params=params
             )
             response.raise_for_status()
@@ -168,21 +552,499 @@ class YandexDiskClient:
             print(f"Ошибка при получении ссылки для скачивания: {e}")
             return None 
 
-    def download_file(self, remote_path: str, local_path: str) -> bool:
+    def get_upload_link(self, path: str, overwrite: bool = True) -> Optional[str]:
         """
-        Скачивает файл с Яндекс.Диска в указанный локальный путь.
+        Получает ссылку для загрузки файла
+        
+        Args:
+            path: Путь к файлу на Яндекс.Диске
+            overwrite: Перезаписать существующий файл
+            
+        Returns:
+            str или None: Ссылка для загрузки
         """
         try:
-            href = self.get_download_link(remote_path)
+            response = self._api_request(
+                "GET",
+                "/resources/upload",
+                params={"path": path, "overwrite": str(overwrite).lower()}
+            )
+            response.raise_for_status()
+            return response.json().get("href")
+        except requests.exceptions.RequestException as e:
+            print(f"Ошибка при получении ссылки для загрузки: {e}")
+            return None
+    
+    def upload_file(self, local_path: str, remote_path: str, overwrite: bool = True,
+                    progress_callback: Optional[Callable[[int], None]] = None,
+                    attempts: int = 5, control: Optional[TransferControl] = None) -> bool:
+        """
+        Загружает локальный файл на Яндекс.Диск
+        
+        Файл читается с диска блоками по мере отправки и не загружается в память
+        целиком. Тело запроса нельзя повторить после частичной отправки, поэтому
+        после ошибки запрашивается новая ссылка и файл отправляется заново.
+        
+        Args:
+            local_path: Путь к локальному файлу
+            remote_path: Путь к файлу на Яндекс.Диске (папка должна существовать)
+            overwrite: Перезаписать существующий файл
+            progress_callback: Вызывается с количеством отправленных байт после каждого блока
+            attempts: Количество попыток загрузки
+            control: Пауза и отмена, проверяемые после каждого блока
+            
+        Returns:
+            bool: True если файл загружен успешно
+            
+        Raises:
+            TransferCancelled: Если загрузка отменена через control
+        """
+        last_error = None
+        for attempt in range(attempts):
+            if attempt:
+                self.metrics.record_retry("upload")
+                time.sleep(min(self.backoff_factor * (2 ** attempt), 30))
+            href = self.get_upload_link(remote_path, overwrite)
             if not href:
                 return False
-            with requests.get(href, stream=True) as r:
-                r.raise_for_status()
-                with open(local_path, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=8192):
+            try:
+                started = time.perf_counter()
+                with open(local_path, 'rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    body = _UploadStream(f, size, self.account_transfer, progress_callback, control)
+                    response = self.upload_session.put(href, data=body, timeout=self.timeout)
+                if response.status_code in (201, 202):
+                    self.metrics.record_transfer("upload", remote_path, size, time.perf_counter() - started)
+                    return True
+                response.raise_for_status()
+                last_error = f"неожиданный ответ {response.status_code}"
+            except requests.exceptions.RequestException as e:
+                last_error = e
+            except OSError as e:
+                print(f"Ошибка чтения файла {local_path}: {e}")
+                return False
+        print(f"Ошибка при загрузке файла {remote_path}: {last_error}")
+        return False
+    
+    def download_file(self, remote_path: str, local_path: str,
+                      progress_callback: Optional[Callable[[int], None]] = None,
+                      resume_attempts: int = 5, segments: int = 1,
+                      expected_hashes: Optional[Dict[str, Any]] = None, verify: bool = True,
+                      control: Optional[TransferControl] = None) -> bool:
+        """
+        Скачивает файл с Яндекс.Диска в указанный локальный путь.
+        
+        Данные пишутся во временный файл ``local_path + ".part"``. После обрыва
+        соединения или перезапуска скачивание продолжается с места остановки
+        через заголовок Range, а готовый файл атомарно переносится в local_path.
+        
+        При segments > 1 большой файл делится на диапазоны, которые скачиваются
+        одновременно. Если сервер не поддерживает Range, используется один поток.
+        
+        При verify md5 и sha256 считаются по мере записи и сравниваются с
+        метаданными ресурса. Файл с несовпавшей суммой скачивается заново, а после
+        исчерпания попыток сохраняется как ``local_path + ".corrupt"``.
+        
+        Если у клиента есть cache и известен sha256, файл из кэша связывается с
+        local_path без скачивания, а проверенный скачанный файл добавляется в кэш
+        в фоновом потоке кэша.
+        
+        Args:
+            remote_path: Путь к файлу на Яндекс.Диске
+            local_path: Локальный путь для сохранения
+            progress_callback: Вызывается с количеством байт после записи каждого блока; сумма
+                вызовов равна размеру .part (скачанное ранее начало сообщается при докачке,
+                отброшенные байты - отрицательным значением)
+            resume_attempts: Количество попыток докачки после ошибок
+            segments: Количество одновременно скачиваемых диапазонов
+            expected_hashes: Ожидаемые "md5"/"sha256" (если не заданы, запрашиваются у API)
+            verify: Проверять контрольные суммы
+            control: Пауза и отмена, проверяемые после каждого блока
+            
+        Returns:
+            bool: True если файл скачан (и проверен) успешно
+            
+        Raises:
+            TransferCancelled: Если скачивание отменено через control (.part сохраняется)
+        """
+        part_path = local_path + PART_SUFFIX
+        progress = PartProgress(progress_callback)
+        hasher = None
+        if verify:
+            if expected_hashes is None:
+                info = self.get_file_info(remote_path)
+                expected_hashes = info.hashes if info is not None else {}
+            if expected_hashes.get("md5") or expected_hashes.get("sha256"):
+                hasher = StreamHasher()
+        sha256 = (expected_hashes or {}).get("sha256")
+        if self.cache is not None and sha256 and self.cache.fetch(sha256, local_path):
+            # Недокачанная ранее копия больше не нужна
+            for path in (part_path, local_path + SEGMENTS_SUFFIX, local_path + SEGMENTS_STATE_SUFFIX):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            progress.set_size(os.path.getsize(local_path))
+            return True
+        
+        for verify_attempt in range(VERIFY_ATTEMPTS):
+            if not self._fetch_to_part(remote_path, local_path, progress,
+                                       resume_attempts, segments, hasher, control):
+                return False
+            try:
+                if hasher is None or hasher.matches(expected_hashes):
+                    os.replace(part_path, local_path)
+                    if self.cache is not None and hasher is not None and sha256:
+                        # Копия в кэш (без reflink - полная запись файла) не задерживает скачивание
+                        self.cache.store_async(sha256, local_path)
+                    return True
+                print(f"Контрольная сумма файла {remote_path} не совпала "
+                      f"(попытка {verify_attempt + 1} из {VERIFY_ATTEMPTS})")
+                if verify_attempt + 1 < VERIFY_ATTEMPTS:
+                    os.remove(part_path)
+                    progress.set_size(0)
+            except OSError as e:
+                print(f"Ошибка записи файла {local_path}: {e}")
+                return False
+        try:
+            os.replace(part_path, local_path + CORRUPT_SUFFIX)
+        except OSError as e:
+            print(f"Ошибка записи файла {local_path}: {e}")
+        return False
+    
+    def _fetch_to_part(self, remote_path: str, local_path: str, progress: PartProgress,
+                       resume_attempts: int, segments: int,
+                       hasher: Optional[StreamHasher] = None,
+                       control: Optional[TransferControl] = None) -> bool:
+        """
+        Скачивает файл во временный .part файл с докачкой после ошибок
+        
+        Returns:
+            bool: True если .part файл скачан полностью
+        """
+        if segments > 1:
+            result = self._download_segmented(remote_path, local_path, segments,
+                                              progress, resume_attempts, control)
+            if result is not None:
+                if result and hasher is not None:
+                    # Диапазоны приходят не по порядку, поэтому суммы считаются после записи
+                    try:
+                        hasher.reset()
+                        hasher.update_from_file(local_path + PART_SUFFIX)
+                    except OSError as e:
+                        print(f"Ошибка чтения файла {local_path}: {e}")
+                        return False
+                return result
+        part_path = local_path + PART_SUFFIX
+        href = None
+        last_error = None
+        for attempt in range(resume_attempts + 1):
+            if attempt:
+                self.metrics.record_retry("download")
+                time.sleep(min(self.backoff_factor * (2 ** attempt), 30))
+            try:
+                if href is None:
+                    href = self.get_download_link(remote_path)
+                    if not href:
+                        return False
+                if self._download_to_part(href, part_path, progress, hasher, control):
+                    return True
+                # Подписанная ссылка истекла - запрашиваем новую
+                href = None
+            except requests.exceptions.RequestException as e:
+                last_error = e
+            except OSError as e:
+                print(f"Ошибка записи файла {local_path}: {e}")
+                return False
+        print(f"Ошибка при скачивании файла {remote_path}: {last_error or 'ссылка для скачивания недействительна'}")
+        return False
+    
+    def _download_to_part(self, href: str, part_path: str, progress: PartProgress,
+                          hasher: Optional[StreamHasher] = None,
+                          control: Optional[TransferControl] = None) -> bool:
+        """
+        Докачивает файл по ссылке во временный .part файл
+        
+        Args:
+            href: Ссылка для скачивания
+            part_path: Путь к временному файлу
+            progress: Прогресс файла; сначала ему сообщается уже имеющееся начало .part
+            hasher: Считает контрольные суммы всего файла, включая уже скачанную часть
+            control: Пауза и отмена
+            
+        Returns:
+            bool: True если файл скачан полностью, False если ссылка истекла
+        """
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        with self.session.get(href, stream=True, timeout=self.timeout, headers=headers) as r:
+            if r.status_code in EXPIRED_LINK_STATUS_CODES:
+                return False
+            if r.status_code == 416:
+                # Сервер не может отдать диапазон: файл уже скачан целиком или .part поврежден
+                total = r.headers.get("Content-Range", "").rpartition("/")[2]
+                if total.isdigit() and int(total) == offset:
+                    if hasher is not None:
+                        hasher.reset()
+                        hasher.update_from_file(part_path)
+                    progress.set_size(offset)
+                    return True
+                os.remove(part_path)
+                progress.set_size(0)
+                raise requests.exceptions.RequestException(f"Неверный диапазон для {part_path}, начинаем заново")
+            r.raise_for_status()
+            if r.status_code != 206:
+                # Range не поддерживается - скачиваем с начала
+                offset = 0
+            progress.set_size(offset)
+            expected = r.headers.get("Content-Length")
+            written = 0
+            write_seconds = 0.0
+            if hasher is not None:
+                hasher.reset()
+                if offset:
+                    hasher.update_from_file(part_path, offset)
+            started = time.perf_counter()
+            try:
+                with open(part_path, 'ab' if offset else 'wb') as f:
+                    for chunk in r.iter_content(chunk_size=DOWNLOAD_BUFFER_SIZE):
                         if chunk:
+                            write_started = time.perf_counter()
                             f.write(chunk)
+                            write_seconds += time.perf_counter() - write_started
+                            if hasher is not None:
+                                hasher.update(chunk)
+                            written += len(chunk)
+                            self.account_transfer(len(chunk))
+                            progress(len(chunk))
+                            if control is not None:
+                                control.checkpoint()
+            finally:
+                self.metrics.record_disk_write(written, write_seconds)
+                self.metrics.record_transfer("download", part_path[:-len(PART_SUFFIX)], written,
+                                             time.perf_counter() - started)
+            if expected is not None and written < int(expected):
+                raise requests.exceptions.ChunkedEncodingError(
+                    f"Соединение прервано: получено {written} из {expected} байт")
+        return True
+    
+    def _probe_range_support(self, href: str) -> Optional[int]:
+        """
+        Проверяет, поддерживает ли хост хранилища запросы Range
+        
+        Args:
+            href: Ссылка для скачивания
+            
+        Returns:
+            int или None: Полный размер файла, если Range поддерживается
+        """
+        with self.session.get(href, stream=True, timeout=self.timeout,
+                              headers={"Range": "bytes=0-0"}) as r:
+            if r.status_code != 206:
+                return None
+            total = r.headers.get("Content-Range", "").rpartition("/")[2]
+            return int(total) if total.isdigit() else None
+    
+    @staticmethod
+    def _load_segments_state(segments_path: str, state_path: str, total: int) -> Optional[List[List[int]]]:
+        """
+        Читает позиции диапазонов прерванного сегментного скачивания
+        
+        Returns:
+            List[List[int]] или None: Пары [следующая позиция, конец] диапазонов; None если
+                продолжать нечего (нет файлов, другой размер файла, поврежденное состояние)
+        """
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            ranges = [[int(pos), int(end)] for pos, end in state["ranges"]]
+            if state["total"] == total and os.path.getsize(segments_path) == total:
+                return ranges
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        for path in (segments_path, state_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return None
+    
+    @staticmethod
+    def _save_segments_state(state_path: str, total: int, ranges: List[List[int]]):
+        """Атомарно сохраняет позиции диапазонов сегментного скачивания"""
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"total": total, "ranges": ranges}, f)
+        os.replace(tmp_path, state_path)
+    
+    def _download_segmented(self, remote_path: str, local_path: str, segments: int,
+                            progress: PartProgress, resume_attempts: int = 5,
+                            control: Optional[TransferControl] = None) -> Optional[bool]:
+        """
+        Скачивает файл несколькими параллельными диапазонами в заранее выделенный файл
+        
+        Каждый диапазон читается в собственный переиспользуемый буфер и после
+        обрыва докачивается с последней записанной позиции.
+        
+        Файл выделяется под именем ``local_path + ".segments"``, а позиции
+        диапазонов сохраняются рядом в ``.segments.json``, поэтому после отмены
+        или перезапуска скачивание продолжается с сохраненных позиций. В .part
+        файл переносится только целиком: .part всегда содержит непрерывное
+        начало файла. Уже скачанное обычным режимом начало .part продолжается
+        диапазонами.
+        
+        Args:
+            remote_path: Путь к файлу на Яндекс.Диске
+            local_path: Локальный путь для сохранения
+            segments: Количество диапазонов
+            progress: Прогресс файла; сначала ему сообщается уже скачанная часть
+            resume_attempts: Количество попыток докачки каждого диапазона
+            control: Пауза и отмена
+            
+        Returns:
+            bool или None: True если .part файл скачан полностью; None если нужен обычный режим
+        """
+        part_path = local_path + PART_SUFFIX
+        segments_path = local_path + SEGMENTS_SUFFIX
+        state_path = local_path + SEGMENTS_STATE_SUFFIX
+        try:
+            href = self.get_download_link(remote_path)
+            if not href:
+                return False
+            total = self._probe_range_support(href)
+            if total is None or total < SEGMENTED_MIN_SIZE:
+                return None
+            
+            ranges = self._load_segments_state(segments_path, state_path, total)
+            if ranges is None:
+                # Начало файла из .part (обычный режим) не скачиваем повторно
+                offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                if 0 < offset <= total:
+                    os.replace(part_path, segments_path)
+                else:
+                    offset = 0
+                with open(segments_path, 'r+b' if offset else 'wb') as f:
+                    f.truncate(total)
+                segment_size = max(1, -(-(total - offset) // segments))
+                ranges = [[start, min(start + segment_size, total) - 1]
+                          for start in range(offset, total, segment_size)]
+                self._save_segments_state(state_path, total, ranges)
+            progress.set_size(total - sum(end - pos + 1 for pos, end in ranges if pos <= end))
+            state_lock = threading.Lock()
+            
+            def save_state():
+                with state_lock:
+                    self._save_segments_state(state_path, total, ranges)
+            
+            current_href = [href]
+            href_lock = threading.Lock()
+            # Потоки сегментов наследуют приоритет вызывающего потока
+            priority = self.scheduler.current_priority
+            
+            def refresh_href(used_href):
+                with href_lock:
+                    if current_href[0] == used_href:
+                        new_href = self.get_download_link(remote_path)
+                        if new_href:
+                            current_href[0] = new_href
+            
+            def fetch_range(segment: List[int]):
+                pos, end = segment
+                begin = saved = pos
+                attempt = 0
+                buffer = memoryview(bytearray(DOWNLOAD_BUFFER_SIZE))
+                started = time.perf_counter()
+                write_seconds = 0.0
+                # Без буфера Python: сохраненная позиция не опережает записанные данные
+                with open(segments_path, 'r+b', buffering=0) as f:
+                    try:
+                        while pos <= end:
+                            used_href = current_href[0]
+                            try:
+                                with self.session.get(used_href, stream=True, timeout=self.timeout,
+                                                      headers={"Range": f"bytes={pos}-{end}"}) as r:
+                                    if r.status_code in EXPIRED_LINK_STATUS_CODES:
+                                        refresh_href(used_href)
+                                        raise requests.exceptions.RequestException("Ссылка для скачивания истекла")
+                                    r.raise_for_status()
+                                    if r.status_code != 206:
+                                        raise requests.exceptions.RequestException("Сервер проигнорировал Range")
+                                    f.seek(pos)
+                                    while pos <= end:
+                                        n = r.raw.readinto(buffer[:min(DOWNLOAD_BUFFER_SIZE, end - pos + 1)])
+                                        if not n:
+                                            raise requests.exceptions.ChunkedEncodingError(
+                                                f"Соединение прервано на позиции {pos}")
+                                        write_started = time.perf_counter()
+                                        f.write(buffer[:n])
+                                        write_seconds += time.perf_counter() - write_started
+                                        pos += n
+                                        segment[0] = pos
+                                        if pos - saved >= SEGMENTS_STATE_INTERVAL:
+                                            saved = pos
+                                            save_state()
+                                        self.account_transfer(n)
+                                        progress(n)
+                                        if control is not None:
+                                            control.checkpoint()
+                            except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError):
+                                attempt += 1
+                                if attempt > resume_attempts:
+                                    raise
+                                self.metrics.record_retry("segment")
+                                time.sleep(min(self.backoff_factor * (2 ** attempt), 30))
+                    finally:
+                        # Позиция сохраняется и при отмене или ошибке, чтобы продолжить с нее
+                        save_state()
+                        written = pos - begin
+                        self.metrics.record_disk_write(written, write_seconds)
+                        self.metrics.record_transfer("segment", local_path, written,
+                                                     time.perf_counter() - started)
+            
+            def run_segment(segment: List[int]):
+                with self.scheduler.priority(priority):
+                    fetch_range(segment)
+            
+            pending = [segment for segment in ranges if segment[0] <= segment[1]]
+            if pending:
+                with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                    futures = [executor.submit(run_segment, segment) for segment in pending]
+                    for future in futures:
+                        future.result()
+            # Все диапазоны записаны - файл становится полным .part
+            os.replace(segments_path, part_path)
+            os.remove(state_path)
             return True
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
             print(f"Ошибка при скачивании файла {remote_path}: {e}")
-            return False 
\ No newline at end of file
+            return False
+        except OSError as e:
+            print(f"Ошибка записи файла {local_path}: {e}")
+            return False
+
+
+class _UploadStream:
+    """Файл для тела PUT-запроса: читается блоками с учетом ограничения скорости"""
+
+    def __init__(self, file, size: int, on_chunk: Callable[[int], None],
+                 progress_callback: Optional[Callable[[int], None]] = None,
+                 control: Optional[TransferControl] = None):
+        self._file = file
+        self._size = size
+        self._on_chunk = on_chunk
+        self._progress_callback = progress_callback
+        self._control = control
+
+    def __len__(self) -> int:
+        # requests берет отсюда Content-Length вместо chunked-кодирования
+        return self._size
+
+    def read(self, size: int = -1) -> bytes:
+        if self._control is not None:
+            self._control.checkpoint()
+        chunk = self._file.read(size)
+        if chunk:
+            self._on_chunk(len(chunk))
+            if self._progress_callback:
+                self._progress_callback(len(chunk))
+        return chunk
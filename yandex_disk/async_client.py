@@ -0,0 +1,612 @@
+"""
+Асинхронный клиент API Яндекс.Диска и адаптер для вызова из блокирующего кода
+"""
+
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, List, Callable, AsyncIterator, Awaitable, TypeVar
+
+import aiohttp
+
+from yandex_disk.api_client import (
+    RETRY_STATUS_CODES, THROTTLE_STATUS_CODES, EXPIRED_LINK_STATUS_CODES, PART_SUFFIX, CORRUPT_SUFFIX,
+    VERIFY_ATTEMPTS, DOWNLOAD_BUFFER_SIZE, RESOURCE_FIELDS_PARAM, FOLDER_FIELDS_PARAM, FILES_FIELDS_PARAM
+)
+from yandex_disk.folder_download import RemoteTree
+from yandex_disk.hashing import StreamHasher
+from yandex_disk.metrics import Metrics
+from yandex_disk.progress import PartProgress
+from yandex_disk.resource import Resource
+from yandex_disk.scheduler import RequestScheduler
+
+
+T = TypeVar("T")
+
+# Верхняя граница задержки между повторами в секундах
+MAX_BACKOFF = 30
+
+
+class AsyncYandexDiskClient:
+    """
+    Асинхронный клиент API Яндекс.Диска с ограничением числа одновременных запросов
+
+    С общими scheduler и metrics запросы асинхронного и блокирующего клиентов
+    вместе учитываются в лимитах частоты и скорости и в одних метриках.
+    Приоритеты потоков планировщика к корутинам не применяются.
+    """
+
+    def __init__(self, access_token: str, max_api_requests: int = 64, max_transfers: int = 8,
+                 timeout: float = 60, connect_timeout: float = 10,
+                 max_retries: int = 5, backoff_factor: float = 0.5,
+                 scheduler: Optional[RequestScheduler] = None,
+                 metrics: Optional[Metrics] = None):
+        """
+        Args:
+            access_token: OAuth токен
+            max_api_requests: Максимум одновременных запросов к API
+            max_transfers: Максимум одновременных скачиваний
+            timeout: Таймаут чтения в секундах
+            connect_timeout: Таймаут соединения в секундах
+            max_retries: Максимальное количество повторов при сетевых ошибках и 429/5xx
+            backoff_factor: Базовая задержка экспоненциального backoff в секундах
+            scheduler: Планировщик лимитов, например YandexDiskClient.scheduler
+            metrics: Сборщик метрик, например YandexDiskClient.metrics
+
+        Сессия создается при первом запросе внутри работающего цикла событий.
+        """
+        self.access_token = access_token
+        self.base_url = "https://cloud-api.yandex.net/v1/disk"
+        self.headers = {
+            "Authorization": f"OAuth {access_token}",
+            "Content-Type": "application/json"
+        }
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_api_requests = max(1, max_api_requests)
+        self.max_transfers = max(1, max_transfers)
+        self.scheduler = scheduler or RequestScheduler()
+        self.metrics = metrics or Metrics()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._api_semaphore: Optional[asyncio.Semaphore] = None
+        self._transfer_semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Возвращает общую сессию, создавая ее в текущем цикле событий"""
+        if self._session is None or self._session.closed:
+            # Соединений столько, сколько может понадобиться одновременно
+            connector = aiohttp.TCPConnector(limit=self.max_api_requests + self.max_transfers,
+                                             ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._api_semaphore = asyncio.Semaphore(self.max_api_requests)
+            self._transfer_semaphore = asyncio.Semaphore(self.max_transfers)
+        return self._session
+
+    async def close(self):
+        """Закрывает пул соединений"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Задержка перед повтором с учетом заголовка Retry-After"""
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), MAX_BACKOFF)
+        return min(self.backoff_factor * (2 ** attempt), MAX_BACKOFF)
+
+    async def _api_request(self, method: str, endpoint: str, **kwargs) -> Any:
+        """
+        Выполняет запрос к API с повторами при 429/5xx и сетевых ошибках
+
+        Args:
+            method: HTTP метод
+            endpoint: Путь относительно base_url (например, "/resources")
+            **kwargs: Дополнительные аргументы для aiohttp
+
+        Returns:
+            Any: Разобранный JSON ответа (None для пустого ответа)
+
+        Raises:
+            aiohttp.ClientError: Если запрос не удался после всех повторов
+        """
+        session = self._get_session()
+        kwargs.setdefault("headers", self.headers)
+        if "params" in kwargs:
+            # aiohttp принимает в параметрах только строки и числа
+            kwargs["params"] = {key: str(value).lower() if isinstance(value, bool) else value
+                                for key, value in kwargs["params"].items()}
+        url = f"{self.base_url}{endpoint}"
+        endpoint_class = self.scheduler.classify(method, endpoint)
+        attempt = 0
+        status = 0
+        started = time.perf_counter()
+        try:
+            while True:
+                retry_after = None
+                delay = self.scheduler.reserve_request(endpoint_class)
+                if delay:
+                    await asyncio.sleep(delay)
+                try:
+                    async with self._api_semaphore:
+                        async with session.request(method, url, **kwargs) as response:
+                            status = response.status
+                            if status in THROTTLE_STATUS_CODES:
+                                self.scheduler.report_throttled(endpoint_class)
+                            if status in RETRY_STATUS_CODES and attempt < self.max_retries:
+                                retry_after = response.headers.get("Retry-After")
+                            else:
+                                response.raise_for_status()
+                                if status == 204:
+                                    return None
+                                return await response.json(content_type=None)
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                    status = 0
+                    if attempt >= self.max_retries:
+                        raise
+                await asyncio.sleep(self._retry_delay(attempt, retry_after))
+                attempt += 1
+        finally:
+            self.metrics.record_request(method, endpoint, status, time.perf_counter() - started, attempt)
+
+    async def get_user_info(self) -> Optional[Dict[str, Any]]:
+        """
+        Получает информацию о пользователе
+
+        Returns:
+            Dict[str, Any] или None: Информация о пользователе
+        """
+        try:
+            return await self._api_request("GET", "/")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Ошибка при получении информации о пользователе: {e}")
+            return None
+
+    async def list_files(self, path: str = "/", limit: int = 1000, offset: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Получает список файлов в указанной папке
+
+        Args:
+            path: Путь к папке (по умолчанию корневая папка)
+            limit: Максимальное количество файлов
+            offset: Смещение для пагинации
+
+        Returns:
+            Dict[str, Any] или None: Ответ API, в котором _embedded.items - записи Resource
+        """
+        try:
+            data = await self._api_request("GET", "/resources",
+                                           params={"path": path, "limit": limit, "offset": offset,
+                                                   "fields": FOLDER_FIELDS_PARAM})
+            embedded = (data or {}).get("_embedded")
+            if embedded:
+                embedded["items"] = [Resource.from_api(item) for item in embedded.get("items", [])]
+            return data
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Ошибка при получении списка файлов: {e}")
+            return None
+
+    async def iter_file_pages(self, path: str = "/", page_size: int = 1000) -> AsyncIterator[List[Resource]]:
+        """
+        Постранично обходит содержимое папки, пока не получены все _embedded.total элементов
+
+        Args:
+            path: Путь к папке
+            page_size: Количество элементов в одном запросе
+
+        Yields:
+            List[Resource]: Элементы очередной страницы
+
+        Raises:
+            aiohttp.ClientError: При ошибке запроса
+        """
+        offset = 0
+        while True:
+            data = await self._api_request("GET", "/resources",
+                                           params={"path": path, "limit": page_size, "offset": offset,
+                                                   "fields": FOLDER_FIELDS_PARAM})
+            embedded = (data or {}).get("_embedded") or {}
+            items = [Resource.from_api(item) for item in embedded.get("items", [])]
+            if items:
+                yield items
+            offset += len(items)
+            total = embedded.get("total")
+            if not items or (total is not None and offset >= total) or (total is None and len(items) < page_size):
+                return
+
+    async def iter_files(self, path: str = "/", page_size: int = 1000) -> AsyncIterator[Resource]:
+        """
+        Обходит все элементы папки с автоматической пагинацией
+
+        Args:
+            path: Путь к папке
+            page_size: Количество элементов в одном запросе
+
+        Yields:
+            Resource: Файл или папка
+        """
+        async for page in self.iter_file_pages(path, page_size):
+            for item in page:
+                yield item
+
+    async def iter_all_files(self, page_size: int = 1000,
+                             media_type: Optional[str] = None) -> AsyncIterator[List[Resource]]:
+        """
+        Постранично обходит плоский список всех файлов диска (/resources/files)
+
+        Args:
+            page_size: Количество элементов в одном запросе
+            media_type: Фильтр по типу файлов (например, "compressed")
+
+        Yields:
+            List[Resource]: Файлы очередной страницы
+
+        Raises:
+            aiohttp.ClientError: При ошибке запроса
+        """
+        offset = 0
+        while True:
+            params = {"limit": page_size, "offset": offset, "fields": FILES_FIELDS_PARAM}
+            if media_type:
+                params["media_type"] = media_type
+            data = await self._api_request("GET", "/resources/files", params=params) or {}
+            items = [Resource.from_api(item) for item in data.get("items", [])]
+            if items:
+                yield items
+            # Сервер может уменьшить limit, поэтому конец списка - по limit из ответа
+            if not items or len(items) < min(data.get("limit") or page_size, page_size):
+                return
+            offset += len(items)
+
+    async def walk_tree(self, root_path: str, page_size: int = 1000) -> RemoteTree:
+        """
+        Обходит дерево папок, запрашивая содержимое всех найденных папок одновременно
+
+        Число одновременных запросов ограничено max_api_requests, а не числом
+        потоков, как у folder_download.walk_tree.
+
+        Args:
+            root_path: Путь к корневой папке
+            page_size: Размер страницы при пагинации
+
+        Returns:
+            RemoteTree: Все файлы и папки дерева
+
+        Raises:
+            aiohttp.ClientError: При ошибке запроса списка
+        """
+        tree = RemoteTree(root_path)
+
+        async def visit(remote_dir: str, rel_dir: str, depth: int):
+            tree.max_depth = max(tree.max_depth, depth)
+            children = []
+            async for page in self.iter_file_pages(remote_dir, page_size):
+                for item in page:
+                    rel_path = f"{rel_dir}/{item.name}" if rel_dir else item.name
+                    if item.is_dir:
+                        tree.dirs.append(rel_path)
+                        # Вложенные папки запрашиваются, не дожидаясь остальных страниц
+                        children.append(asyncio.ensure_future(visit(item.path, rel_path, depth + 1)))
+                    else:
+                        tree.files.append((item.path, rel_path, item))
+            try:
+                await asyncio.gather(*children)
+            except BaseException:
+                for child in children:
+                    child.cancel()
+                raise
+
+        await visit(root_path, "", 0)
+        return tree
+
+    async def get_file_info(self, path: str) -> Optional[Resource]:
+        """
+        Получает информацию о файле
+
+        Args:
+            path: Путь к файлу
+
+        Returns:
+            Resource или None: Информация о файле
+        """
+        try:
+            data = await self._api_request("GET", "/resources",
+                                           params={"path": path, "fields": RESOURCE_FIELDS_PARAM})
+            return Resource.from_api(data or {})
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Ошибка при получении информации о файле: {e}")
+            return None
+
+    async def create_folder(self, path: str) -> bool:
+        """
+        Создает папку
+
+        Args:
+            path: Путь к создаваемой папке
+
+        Returns:
+            bool: True если папка создана успешно
+        """
+        try:
+            await self._api_request("PUT", "/resources", params={"path": path})
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Ошибка при создании папки: {e}")
+            return False
+
+    async def delete_file(self, path: str, permanently: bool = False) -> bool:
+        """
+        Удаляет файл или папку
+
+        Args:
+            path: Путь к файлу/папке
+            permanently: Удалить навсегда (True) или в корзину (False)
+
+        Returns:
+            bool: True если удаление прошло успешно
+        """
+        try:
+            await self._api_request("DELETE", "/resources",
+                                    params={"path": path, "permanently": permanently})
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Ошибка при удалении файла: {e}")
+            return False
+
+    async def get_download_link(self, path: str) -> Optional[str]:
+        """
+        Получает ссылку для скачивания файла
+
+        Args:
+            path: Путь к файлу
+
+        Returns:
+            str или None: Ссылка для скачивания
+        """
+        try:
+            data = await self._api_request("GET", "/resources/download", params={"path": path})
+            return (data or {}).get("href")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Ошибка при получении ссылки для скачивания: {e}")
+            return None
+
+    async def download_file(self, remote_path: str, local_path: str,
+                            progress_callback: Optional[Callable[[int], None]] = None,
+                            resume_attempts: int = 5,
+                            expected_hashes: Optional[Dict[str, Any]] = None, verify: bool = True) -> bool:
+        """
+        Потоково скачивает файл с Яндекс.Диска в указанный локальный путь.
+
+        Работает так же, как YandexDiskClient.download_file: данные пишутся в
+        ``local_path + ".part"`` с докачкой через Range, суммы md5/sha256
+        считаются по мере записи, файл с несовпавшей суммой сохраняется как
+        ``local_path + ".corrupt"``. Число одновременных скачиваний ограничено
+        max_transfers.
+
+        Args:
+            remote_path: Путь к файлу на Яндекс.Диске
+            local_path: Локальный путь для сохранения
+            progress_callback: Вызывается в цикле событий с количеством байт после записи каждого блока;
+                сумма вызовов равна размеру .part, как в YandexDiskClient.download_file
+            resume_attempts: Количество попыток докачки после ошибок
+            expected_hashes: Ожидаемые "md5"/"sha256" (если не заданы, запрашиваются у API)
+            verify: Проверять контрольные суммы
+
+        Returns:
+            bool: True если файл скачан (и проверен) успешно
+        """
+        part_path = local_path + PART_SUFFIX
+        progress = PartProgress(progress_callback)
+        hasher = None
+        if verify:
+            if expected_hashes is None:
+                info = await self.get_file_info(remote_path)
+                expected_hashes = info.hashes if info is not None else {}
+            if expected_hashes.get("md5") or expected_hashes.get("sha256"):
+                hasher = StreamHasher()
+
+        self._get_session()
+        async with self._transfer_semaphore:
+            for verify_attempt in range(VERIFY_ATTEMPTS):
+                if not await self._fetch_to_part(remote_path, local_path, progress,
+                                                 resume_attempts, hasher):
+                    return False
+                try:
+                    if hasher is None or hasher.matches(expected_hashes):
+                        os.replace(part_path, local_path)
+                        return True
+                    print(f"Контрольная сумма файла {remote_path} не совпала "
+                          f"(попытка {verify_attempt + 1} из {VERIFY_ATTEMPTS})")
+                    if verify_attempt + 1 < VERIFY_ATTEMPTS:
+                        os.remove(part_path)
+                        progress.set_size(0)
+                except OSError as e:
+                    print(f"Ошибка записи файла {local_path}: {e}")
+                    return False
+        try:
+            os.replace(part_path, local_path + CORRUPT_SUFFIX)
+        except OSError as e:
+            print(f"Ошибка записи файла {local_path}: {e}")
+        return False
+
+    async def _fetch_to_part(self, remote_path: str, local_path: str, progress: PartProgress,
+                             resume_attempts: int, hasher: Optional[StreamHasher] = None) -> bool:
+        """
+        Скачивает файл во временный .part файл с докачкой после ошибок
+
+        Returns:
+            bool: True если .part файл скачан полностью
+        """
+        part_path = local_path + PART_SUFFIX
+        href = None
+        last_error = None
+        for attempt in range(resume_attempts + 1):
+            if attempt:
+                await asyncio.sleep(self._retry_delay(attempt))
+            try:
+                if href is None:
+                    href = await self.get_download_link(remote_path)
+                    if not href:
+                        return False
+                if await self._download_to_part(href, part_path, progress, hasher):
+                    return True
+                # Подписанная ссылка истекла - запрашиваем новую
+                href = None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
+            except OSError as e:
+                print(f"Ошибка записи файла {local_path}: {e}")
+                return False
+        print(f"Ошибка при скачивании файла {remote_path}: {last_error or 'ссылка для скачивания недействительна'}")
+        return False
+
+    async def _download_to_part(self, href: str, part_path: str, progress: PartProgress,
+                                hasher: Optional[StreamHasher] = None) -> bool:
+        """
+        Докачивает файл по ссылке во временный .part файл
+
+        Args:
+            href: Ссылка для скачивания
+            part_path: Путь к временному файлу
+            progress: Прогресс файла; сначала ему сообщается уже имеющееся начало .part
+            hasher: Считает контрольные суммы всего файла, включая уже скачанную часть
+
+        Returns:
+            bool: True если файл скачан полностью, False если ссылка истекла
+        """
+        session = self._get_session()
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        async with session.get(href, headers=headers) as r:
+            if r.status in EXPIRED_LINK_STATUS_CODES:
+                return False
+            if r.status == 416:
+                # Сервер не может отдать диапазон: файл уже скачан целиком или .part поврежден
+                total = r.headers.get("Content-Range", "").rpartition("/")[2]
+                if total.isdigit() and int(total) == offset:
+                    if hasher is not None:
+                        hasher.reset()
+                        await asyncio.get_running_loop().run_in_executor(None, hasher.update_from_file, part_path)
+                    progress.set_size(offset)
+                    return True
+                os.remove(part_path)
+                progress.set_size(0)
+                raise aiohttp.ClientPayloadError(f"Неверный диапазон для {part_path}, начинаем заново")
+            r.raise_for_status()
+            if r.status != 206:
+                # Range не поддерживается - скачиваем с начала
+                offset = 0
+            progress.set_size(offset)
+            expected = r.headers.get("Content-Length")
+            written = 0
+            write_seconds = 0.0
+            # Хэширование и запись (несколько мс на 1 МБ) выполняются в пуле потоков,
+            # чтобы не останавливать цикл событий с остальными запросами
+            loop = asyncio.get_running_loop()
+            if hasher is not None:
+                hasher.reset()
+                if offset:
+                    await loop.run_in_executor(None, hasher.update_from_file, part_path, offset)
+            started = time.perf_counter()
+            f = await loop.run_in_executor(None, open, part_path, 'ab' if offset else 'wb')
+            try:
+                async for chunk in r.content.iter_chunked(DOWNLOAD_BUFFER_SIZE):
+                    write_seconds += await loop.run_in_executor(None, _write_chunk, f, chunk, hasher)
+                    written += len(chunk)
+                    self.metrics.add_transfer_bytes(len(chunk))
+                    progress(len(chunk))
+                    delay = self.scheduler.reserve_bytes(len(chunk))
+                    if delay:
+                        await asyncio.sleep(delay)
+            finally:
+                await loop.run_in_executor(None, f.close)
+                self.metrics.record_disk_write(written, write_seconds)
+                self.metrics.record_transfer("download", part_path[:-len(PART_SUFFIX)], written,
+                                             time.perf_counter() - started)
+            if expected is not None and written < int(expected):
+                raise aiohttp.ClientPayloadError(
+                    f"Соединение прервано: получено {written} из {expected} байт")
+        return True
+
+
+def _write_chunk(f, chunk: bytes, hasher: Optional[StreamHasher]) -> float:
+    """
+    Записывает блок и добавляет его в контрольные суммы (выполняется в пуле потоков)
+
+    Returns:
+        float: Время записи на диск в секундах
+    """
+    started = time.perf_counter()
+    f.write(chunk)
+    write_seconds = time.perf_counter() - started
+    if hasher is not None:
+        hasher.update(chunk)
+    return write_seconds
+
+
+class AsyncClientRunner:
+    """
+    Выполняет корутины AsyncYandexDiskClient в одном фоновом потоке с циклом событий
+
+    Позволяет GUI и скриптам вызывать асинхронный клиент без отдельного потока
+    на каждый запрос: submit возвращает concurrent.futures.Future, run блокирует
+    до результата.
+    """
+
+    def __init__(self, client: AsyncYandexDiskClient):
+        """
+        Args:
+            client: Асинхронный клиент, все его корутины выполняются в цикле этого объекта
+        """
+        self.client = client
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="yandex-disk-async", daemon=True)
+        self._thread.start()
+
+    def submit(self, coro: Awaitable[T],
+               callback: Optional[Callable[[Future], None]] = None) -> "Future[T]":
+        """
+        Планирует корутину в фоновом цикле событий
+
+        Args:
+            coro: Корутина, например client.get_user_info()
+            callback: Вызывается в фоновом потоке с завершенным Future
+                (из Tk результат передается в главный поток через root.after)
+
+        Returns:
+            Future: Результат корутины
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        if callback:
+            future.add_done_callback(callback)
+        return future
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Выполняет корутину и блокирует до ее завершения"""
+        return self.submit(coro).result(timeout)
+
+    def close(self):
+        """Закрывает сессию клиента и останавливает цикл событий"""
+        if not self._loop.is_running():
+            return
+        try:
+            self.run(self.client.close(), timeout=10)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=10)
+            self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
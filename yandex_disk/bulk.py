@@ -0,0 +1,258 @@
+"""
+Пакетные операции над ресурсами Яндекс.Диска с ожиданием асинхронных операций
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Iterable
+
+import requests
+
+from yandex_disk.api_client import YandexDiskClient
+
+
+# Итоговые статусы элемента пакета
+OP_SUCCESS = "success"
+OP_FAILED = "failed"
+OP_TIMEOUT = "timeout"
+
+# Интервал опроса операций: начальный, множитель и максимальный (в секундах)
+POLL_INITIAL_DELAY = 0.5
+POLL_BACKOFF = 1.5
+POLL_MAX_DELAY = 10.0
+
+
+class BulkItemResult:
+    """Результат операции над одним ресурсом"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.status = OP_SUCCESS
+        self.error: Optional[str] = None
+        # Ссылка на асинхронную операцию, если API ответил 202
+        self.operation_href: Optional[str] = None
+
+
+class BulkResult:
+    """Итог пакетной операции"""
+
+    def __init__(self, items: List[BulkItemResult]):
+        self.items = items
+
+    @property
+    def succeeded(self) -> List[str]:
+        return [item.path for item in self.items if item.status == OP_SUCCESS]
+
+    @property
+    def failed(self) -> List[BulkItemResult]:
+        """Элементы с ошибкой или не дождавшиеся завершения"""
+        return [item for item in self.items if item.status != OP_SUCCESS]
+
+    def __str__(self):
+        return f"успешно {len(self.succeeded)}, ошибок {len(self.failed)}"
+
+
+class OperationPoller:
+    """
+    Общий опрос асинхронных операций с увеличивающимся интервалом
+
+    Все незавершенные операции опрашиваются одним раундом параллельных
+    запросов; после раунда без изменений интервал увеличивается.
+    """
+
+    def __init__(self, client: YandexDiskClient, executor: ThreadPoolExecutor, timeout: float = 600.0):
+        """
+        Args:
+            client: Клиент Яндекс.Диска
+            executor: Пул потоков для параллельных запросов статуса
+            timeout: Максимальное время ожидания всех операций в секундах
+        """
+        self.client = client
+        self.executor = executor
+        self.timeout = timeout
+
+    def _poll_one(self, item: BulkItemResult) -> Tuple[BulkItemResult, Optional[str]]:
+        try:
+            return item, self.client.get_operation_status(item.operation_href)
+        except requests.exceptions.RequestException as e:
+            # Сетевая ошибка не означает провал операции - спросим в следующем раунде
+            print(f"Ошибка при получении статуса операции {item.path}: {e}")
+            return item, None
+
+    def wait(self, items: Iterable[BulkItemResult]):
+        """
+        Ждет завершения операций и записывает итоговые статусы в элементы
+
+        Args:
+            items: Элементы с заполненным operation_href
+        """
+        pending = list(items)
+        deadline = time.monotonic() + self.timeout
+        delay = POLL_INITIAL_DELAY
+        while pending:
+            if time.monotonic() >= deadline:
+                for item in pending:
+                    item.status = OP_TIMEOUT
+                    item.error = "операция не завершилась за отведенное время"
+                return
+            time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            still_pending = []
+            for item, status in self.executor.map(self._poll_one, pending):
+                if status == "success":
+                    item.status = OP_SUCCESS
+                elif status == "failed":
+                    item.status = OP_FAILED
+                    item.error = "операция завершилась ошибкой"
+                else:
+                    still_pending.append(item)
+            delay = POLL_INITIAL_DELAY if len(still_pending) < len(pending) else min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
+            pending = still_pending
+
+
+def _run_bulk(client: YandexDiskClient, requests_: List[Tuple[str, str, str, Dict[str, Any]]],
+              max_workers: int, timeout: float) -> List[BulkItemResult]:
+    """
+    Отправляет запросы параллельно и дожидается возвращенных операций
+
+    Args:
+        client: Клиент Яндекс.Диска
+        requests_: Четверки (путь для отчета, метод, endpoint, параметры)
+        max_workers: Количество одновременных запросов
+        timeout: Максимальное время ожидания асинхронных операций
+
+    Returns:
+        List[BulkItemResult]: Результаты в порядке запросов
+    """
+    def submit(request: Tuple[str, str, str, Dict[str, Any]]) -> BulkItemResult:
+        path, method, endpoint, params = request
+        item = BulkItemResult(path)
+        try:
+            item.operation_href = client.start_operation(method, endpoint, params)
+        except requests.exceptions.RequestException as e:
+            item.status = OP_FAILED
+            item.error = str(e)
+        return item
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        items = list(executor.map(submit, requests_))
+        OperationPoller(client, executor, timeout).wait(item for item in items if item.operation_href)
+    return items
+
+
+def bulk_delete(client: YandexDiskClient, paths: Iterable[str], permanently: bool = False,
+                max_workers: int = 8, timeout: float = 600.0) -> BulkResult:
+    """
+    Удаляет файлы и папки
+
+    Args:
+        client: Клиент Яндекс.Диска
+        paths: Пути к ресурсам
+        permanently: Удалить навсегда (True) или в корзину (False)
+        max_workers: Количество одновременных запросов
+        timeout: Максимальное время ожидания асинхронных операций
+
+    Returns:
+        BulkResult: Результат по каждому пути
+    """
+    return BulkResult(_run_bulk(
+        client,
+        [(path, "DELETE", "/resources", {"path": path, "permanently": str(permanently).lower()})
+         for path in paths],
+        max_workers, timeout))
+
+
+def _parent_chain(path: str) -> List[str]:
+    """Возвращает путь и все его родительские папки, начиная с верхней"""
+    prefix, sep, rest = path.partition(":/")
+    root = f"{prefix}:/" if sep else "/"
+    parts = [part for part in (rest if sep else path).split("/") if part]
+    return [root + "/".join(parts[:depth]) for depth in range(1, len(parts) + 1)]
+
+
+def bulk_create_folders(client: YandexDiskClient, paths: Iterable[str], max_workers: int = 8) -> BulkResult:
+    """
+    Создает папки, включая недостающие родительские
+
+    Папки одного уровня вложенности создаются параллельно, уровни - по очереди.
+    Уже существующие папки считаются созданными.
+
+    Args:
+        client: Клиент Яндекс.Диска
+        paths: Пути к папкам
+        max_workers: Количество одновременных запросов
+
+    Returns:
+        BulkResult: Результат по каждому запрошенному пути
+    """
+    requested = [chain[-1] for chain in map(_parent_chain, paths) if chain]
+    all_paths = set()
+    for path in requested:
+        all_paths.update(_parent_chain(path))
+    levels: Dict[int, List[str]] = {}
+    for path in all_paths:
+        levels.setdefault(path.count("/"), []).append(path)
+
+    results: Dict[str, BulkItemResult] = {}
+    failed_parents: List[str] = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        def create(path: str) -> BulkItemResult:
+            item = BulkItemResult(path)
+            if any(path.startswith(parent + "/") for parent in failed_parents):
+                item.status = OP_FAILED
+                item.error = "не удалось создать родительскую папку"
+            elif not client.create_folder(path, exist_ok=True):
+                item.status = OP_FAILED
+                item.error = "не удалось создать папку"
+            return item
+
+        for depth in sorted(levels):
+            for item in executor.map(create, sorted(levels[depth])):
+                results[item.path] = item
+                if item.status != OP_SUCCESS:
+                    failed_parents.append(item.path)
+    return BulkResult([results[path] for path in requested])
+
+
+def _bulk_transfer(client: YandexDiskClient, endpoint: str, pairs: Iterable[Tuple[str, str]],
+                   overwrite: bool, max_workers: int, timeout: float) -> BulkResult:
+    return BulkResult(_run_bulk(
+        client,
+        [(source, "POST", endpoint, {"from": source, "path": target, "overwrite": str(overwrite).lower()})
+         for source, target in pairs],
+        max_workers, timeout))
+
+
+def bulk_move(client: YandexDiskClient, pairs: Iterable[Tuple[str, str]], overwrite: bool = False,
+              max_workers: int = 8, timeout: float = 600.0) -> BulkResult:
+    """
+    Перемещает ресурсы
+
+    Args:
+        client: Клиент Яндекс.Диска
+        pairs: Пары (исходный путь, новый путь)
+        overwrite: Перезаписывать существующие ресурсы
+        max_workers: Количество одновременных запросов
+        timeout: Максимальное время ожидания асинхронных операций
+
+    Returns:
+        BulkResult: Результат по каждому исходному пути
+    """
+    return _bulk_transfer(client, "/resources/move", pairs, overwrite, max_workers, timeout)
+
+
+def bulk_copy(client: YandexDiskClient, pairs: Iterable[Tuple[str, str]], overwrite: bool = False,
+              max_workers: int = 8, timeout: float = 600.0) -> BulkResult:
+    """
+    Копирует ресурсы
+
+    Args:
+        client: Клиент Яндекс.Диска
+        pairs: Пары (исходный путь, путь копии)
+        overwrite: Перезаписывать существующие ресурсы
+        max_workers: Количество одновременных запросов
+        timeout: Максимальное время ожидания асинхронных операций
+
+    Returns:
+        BulkResult: Результат по каждому исходному пути
+    """
+    return _bulk_transfer(client, "/resources/copy", pairs, overwrite, max_workers, timeout)
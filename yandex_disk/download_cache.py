@@ -0,0 +1,366 @@
+"""
+Локальный кэш скачанных файлов, адресуемый по sha256 содержимого
+
+Файл, который уже скачивался (в любую папку и любым пользователем общего
+кэша), не скачивается повторно: в папку назначения создается reflink-копия
+объекта кэша, а если она невозможна - обычная копия. Жесткие ссылки, которые
+делят с объектом один inode, включаются явно.
+
+На файловых системах без reflink (ext4, NTFS) без жестких ссылок каждый файл
+кэша - полная копия: кэш занимает столько же места, сколько скачанные файлы,
+а добавление в него - еще одна запись файла на диск (в фоновом потоке).
+"""
+
+import os
+import shutil
+import sqlite3
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict, Any
+
+from yandex_disk.hashing import hash_file
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: reflink недоступен, используются жесткие ссылки и копирование
+    fcntl = None
+
+
+# Переменные окружения, включающие кэш для GUI и командной строки
+CACHE_DIR_ENV = "MRI_PIPELINE_CACHE"
+CACHE_SIZE_ENV = "MRI_PIPELINE_CACHE_GB"
+CACHE_HARDLINKS_ENV = "MRI_PIPELINE_CACHE_HARDLINKS"
+
+# Биты записи, снимаемые с объектов кэша
+WRITE_BITS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+# Размер кэша по умолчанию
+DEFAULT_CACHE_SIZE = 50 * 1024 ** 3
+
+# ioctl клонирования файла (Linux: btrfs, xfs)
+FICLONE = 0x40049409
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    ctime_ns INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS objects_last_used ON objects(last_used);
+"""
+
+
+def _reflink(src: str, dst: str):
+    """Создает копию, разделяющую блоки с исходным файлом (copy-on-write)"""
+    if fcntl is None:
+        raise OSError("reflink не поддерживается")
+    with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        except OSError:
+            dst_file.close()
+            os.remove(dst)
+            raise
+
+
+def materialize(src: str, dst: str, hardlink: bool = False) -> str:
+    """
+    Создает dst с содержимым src без передачи данных, если это возможно
+
+    reflink-копия и обычная копия независимы от src. Жесткая ссылка (только при
+    hardlink и без поддержки reflink) - тот же inode: изменение dst на месте
+    меняет и src.
+
+    Args:
+        src: Существующий файл
+        dst: Новый путь (не должен существовать)
+        hardlink: Разрешить жесткую ссылку
+
+    Returns:
+        str: Способ: "reflink", "link" или "copy"
+    """
+    try:
+        _reflink(src, dst)
+        return "reflink"
+    except OSError:
+        pass
+    if hardlink:
+        try:
+            os.link(src, dst)
+            return "link"
+        except OSError:
+            # Другая файловая система или запрет ссылок на чужие файлы (protected_hardlinks)
+            pass
+    shutil.copyfile(src, dst)
+    return "copy"
+
+
+def _make_read_only(path: str):
+    os.chmod(path, stat.S_IMODE(os.stat(path).st_mode) & ~WRITE_BITS)
+
+
+class DownloadCache:
+    """
+    Хранилище объектов ``objects/<2 символа>/<sha256>`` с индексом в SQLite
+
+    Объем ограничен суммарным размером объектов, при превышении удаляются
+    давно не использованные (LRU).
+
+    Объекты хранятся только для чтения. Если stat объекта (размер, время
+    изменения, ctime) отличается от сохраненного при записи, перед выдачей
+    заново считается sha256: измененный объект удаляется из кэша.
+
+    При hardlinks файлы в папках назначения - жесткие ссылки на объект (там,
+    где нет reflink). Они экономят место, но тоже доступны только для чтения,
+    а место освобождается только после удаления всех ссылок. Без reflink и
+    hardlinks каждый объект - полная копия файла.
+
+    store_async() копирует скачанные файлы в кэш в одном фоновом потоке, чтобы
+    потоки скачивания не ждали второй записи файла; close() дожидается копий.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_SIZE, hardlinks: bool = False):
+        """
+        Args:
+            cache_dir: Папка кэша (может быть общей для нескольких пользователей)
+            max_bytes: Максимальный суммарный размер объектов
+            hardlinks: Выдавать файлы жесткими ссылками на объекты кэша
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hardlinks = hardlinks
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "index.db"), timeout=30,
+                                     check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(objects)")}
+        if "ctime_ns" not in columns:
+            # Индекс прежней версии: объекты будут один раз проверены по sha256
+            self._conn.execute("ALTER TABLE objects ADD COLUMN ctime_ns INTEGER NOT NULL DEFAULT 0")
+        self._lock = threading.Lock()
+        self._store_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-store")
+        self.hits = 0
+        self.misses = 0
+        self.bytes_reused = 0
+
+    def close(self):
+        """Дожидается фоновых копий и закрывает индекс"""
+        self._store_pool.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def _discard(self, sha256: str):
+        """Удаляет объект и его запись"""
+        path = self._object_path(sha256)
+        try:
+            # Windows не удаляет файлы только для чтения
+            os.chmod(path, stat.S_IWUSR | stat.S_IRUSR)
+            os.remove(path)
+        except OSError:
+            pass
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM objects WHERE sha256 = ?", (sha256,))
+
+    def _record_stat(self, sha256: str, st: os.stat_result):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE objects SET size = ?, mtime_ns = ?, ctime_ns = ? WHERE sha256 = ?",
+                               (st.st_size, st.st_mtime_ns, st.st_ctime_ns, sha256))
+
+    def _valid_object(self, sha256: str) -> Optional[os.stat_result]:
+        """
+        Stat объекта, если он есть в индексе и его содержимое не изменилось
+
+        Если stat отличается от сохраненного, содержимое проверяется по sha256.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime_ns, ctime_ns FROM objects WHERE sha256 = ?",
+                                     (sha256,)).fetchone()
+        if row is None:
+            return None
+        path = self._object_path(sha256)
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is not None and (st.st_size, st.st_mtime_ns, st.st_ctime_ns) == \
+                (row["size"], row["mtime_ns"], row["ctime_ns"]):
+            return st
+        try:
+            # ctime меняется и от chmod или новой ссылки, поэтому решает содержимое
+            if st is not None and st.st_size == row["size"] and hash_file(path).sha256 == sha256:
+                st = os.stat(path)
+                self._record_stat(sha256, st)
+                return st
+        except OSError:
+            pass
+        print(f"Объект кэша {sha256} отсутствует или изменен, удаляется")
+        self._discard(sha256)
+        return None
+
+    def _touch(self, sha256: str):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE objects SET last_used = ? WHERE sha256 = ?", (time.time(), sha256))
+
+    def fetch(self, sha256: str, dest_path: str) -> bool:
+        """
+        Создает dest_path из кэша, если объект с такой суммой есть
+
+        Существующий dest_path атомарно заменяется.
+
+        Args:
+            sha256: Контрольная сумма содержимого из метаданных ресурса
+            dest_path: Локальный путь назначения
+
+        Returns:
+            bool: True если файл получен из кэша
+        """
+        sha256 = sha256.lower()
+        st = self._valid_object(sha256)
+        if st is None:
+            with self._lock:
+                self.misses += 1
+            return False
+        tmp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.cache"
+        object_path = self._object_path(sha256)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+            if materialize(object_path, tmp_path, self.hardlinks) == "link":
+                # Новая ссылка меняет ctime объекта
+                self._record_stat(sha256, os.stat(object_path))
+            os.replace(tmp_path, dest_path)
+        except OSError as e:
+            print(f"Ошибка получения {dest_path} из кэша: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            with self._lock:
+                self.misses += 1
+            return False
+        self._touch(sha256)
+        with self._lock:
+            self.hits += 1
+            self.bytes_reused += st.st_size
+        return True
+
+    def store(self, sha256: str, path: str) -> bool:
+        """
+        Добавляет проверенный скачанный файл в кэш
+
+        Объект становится доступен только для чтения; при hardlinks это может быть
+        тот же inode, что и path. Если path изменился или удален во время
+        копирования, объект не сохраняется.
+
+        Args:
+            sha256: Контрольная сумма содержимого файла
+            path: Путь к файлу
+
+        Returns:
+            bool: True если объект сохранен или уже был в кэше
+        """
+        sha256 = sha256.lower()
+        if self._valid_object(sha256) is not None:
+            self._touch(sha256)
+            return True
+        try:
+            size = os.path.getsize(path)
+            if size > self.max_bytes:
+                return False
+            object_path = self._object_path(sha256)
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp_path = f"{object_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            before = os.stat(path)
+            materialize(path, tmp_path, self.hardlinks)
+            after = os.stat(path)
+            if (before.st_size, before.st_mtime_ns) != (after.st_size, after.st_mtime_ns):
+                os.remove(tmp_path)
+                print(f"{path} изменился во время добавления в кэш, пропускается")
+                return False
+            _make_read_only(tmp_path)
+            os.replace(tmp_path, object_path)
+            st = os.stat(object_path)
+        except OSError as e:
+            print(f"Не удалось добавить {path} в кэш: {e}")
+            return False
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO objects(sha256, size, mtime_ns, last_used, ctime_ns) "
+                               "VALUES (?, ?, ?, ?, ?)",
+                               (sha256, st.st_size, st.st_mtime_ns, time.time(), st.st_ctime_ns))
+        self._evict()
+        return True
+
+    def store_async(self, sha256: str, path: str) -> Future:
+        """
+        Добавляет файл в кэш в фоновом потоке (см. store)
+
+        Returns:
+            Future: Результат store
+        """
+        return self._store_pool.submit(self.store, sha256, path)
+
+    def _evict(self):
+        """Удаляет давно не использованные объекты, пока размер кэша больше max_bytes"""
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for row in self._conn.execute("SELECT sha256, size FROM objects ORDER BY last_used"):
+                if total <= self.max_bytes:
+                    break
+                victims.append(row["sha256"])
+                total -= row["size"]
+        for sha256 in victims:
+            self._discard(sha256)
+
+    @property
+    def size(self) -> int:
+        """Суммарный размер объектов в байтах"""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Попадания, промахи и объем повторно использованных данных"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "bytes_reused": self.bytes_reused}
+
+
+def cache_from_env() -> Optional[DownloadCache]:
+    """
+    Создает кэш по переменным MRI_PIPELINE_CACHE (папка), MRI_PIPELINE_CACHE_GB (размер)
+    и MRI_PIPELINE_CACHE_HARDLINKS=1 (выдавать жесткие ссылки)
+
+    Returns:
+        DownloadCache или None: None если папка кэша не задана или недоступна
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if not cache_dir:
+        return None
+    try:
+        size = float(os.environ.get(CACHE_SIZE_ENV) or 0)
+    except ValueError:
+        size = 0
+    try:
+        return DownloadCache(cache_dir, int(size * 1024 ** 3) if size > 0 else DEFAULT_CACHE_SIZE,
+                             hardlinks=os.environ.get(CACHE_HARDLINKS_ENV) == "1")
+    except (OSError, sqlite3.Error) as e:
+        print(f"Кэш скачиваний {cache_dir} недоступен: {e}")
+        return None
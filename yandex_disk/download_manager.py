@@ -0,0 +1,181 @@
+"""
+Менеджер параллельного скачивания файлов с Яндекс.Диска
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, List, Callable, Iterable, Tuple, Dict, Any
+
+from yandex_disk.api_client import YandexDiskClient, CORRUPT_SUFFIX
+from yandex_disk.progress import ProgressTracker, TransferControl, TransferCancelled
+from yandex_disk.scheduler import PRIORITY_BACKGROUND
+
+
+# Статусы задачи скачивания
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CORRUPT = "corrupt"
+STATUS_CANCELLED = "cancelled"
+
+
+class DownloadTask:
+    """Состояние скачивания одного файла"""
+
+    def __init__(self, remote_path: str, local_path: str,
+                 expected_hashes: Optional[Dict[str, Any]] = None):
+        self.remote_path = remote_path
+        self.local_path = local_path
+        self.expected_hashes = expected_hashes
+        self.status = STATUS_PENDING
+        self.bytes_done = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add_bytes(self, count: int):
+        """Учитывает очередную порцию скачанных байт"""
+        with self._lock:
+            self.bytes_done += count
+
+    @property
+    def elapsed(self) -> float:
+        """Время скачивания в секундах"""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return max(end - self.started_at, 1e-9)
+
+    @property
+    def throughput(self) -> float:
+        """Скорость скачивания файла в байтах в секунду"""
+        if self.started_at is None:
+            return 0.0
+        return self.bytes_done / self.elapsed
+
+
+class DownloadManager:
+    """Скачивает несколько файлов параллельно с настраиваемым числом потоков"""
+
+    def __init__(self, client: YandexDiskClient, max_workers: int = 4, segments: int = 1,
+                 control: Optional[TransferControl] = None, progress: Optional[ProgressTracker] = None):
+        """
+        Args:
+            client: Клиент Яндекс.Диска (сессия клиента потокобезопасна)
+            max_workers: Количество одновременных скачиваний
+            segments: Количество параллельных диапазонов для больших файлов
+            control: Пауза и отмена всех скачиваний менеджера
+            progress: Общий счетчик байт и файлов пакета
+        """
+        self.client = client
+        self.max_workers = max(1, max_workers)
+        self.segments = max(1, segments)
+        self.control = control
+        self.progress = progress
+        self.tasks: List[DownloadTask] = []
+        self._tasks_lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    def _on_bytes(self, task: DownloadTask, count: int):
+        task.add_bytes(count)
+        self.progress.add_bytes(count)
+
+    def _run_task(self, task: DownloadTask) -> DownloadTask:
+        """Скачивает один файл и обновляет статус задачи"""
+        task.status = STATUS_RUNNING
+        task.started_at = time.monotonic()
+        progress_callback = task.add_bytes
+        if self.progress is not None:
+            progress_callback = lambda count: self._on_bytes(task, count)
+        try:
+            if self.control is not None:
+                # Задачи из очереди не начинаются на паузе и после отмены
+                self.control.checkpoint()
+            with self.client.priority(PRIORITY_BACKGROUND):
+                ok = self.client.download_file(task.remote_path, task.local_path,
+                                               progress_callback=progress_callback,
+                                               segments=self.segments,
+                                               expected_hashes=task.expected_hashes,
+                                               control=self.control)
+        except TransferCancelled:
+            task.finished_at = time.monotonic()
+            task.status = STATUS_CANCELLED
+            return task
+        task.finished_at = time.monotonic()
+        if self.progress is not None:
+            self.progress.file_done()
+        if ok:
+            task.status = STATUS_DONE
+        elif os.path.exists(task.local_path + CORRUPT_SUFFIX):
+            task.status = STATUS_CORRUPT
+        else:
+            task.status = STATUS_FAILED
+        return task
+
+    def download_all(self, items: Iterable[Tuple],
+                     on_task_done: Optional[Callable[[DownloadTask], None]] = None) -> List[DownloadTask]:
+        """
+        Скачивает файлы параллельно и блокирует до завершения всех задач
+
+        Args:
+            items: Пары (путь на диске, локальный путь) или тройки с ожидаемыми суммами
+                {"md5": ..., "sha256": ...} из метаданных ресурса
+            on_task_done: Вызывается в потоке download_all после завершения каждой задачи
+
+        Returns:
+            List[DownloadTask]: Задачи с итоговыми статусами
+        """
+        self.tasks = [DownloadTask(*item) for item in items]
+        self._started_at = time.monotonic()
+        self._finished_at = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._run_task, task) for task in self.tasks]
+            for future in as_completed(futures):
+                task = future.result()
+                if on_task_done:
+                    on_task_done(task)
+        self._finished_at = time.monotonic()
+        return self.tasks
+
+    def download(self, item: Tuple) -> DownloadTask:
+        """
+        Скачивает один файл в потоке вызывающего и добавляет задачу в общий учет
+
+        Используется стадией конвейера, которая сама управляет параллельностью.
+
+        Args:
+            item: Пара (путь на диске, локальный путь) или тройка с ожидаемыми суммами
+
+        Returns:
+            DownloadTask: Задача с итоговым статусом
+        """
+        task = DownloadTask(*item)
+        with self._tasks_lock:
+            if self._started_at is None:
+                self._started_at = time.monotonic()
+            self.tasks.append(task)
+        self._run_task(task)
+        with self._tasks_lock:
+            self._finished_at = max(self._finished_at or 0.0, task.finished_at)
+        return task
+
+    @property
+    def bytes_done(self) -> int:
+        """Суммарное количество скачанных байт"""
+        return sum(task.bytes_done for task in self.tasks)
+
+    @property
+    def throughput(self) -> float:
+        """Суммарная скорость скачивания в байтах в секунду"""
+        if self._started_at is None:
+            return 0.0
+        end = self._finished_at if self._finished_at is not None else time.monotonic()
+        return self.bytes_done / max(end - self._started_at, 1e-9)
+
+    def count(self, status: str) -> int:
+        """Количество задач с указанным статусом"""
+        return sum(1 for task in self.tasks if task.status == status)
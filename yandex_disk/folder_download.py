@@ -0,0 +1,114 @@
+"""
+Рекурсивное скачивание папок с Яндекс.Диска
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Tuple, Dict, Any
+
+from yandex_disk.api_client import YandexDiskClient
+from yandex_disk.resource import Resource
+
+
+# Параметры выбора серверного zip для неглубоких папок с множеством мелких файлов
+SERVER_ZIP_MAX_DEPTH = 1
+SERVER_ZIP_MIN_FILES = 200
+SERVER_ZIP_MAX_AVG_SIZE = 256 * 1024
+
+
+class RemoteTree:
+    """Результат обхода дерева папок на Яндекс.Диске"""
+
+    def __init__(self, root_path: str):
+        self.root_path = root_path
+        # (путь на диске, относительный путь, ресурс)
+        self.files: List[Tuple[str, str, Resource]] = []
+        # Относительные пути всех вложенных папок
+        self.dirs: List[str] = []
+        self.max_depth = 0
+
+    @property
+    def total_size(self) -> int:
+        """Суммарный размер файлов в байтах"""
+        return sum(resource.size or 0 for _, _, resource in self.files)
+
+
+def walk_tree(client: YandexDiskClient, root_path: str, max_workers: int = 8,
+              page_size: int = 1000) -> RemoteTree:
+    """
+    Обходит дерево папок, запрашивая содержимое нескольких папок одновременно
+
+    Args:
+        client: Клиент Яндекс.Диска
+        root_path: Путь к корневой папке
+        max_workers: Количество одновременных запросов списка файлов
+        page_size: Размер страницы при пагинации
+
+    Returns:
+        RemoteTree: Все файлы и папки дерева
+
+    Raises:
+        requests.exceptions.RequestException: При ошибке запроса списка
+    """
+    tree = RemoteTree(root_path)
+    # Рабочие потоки наследуют приоритет вызывающего потока
+    priority = client.scheduler.current_priority
+
+    def list_dir(remote_dir: str, rel_dir: str, depth: int):
+        with client.priority(priority):
+            return rel_dir, depth, list(client.iter_files(remote_dir, page_size))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(list_dir, root_path, "", 0)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                rel_dir, depth, items = future.result()
+                tree.max_depth = max(tree.max_depth, depth)
+                for item in items:
+                    rel_path = f"{rel_dir}/{item.name}" if rel_dir else item.name
+                    if item.is_dir:
+                        tree.dirs.append(rel_path)
+                        pending.add(executor.submit(list_dir, item.path, rel_path, depth + 1))
+                    else:
+                        tree.files.append((item.path, rel_path, item))
+    return tree
+
+
+def should_use_server_zip(tree: RemoteTree) -> bool:
+    """
+    Решает, выгоднее ли скачать папку одним серверным zip
+
+    Для неглубоких папок с большим количеством мелких файлов накладные расходы
+    на отдельный запрос ссылки для каждого файла больше, чем на сборку zip.
+
+    Args:
+        tree: Результат обхода папки
+
+    Returns:
+        bool: True если лучше скачать папку архивом
+    """
+    count = len(tree.files)
+    if count < SERVER_ZIP_MIN_FILES or tree.max_depth > SERVER_ZIP_MAX_DEPTH:
+        return False
+    return tree.total_size / count <= SERVER_ZIP_MAX_AVG_SIZE
+
+
+def plan_folder_download(tree: RemoteTree, local_dir: str) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """
+    Создает локальную структуру папок и возвращает список файлов для скачивания
+
+    Args:
+        tree: Результат обхода папки
+        local_dir: Локальная папка, соответствующая корню дерева
+
+    Returns:
+        List[Tuple[str, str, Dict[str, Any]]]: Тройки (путь на диске, локальный путь,
+            ожидаемые контрольные суммы) для DownloadManager
+    """
+    os.makedirs(local_dir, exist_ok=True)
+    for rel_dir in tree.dirs:
+        os.makedirs(os.path.join(local_dir, *rel_dir.split("/")), exist_ok=True)
+    return [(remote_path, os.path.join(local_dir, *rel_path.split("/")),
+             resource.hashes)
+            for remote_path, rel_path, resource in tree.files]
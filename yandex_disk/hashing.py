@@ -0,0 +1,84 @@
+"""
+Подсчет контрольных сумм файлов в один проход
+"""
+
+import hashlib
+from typing import Optional, Dict, Any
+
+
+# Размер блока чтения при подсчете контрольных сумм
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
+class StreamHasher:
+    """Считает md5 и sha256 одновременно по мере поступления данных"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Сбрасывает состояние для подсчета с начала"""
+        self._md5 = hashlib.md5()
+        self._sha256 = hashlib.sha256()
+
+    def update(self, data):
+        self._md5.update(data)
+        self._sha256.update(data)
+
+    def update_from_file(self, path: str, length: Optional[int] = None):
+        """
+        Добавляет в подсчет содержимое файла
+
+        Args:
+            path: Путь к файлу
+            length: Сколько байт от начала файла прочитать (None - весь файл)
+        """
+        remaining = length
+        with open(path, 'rb') as f:
+            while remaining is None or remaining > 0:
+                size = HASH_BUFFER_SIZE if remaining is None else min(HASH_BUFFER_SIZE, remaining)
+                block = f.read(size)
+                if not block:
+                    break
+                self.update(block)
+                if remaining is not None:
+                    remaining -= len(block)
+
+    @property
+    def md5(self) -> str:
+        return self._md5.hexdigest()
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    def matches(self, expected: Dict[str, Any]) -> bool:
+        """
+        Сравнивает суммы с ожидаемыми значениями из метаданных ресурса
+
+        Args:
+            expected: Словарь с ключами "md5" и/или "sha256"
+
+        Returns:
+            bool: False если хотя бы одна известная сумма не совпала
+        """
+        if expected.get("sha256") and expected["sha256"].lower() != self.sha256:
+            return False
+        if expected.get("md5") and expected["md5"].lower() != self.md5:
+            return False
+        return True
+
+
+def hash_file(path: str) -> StreamHasher:
+    """
+    Считает md5 и sha256 файла за одно чтение
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        StreamHasher: Объект с посчитанными суммами
+    """
+    hasher = StreamHasher()
+    hasher.update_from_file(path)
+    return hasher
@@ -0,0 +1,176 @@
+"""
+Кэш списков содержимого папок с фоновой предзагрузкой
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Iterable
+
+import requests
+
+from yandex_disk.api_client import YandexDiskClient
+from yandex_disk.resource import Resource
+from yandex_disk.scheduler import PRIORITY_BACKGROUND
+
+
+class CachedListing:
+    """Полный список содержимого одной папки"""
+
+    def __init__(self, items: List[Resource]):
+        self.items = items
+        self.fetched_at = time.monotonic()
+
+    @property
+    def age(self) -> float:
+        """Возраст записи в секундах"""
+        return time.monotonic() - self.fetched_at
+
+
+class ListingCache:
+    """
+    LRU-кэш списков папок поверх YandexDiskClient
+
+    Объем ограничен количеством папок и суммарным количеством элементов, которое
+    служит оценкой занимаемой памяти. Записи не устаревают принудительно: вызывающий
+    код показывает кэшированный список сразу и обновляет его в фоне
+    (stale-while-revalidate), используя is_fresh() чтобы не повторять только что
+    выполненный запрос.
+    """
+
+    def __init__(self, client: YandexDiskClient, max_entries: int = 256, max_items: int = 200000,
+                 fresh_ttl: float = 10.0, prefetch_workers: int = 2, page_size: int = 1000):
+        """
+        Args:
+            client: Клиент Яндекс.Диска
+            max_entries: Максимальное количество папок в кэше
+            max_items: Максимальное суммарное количество элементов во всех папках
+            fresh_ttl: Время в секундах, в течение которого запись не требует обновления
+            prefetch_workers: Количество потоков предзагрузки
+            page_size: Размер страницы при загрузке списка
+        """
+        self.client = client
+        self.max_entries = max_entries
+        self.max_items = max_items
+        self.fresh_ttl = fresh_ttl
+        self.page_size = page_size
+        self._entries: "OrderedDict[str, CachedListing]" = OrderedDict()
+        self._total_items = 0
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=prefetch_workers)
+
+    @staticmethod
+    def _key(path: str) -> str:
+        """Приводит "/", "disk:/" и пути с завершающим слешем к одному ключу"""
+        if path.startswith("disk:"):
+            path = path[len("disk:"):]
+        path = "/" + path.strip("/")
+        return path
+
+    def get(self, path: str) -> Optional[CachedListing]:
+        """
+        Возвращает кэшированный список папки
+
+        Args:
+            path: Путь к папке
+
+        Returns:
+            CachedListing или None: Запись кэша
+        """
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def is_fresh(self, path: str) -> bool:
+        """True если список папки получен недавно и не требует обновления"""
+        entry = self.get(path)
+        return entry is not None and entry.age < self.fresh_ttl
+
+    def put(self, path: str, items: List[Resource]):
+        """
+        Сохраняет полный список папки и вытесняет самые старые записи при переполнении
+
+        Args:
+            path: Путь к папке
+            items: Все элементы папки
+        """
+        key = self._key(path)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_items -= len(old.items)
+            self._entries[key] = CachedListing(items)
+            self._total_items += len(items)
+            while self._entries and (len(self._entries) > self.max_entries or self._total_items > self.max_items):
+                _, evicted = self._entries.popitem(last=False)
+                self._total_items -= len(evicted.items)
+
+    def invalidate(self, path: Optional[str] = None):
+        """
+        Удаляет запись папки или очищает весь кэш
+
+        Args:
+            path: Путь к папке (None - очистить все)
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._total_items = 0
+                return
+            entry = self._entries.pop(self._key(path), None)
+            if entry is not None:
+                self._total_items -= len(entry.items)
+
+    def fetch(self, path: str) -> List[Resource]:
+        """
+        Загружает полный список папки с сервера и сохраняет его в кэш
+
+        Args:
+            path: Путь к папке
+
+        Returns:
+            List[Resource]: Все элементы папки
+
+        Raises:
+            requests.exceptions.RequestException: При ошибке запроса
+        """
+        items = list(self.client.iter_files(path, self.page_size))
+        self.put(path, items)
+        return items
+
+    def prefetch(self, paths: Iterable[str]):
+        """
+        Загружает в фоне списки папок, которых нет в кэше или которые устарели
+
+        Args:
+            paths: Пути к папкам
+        """
+        for path in paths:
+            key = self._key(path)
+            with self._lock:
+                if key in self._in_flight:
+                    continue
+                entry = self._entries.get(key)
+                if entry is not None and entry.age < self.fresh_ttl:
+                    continue
+                self._in_flight.add(key)
+            self._prefetch_pool.submit(self._prefetch_one, path, key)
+
+    def _prefetch_one(self, path: str, key: str):
+        try:
+            with self.client.priority(PRIORITY_BACKGROUND):
+                self.fetch(path)
+        except requests.exceptions.RequestException as e:
+            print(f"Ошибка предзагрузки {path}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+
+    def shutdown(self):
+        """Останавливает потоки предзагрузки"""
+        self._prefetch_pool.shutdown(wait=False)
@@ -0,0 +1,270 @@
+"""
+Метрики запросов, передачи данных и распаковки с экспортом в JSON и Prometheus
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Callable, Tuple
+
+
+# Границы корзин гистограммы задержек в секундах
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Окно расчета текущей скорости передачи в секундах
+THROUGHPUT_WINDOW = 5.0
+
+# Сколько последних передач хранить для отчета о скорости
+RECENT_TRANSFERS = 100
+
+# Тип обработчика событий: (имя события, данные)
+MetricsHook = Callable[[str, Dict[str, Any]], None]
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин в стиле Prometheus"""
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        # Последняя корзина - значения больше всех границ (+Inf)
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "buckets": dict(zip([str(b) for b in self.bounds] + ["+Inf"], self.counts)),
+            "sum": self.total,
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+        }
+
+
+class Metrics:
+    """
+    Потокобезопасный сборщик метрик клиента
+
+    Обработчики, добавленные через add_hook, вызываются в потоке, записавшем
+    событие, поэтому должны работать быстро.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hooks: List[MetricsHook] = []
+        self.started_at = time.time()
+        # (метод, endpoint) -> гистограмма задержек
+        self.request_latency: Dict[Tuple[str, str], Histogram] = {}
+        # (метод, endpoint, статус) -> количество
+        self.request_count: Dict[Tuple[str, str, int], int] = {}
+        # Вид повтора -> количество
+        self.retries: Dict[str, int] = {}
+        # Вид передачи -> (байт, секунд, количество)
+        self.transfer_totals: Dict[str, List[float]] = {}
+        self.recent_transfers: deque = deque(maxlen=RECENT_TRANSFERS)
+        self.disk_write_seconds = 0.0
+        self.disk_write_bytes = 0
+        self.extraction_seconds = 0.0
+        self.extraction_bytes = 0
+        self.extraction_count = 0
+        self._window: deque = deque()
+
+    def add_hook(self, hook: MetricsHook):
+        """Добавляет обработчик событий "request", "retry", "transfer", "extraction" """
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook: MetricsHook):
+        with self._lock:
+            self._hooks.remove(hook)
+
+    def _emit(self, event: str, data: Dict[str, Any]):
+        for hook in list(self._hooks):
+            try:
+                hook(event, data)
+            except Exception as e:
+                print(f"Ошибка обработчика метрик: {e}")
+
+    def record_request(self, method: str, endpoint: str, status: int, seconds: float, retries: int = 0):
+        """
+        Учитывает запрос к API
+
+        Args:
+            method: HTTP метод
+            endpoint: Путь относительно base_url
+            status: Код ответа (0 - сетевая ошибка)
+            seconds: Время запроса, включая внутренние повторы
+            retries: Количество повторов внутри запроса
+        """
+        with self._lock:
+            key = (method, endpoint)
+            histogram = self.request_latency.get(key)
+            if histogram is None:
+                histogram = self.request_latency[key] = Histogram()
+            histogram.observe(seconds)
+            count_key = (method, endpoint, status)
+            self.request_count[count_key] = self.request_count.get(count_key, 0) + 1
+            if retries:
+                self.retries["api"] = self.retries.get("api", 0) + retries
+        self._emit("request", {"method": method, "endpoint": endpoint, "status": status,
+                               "seconds": seconds, "retries": retries})
+
+    def record_retry(self, kind: str):
+        """
+        Учитывает повтор передачи данных
+
+        Args:
+            kind: Вид повтора ("download", "segment", "upload")
+        """
+        with self._lock:
+            self.retries[kind] = self.retries.get(kind, 0) + 1
+        self._emit("retry", {"kind": kind})
+
+    def add_transfer_bytes(self, count: int):
+        """Учитывает очередной блок переданных данных для расчета текущей скорости"""
+        now = time.monotonic()
+        with self._lock:
+            self._window.append((now, count))
+            while self._window and self._window[0][0] < now - THROUGHPUT_WINDOW:
+                self._window.popleft()
+
+    def record_transfer(self, kind: str, name: str, count: int, seconds: float):
+        """
+        Учитывает завершенную передачу (файл, докачку или сегмент)
+
+        Args:
+            kind: "download" или "upload"
+            name: Путь к файлу
+            count: Количество байт
+            seconds: Длительность передачи
+        """
+        rate = count / max(seconds, 1e-9)
+        with self._lock:
+            totals = self.transfer_totals.setdefault(kind, [0, 0.0, 0])
+            totals[0] += count
+            totals[1] += seconds
+            totals[2] += 1
+            self.recent_transfers.append({"kind": kind, "name": name, "bytes": count,
+                                          "seconds": seconds, "bytes_per_sec": rate})
+        self._emit("transfer", {"kind": kind, "name": name, "bytes": count,
+                                "seconds": seconds, "bytes_per_sec": rate})
+
+    def record_disk_write(self, count: int, seconds: float):
+        """Учитывает время записи скачанных данных на диск"""
+        with self._lock:
+            self.disk_write_bytes += count
+            self.disk_write_seconds += seconds
+
+    def record_extraction(self, archive: str, count: int, seconds: float):
+        """
+        Учитывает распаковку архива
+
+        Args:
+            archive: Путь к архиву
+            count: Количество записанных байт
+            seconds: Длительность распаковки
+        """
+        with self._lock:
+            self.extraction_count += 1
+            self.extraction_bytes += count
+            self.extraction_seconds += seconds
+        self._emit("extraction", {"archive": archive, "bytes": count, "seconds": seconds})
+
+    def current_throughput(self) -> float:
+        """Скорость передачи за последние THROUGHPUT_WINDOW секунд в байтах в секунду"""
+        now = time.monotonic()
+        with self._lock:
+            while self._window and self._window[0][0] < now - THROUGHPUT_WINDOW:
+                self._window.popleft()
+            if not self._window:
+                return 0.0
+            total = sum(count for _, count in self._window)
+            span = max(now - self._window[0][0], 1.0)
+        return total / span
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Снимок всех метрик"""
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "uptime": time.time() - self.started_at,
+                "requests": [
+                    {"method": method, "endpoint": endpoint, "latency": histogram.to_dict(),
+                     "status": {str(status): count for (m, e, status), count in self.request_count.items()
+                                if (m, e) == (method, endpoint)}}
+                    for (method, endpoint), histogram in sorted(self.request_latency.items())
+                ],
+                "retries": dict(self.retries),
+                "transfers": {
+                    kind: {"bytes": total[0], "seconds": total[1], "count": total[2],
+                           "bytes_per_sec": total[0] / total[1] if total[1] else 0.0}
+                    for kind, total in self.transfer_totals.items()
+                },
+                "recent_transfers": list(self.recent_transfers),
+                "disk_write": {"bytes": self.disk_write_bytes, "seconds": self.disk_write_seconds},
+                "extraction": {"archives": self.extraction_count, "bytes": self.extraction_bytes,
+                               "seconds": self.extraction_seconds},
+            }
+
+    def to_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        lines = []
+        with self._lock:
+            lines.append("# TYPE yadisk_request_duration_seconds histogram")
+            for (method, endpoint), histogram in sorted(self.request_latency.items()):
+                labels = f'method="{method}",endpoint="{endpoint}"'
+                cumulative = 0
+                for bound, count in zip([str(b) for b in histogram.bounds] + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'yadisk_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"yadisk_request_duration_seconds_sum{{{labels}}} {histogram.total}")
+                lines.append(f"yadisk_request_duration_seconds_count{{{labels}}} {histogram.count}")
+            lines.append("# TYPE yadisk_requests_total counter")
+            for (method, endpoint, status), count in sorted(self.request_count.items()):
+                lines.append(f'yadisk_requests_total{{method="{method}",endpoint="{endpoint}",'
+                             f'status="{status}"}} {count}')
+            lines.append("# TYPE yadisk_retries_total counter")
+            for kind, count in sorted(self.retries.items()):
+                lines.append(f'yadisk_retries_total{{kind="{kind}"}} {count}')
+            # Отсчеты одного семейства идут подряд сразу после его TYPE
+            lines.append("# TYPE yadisk_transfer_bytes_total counter")
+            for kind, total in sorted(self.transfer_totals.items()):
+                lines.append(f'yadisk_transfer_bytes_total{{kind="{kind}"}} {total[0]}')
+            lines.append("# TYPE yadisk_transfer_seconds_total counter")
+            for kind, total in sorted(self.transfer_totals.items()):
+                lines.append(f'yadisk_transfer_seconds_total{{kind="{kind}"}} {total[1]}')
+            lines.append("# TYPE yadisk_disk_write_seconds_total counter")
+            lines.append(f"yadisk_disk_write_seconds_total {self.disk_write_seconds}")
+            lines.append("# TYPE yadisk_extraction_seconds_total counter")
+            lines.append(f"yadisk_extraction_seconds_total {self.extraction_seconds}")
+            lines.append("# TYPE yadisk_extraction_bytes_total counter")
+            lines.append(f"yadisk_extraction_bytes_total {self.extraction_bytes}")
+        lines.append("# TYPE yadisk_throughput_bytes_per_second gauge")
+        lines.append(f"yadisk_throughput_bytes_per_second {self.current_throughput()}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str):
+        """
+        Атомарно сохраняет метрики в файл
+
+        Формат выбирается по расширению: ``.json`` - JSON, иначе текст Prometheus
+        (например, для textfile collector node_exporter с расширением ``.prom``).
+
+        Args:
+            path: Путь к файлу
+        """
+        if path.endswith(".json"):
+            content = json.dumps(self.to_dict(), ensure_ascii=False, indent=1)
+        else:
+            content = self.to_prometheus()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
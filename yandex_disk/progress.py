@@ -0,0 +1,183 @@
+"""
+Прогресс пакетной передачи в байтах и управление паузой и отменой
+
+Рабочие потоки только увеличивают счетчики ProgressTracker и вызывают
+TransferControl.checkpoint() между блоками данных. Интерфейс сам опрашивает
+snapshot() с фиксированной частотой, поэтому количество обновлений экрана не
+зависит от количества и размера файлов.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional, Callable
+
+
+# Окно расчета скорости в секундах
+RATE_WINDOW = 5.0
+
+
+class TransferCancelled(Exception):
+    """Передача остановлена через TransferControl.cancel()"""
+
+
+class TransferControl:
+    """
+    Кооперативные пауза и отмена
+
+    Потоки передачи вызывают checkpoint() после каждого блока: на паузе вызов
+    блокирует поток, после отмены бросает TransferCancelled. Недокачанные .part
+    файлы остаются на диске, и повторный запуск продолжает их с места остановки.
+    """
+
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        """Отменяет передачу; потоки на паузе тоже просыпаются и завершаются"""
+        self._cancelled.set()
+        self._running.set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def checkpoint(self):
+        """
+        Ждет снятия паузы и проверяет отмену
+
+        Raises:
+            TransferCancelled: Если передача отменена
+        """
+        if not self._running.is_set():
+            self._running.wait()
+        if self._cancelled.is_set():
+            raise TransferCancelled()
+
+
+class PartProgress:
+    """
+    Байтовый прогресс скачивания одного файла, согласованный с .part
+
+    Сумма значений, переданных в callback, равна числу байт, которые сейчас есть
+    в .part: докачка сообщает скачанное ранее начало файла, а отброшенный или
+    перезаписываемый с начала .part снимается отрицательным значением.
+    """
+
+    def __init__(self, callback: Optional[Callable[[int], None]] = None):
+        self._callback = callback
+        self._lock = threading.Lock()
+        self.reported = 0
+
+    def __call__(self, count: int):
+        with self._lock:
+            self.reported += count
+        if self._callback and count:
+            self._callback(count)
+
+    def set_size(self, size: int):
+        """Сообщает, что в .part сейчас size байт"""
+        with self._lock:
+            delta = size - self.reported
+            self.reported = size
+        if self._callback and delta:
+            self._callback(delta)
+
+
+class ProgressSnapshot:
+    """Состояние прогресса на момент опроса"""
+
+    def __init__(self, bytes_done: int, bytes_total: int, files_done: int, files_total: int,
+                 rate: float, elapsed: float):
+        self.bytes_done = bytes_done
+        self.bytes_total = bytes_total
+        self.files_done = files_done
+        self.files_total = files_total
+        self.rate = rate
+        self.elapsed = elapsed
+
+    @property
+    def fraction(self) -> float:
+        """Доля выполненного: по байтам, если размер известен, иначе по файлам"""
+        if self.bytes_total:
+            return min(1.0, self.bytes_done / self.bytes_total)
+        if self.files_total:
+            return min(1.0, self.files_done / self.files_total)
+        return 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Оставшееся время в секундах или None, если его нельзя оценить"""
+        if not self.rate or not self.bytes_total:
+            return None
+        return max(0, self.bytes_total - self.bytes_done) / self.rate
+
+
+class ProgressTracker:
+    """Потокобезопасные счетчики байт и файлов пакета с текущей скоростью"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.bytes_done = 0
+        self.bytes_total = 0
+        self.files_done = 0
+        self.files_total = 0
+        self._window: deque = deque()
+
+    def add_total(self, size: Optional[int], files: int = 1):
+        """
+        Учитывает запланированные файлы
+
+        Args:
+            size: Суммарный размер в байтах (None - неизвестен)
+            files: Количество файлов
+        """
+        with self._lock:
+            self.bytes_total += size or 0
+            self.files_total += files
+
+    def add_bytes(self, count: int):
+        """
+        Учитывает переданный блок (подходит как progress_callback клиента)
+
+        Отрицательное значение отменяет учтенные байты, которые будут переданы
+        заново (например, отброшенный .part), не влияя на текущую скорость.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.bytes_done += count
+            if count <= 0:
+                return
+            self._window.append((now, count))
+            while self._window and self._window[0][0] < now - RATE_WINDOW:
+                self._window.popleft()
+
+    def file_done(self):
+        with self._lock:
+            self.files_done += 1
+
+    def snapshot(self) -> ProgressSnapshot:
+        now = time.monotonic()
+        with self._lock:
+            while self._window and self._window[0][0] < now - RATE_WINDOW:
+                self._window.popleft()
+            if self._window:
+                span = max(now - self._window[0][0], 1.0)
+                rate = sum(count for _, count in self._window) / span
+            else:
+                rate = 0.0
+            return ProgressSnapshot(self.bytes_done, self.bytes_total, self.files_done,
+                                    self.files_total, rate, now - self.started_at)
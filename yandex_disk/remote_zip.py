@@ -0,0 +1,325 @@
+"""
+Чтение zip-архивов на Яндекс.Диске без скачивания целиком
+"""
+
+import fnmatch
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import Optional, List, Callable, Union
+
+import requests
+
+from yandex_disk.api_client import YandexDiskClient, EXPIRED_LINK_STATUS_CODES
+from yandex_disk.progress import TransferControl
+
+
+# Минимальный размер одного запроса Range при чтении архива
+READ_AHEAD_SIZE = 1024 * 1024
+
+# Размер блока, которым читается ответ на запрос Range: в памяти держится один блок
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class RemoteZipUnavailable(OSError):
+    """Архив нельзя читать по частям: нет поддержки Range, ошибка HTTP или сети"""
+
+
+def select_members(members: List[zipfile.ZipInfo],
+                   match: Union[str, Callable[[zipfile.ZipInfo], bool], None] = None) -> List[zipfile.ZipInfo]:
+    """
+    Выбирает члены архива по фильтру
+
+    Args:
+        members: Члены архива
+        match: Маска имени (fnmatch, несколько масок через ";") или функция от ZipInfo
+
+    Returns:
+        List[zipfile.ZipInfo]: Подходящие файлы (без каталогов)
+    """
+    members = [info for info in members if not info.is_dir()]
+    if match is None:
+        return members
+    if callable(match):
+        return [info for info in members if match(info)]
+    patterns = [p.strip() for p in match.split(";") if p.strip()]
+    return [info for info in members
+            if any(fnmatch.fnmatch(info.filename, p) or fnmatch.fnmatch(os.path.basename(info.filename), p)
+                   for p in patterns)]
+
+
+class HttpRangeFile(io.RawIOBase):
+    """
+    Файлоподобный объект только для чтения поверх ссылки на скачивание
+
+    Каждое чтение вне открытого диапазона превращается в запрос Range не меньше
+    read_ahead байт, поэтому zipfile может читать центральный каталог и отдельные
+    члены архива, не скачивая остальное. Ответ читается потоком по
+    STREAM_CHUNK_SIZE: пауза, отмена и прогресс срабатывают на каждом блоке.
+    """
+
+    def __init__(self, client: YandexDiskClient, remote_path: str, read_ahead: int = READ_AHEAD_SIZE,
+                 progress_callback: Optional[Callable[[int], None]] = None,
+                 control: Optional[TransferControl] = None):
+        """
+        Args:
+            client: Клиент Яндекс.Диска
+            remote_path: Путь к файлу на Яндекс.Диске
+            read_ahead: Минимальный размер запроса в байтах
+            progress_callback: Вызывается с количеством полученных байт после каждого блока
+            control: Пауза и отмена, проверяемые перед каждым блоком
+
+        Raises:
+            RemoteZipUnavailable: Если не удалось получить ссылку или сервер не поддерживает Range
+        """
+        super().__init__()
+        self.client = client
+        self.remote_path = remote_path
+        self.read_ahead = read_ahead
+        self.progress_callback = progress_callback
+        self.control = control
+        self.bytes_fetched = 0
+        self._href = self._get_href()
+        self._size = client._probe_range_support(self._href)
+        if self._size is None:
+            raise RemoteZipUnavailable(f"Сервер не поддерживает частичное чтение: {remote_path}")
+        self._pos = 0
+        # Последний полученный блок и открытый потоковый ответ на диапазон
+        self._buffer = b""
+        self._buffer_start = 0
+        self._response: Optional[requests.Response] = None
+        self._chunks = None
+        self._stream_pos = 0
+        self._stream_end = 0
+
+    def _get_href(self) -> str:
+        href = self.client.get_download_link(self.remote_path)
+        if not href:
+            raise RemoteZipUnavailable(f"Не удалось получить ссылку для скачивания: {self.remote_path}")
+        return href
+
+    def _open_range(self, start: int, end: int):
+        """Открывает потоковый ответ на диапазон [start, end] с повторным запросом ссылки при истечении"""
+        self._close_stream()
+        for _ in range(2):
+            try:
+                response = self.client.session.get(self._href, timeout=self.client.timeout, stream=True,
+                                                   headers={"Range": f"bytes={start}-{end}"})
+            except requests.exceptions.RequestException as e:
+                raise RemoteZipUnavailable(f"Ошибка чтения {self.remote_path}: {e}") from e
+            if response.status_code in EXPIRED_LINK_STATUS_CODES:
+                response.close()
+                self._href = self._get_href()
+                continue
+            try:
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                response.close()
+                raise RemoteZipUnavailable(f"Ошибка чтения {self.remote_path}: {e}") from e
+            if response.status_code != 206:
+                response.close()
+                raise RemoteZipUnavailable(f"Сервер проигнорировал Range для {self.remote_path}")
+            self._response = response
+            self._chunks = response.iter_content(STREAM_CHUNK_SIZE)
+            self._stream_pos = start
+            self._stream_end = end + 1
+            return
+        raise RemoteZipUnavailable(f"Ссылка для скачивания истекла: {self.remote_path}")
+
+    def _close_stream(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+            self._chunks = None
+
+    def _next_chunk(self) -> bool:
+        """
+        Читает следующий блок открытого диапазона в буфер
+
+        Returns:
+            bool: False, если диапазон закончился
+
+        Raises:
+            TransferCancelled: Если чтение отменено через control
+        """
+        if self._chunks is None or self._stream_pos >= self._stream_end:
+            return False
+        if self.control is not None:
+            self.control.checkpoint()
+        try:
+            chunk = next(self._chunks, b"")
+        except requests.exceptions.RequestException as e:
+            self._close_stream()
+            raise RemoteZipUnavailable(f"Ошибка чтения {self.remote_path}: {e}") from e
+        if not chunk:
+            self._close_stream()
+            return False
+        self.bytes_fetched += len(chunk)
+        self.client.account_transfer(len(chunk))
+        if self.progress_callback:
+            self.progress_callback(len(chunk))
+        self._buffer = chunk
+        self._buffer_start = self._stream_pos
+        self._stream_pos += len(chunk)
+        return True
+
+    def _fill(self, size: int):
+        """
+        Загружает в буфер блок, содержащий текущую позицию
+
+        Позиция впереди открытого диапазона дочитывается из него (не дальше
+        read_ahead), иначе открывается новый диапазон не меньше read_ahead байт.
+        """
+        if self._chunks is not None and self._stream_pos <= self._pos < self._stream_end:
+            while self._next_chunk():
+                if self._pos < self._stream_pos:
+                    return
+        end = min(self._pos + max(size, self.read_ahead), self._size) - 1
+        self._open_range(self._pos, end)
+        while self._next_chunk():
+            if self._pos < self._stream_pos:
+                return
+        raise RemoteZipUnavailable(f"Сервер вернул неполный диапазон для {self.remote_path}")
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self._size + offset
+        else:
+            raise ValueError(f"Неверное значение whence: {whence}")
+        self._pos = max(0, self._pos)
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._size - self._pos
+        size = min(size, self._size - self._pos)
+        parts = []
+        while size > 0:
+            if not (self._buffer_start <= self._pos < self._buffer_start + len(self._buffer)):
+                self._fill(size)
+            offset = self._pos - self._buffer_start
+            data = self._buffer[offset:offset + size]
+            parts.append(data)
+            self._pos += len(data)
+            size -= len(data)
+        return b"".join(parts)
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self._close_stream()
+        super().close()
+
+
+class RemoteZipFile:
+    """Zip-архив на Яндекс.Диске с выборочной распаковкой через запросы Range"""
+
+    def __init__(self, client: YandexDiskClient, remote_path: str, read_ahead: int = READ_AHEAD_SIZE,
+                 progress_callback: Optional[Callable[[int], None]] = None,
+                 control: Optional[TransferControl] = None):
+        """
+        Args:
+            client: Клиент Яндекс.Диска
+            remote_path: Путь к архиву на Яндекс.Диске
+            read_ahead: Минимальный размер запроса в байтах
+            progress_callback: Вызывается с количеством полученных с сервера байт
+            control: Пауза и отмена чтения архива
+
+        Raises:
+            RemoteZipUnavailable: Если архив недоступен для частичного чтения
+            zipfile.BadZipFile: Если файл не является zip-архивом
+            TransferCancelled: Если чтение отменено через control
+        """
+        self.remote_path = remote_path
+        self._file = HttpRangeFile(client, remote_path, read_ahead, progress_callback, control)
+        self._zip = zipfile.ZipFile(self._file)
+
+    @property
+    def bytes_fetched(self) -> int:
+        """Количество байт, фактически полученных с сервера"""
+        return self._file.bytes_fetched
+
+    def infolist(self) -> List[zipfile.ZipInfo]:
+        return self._zip.infolist()
+
+    def namelist(self) -> List[str]:
+        return self._zip.namelist()
+
+    def select(self, match: Union[str, Callable[[zipfile.ZipInfo], bool], None] = None) -> List[zipfile.ZipInfo]:
+        """
+        Выбирает члены архива по фильтру
+
+        Args:
+            match: Маска имени (fnmatch, несколько масок через ";") или функция от ZipInfo
+
+        Returns:
+            List[zipfile.ZipInfo]: Подходящие файлы (без каталогов)
+        """
+        return select_members(self._zip.infolist(), match)
+
+    def extract(self, dest_dir: str,
+                match: Union[str, Callable[[zipfile.ZipInfo], bool], None] = None) -> List[str]:
+        """
+        Скачивает и распаковывает только подходящие члены архива
+
+        Каждый член сначала распаковывается во временную папку внутри dest_dir и
+        переносится на место целиком, поэтому после отмены или ошибки в dest_dir
+        не остается недописанных файлов.
+
+        Args:
+            dest_dir: Папка для распаковки
+            match: Фильтр, см. select()
+
+        Returns:
+            List[str]: Пути распакованных файлов
+
+        Raises:
+            RemoteZipUnavailable: Если чтение архива с сервера прервалось
+            OSError: При ошибке записи распакованных файлов
+            TransferCancelled: Если чтение отменено через control
+        """
+        extracted = []
+        os.makedirs(dest_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".remote_zip.", dir=dest_dir)
+        try:
+            for info in sorted(self.select(match), key=lambda i: i.header_offset):
+                tmp_path = self._zip.extract(info, tmp_dir)
+                target = os.path.join(dest_dir, os.path.relpath(tmp_path, tmp_dir))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp_path, target)
+                extracted.append(target)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return extracted
+
+    def close(self):
+        self._zip.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,81 @@
+"""
+Компактная запись ресурса Яндекс.Диска для списков файлов
+"""
+
+import sys
+from typing import Optional, Dict, Any
+
+
+# Поля ресурса, запрашиваемые у API (параметр fields) и хранимые в записи
+RESOURCE_FIELDS = ("name", "path", "type", "size", "modified", "md5", "sha256", "mime_type")
+
+
+def fields_param(prefix: str = "", extra: tuple = ()) -> str:
+    """
+    Значение параметра fields, ограничивающее ответ API полями RESOURCE_FIELDS
+
+    Args:
+        prefix: Путь к ресурсам в ответе, например "_embedded.items."
+        extra: Дополнительные поля ответа (например, "_embedded.total")
+
+    Returns:
+        str: Список полей через запятую
+    """
+    return ",".join([prefix + field for field in RESOURCE_FIELDS] + list(extra))
+
+
+class Resource:
+    """
+    Файл или папка на диске
+
+    Вместо словаря из JSON ответа хранятся только поля RESOURCE_FIELDS в
+    __slots__, а повторяющиеся строки (тип, MIME) интернируются: для папок из
+    сотен тысяч элементов это заметно уменьшает расход памяти.
+    """
+
+    __slots__ = RESOURCE_FIELDS
+
+    def __init__(self, name: str, path: str, type: str = "file", size: Optional[int] = None,
+                 modified: Optional[str] = None, md5: Optional[str] = None,
+                 sha256: Optional[str] = None, mime_type: Optional[str] = None):
+        self.name = name
+        self.path = path
+        self.type = sys.intern(type)
+        self.size = size
+        self.modified = modified
+        self.md5 = md5
+        self.sha256 = sha256
+        self.mime_type = sys.intern(mime_type) if mime_type else None
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "Resource":
+        """Создает запись из ресурса в ответе API (лишние поля отбрасываются)"""
+        return cls(data.get("name", ""), data.get("path", ""), data.get("type", "file"),
+                   data.get("size"), data.get("modified"), data.get("md5"),
+                   data.get("sha256"), data.get("mime_type"))
+
+    @property
+    def is_dir(self) -> bool:
+        return self.type == "dir"
+
+    @property
+    def hashes(self) -> Dict[str, Optional[str]]:
+        """Ожидаемые контрольные суммы для download_file и StreamHasher.matches"""
+        return {"md5": self.md5, "sha256": self.sha256}
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """Доступ к полю по имени, как у словаря ресурса"""
+        value = getattr(self, field, None) if field in RESOURCE_FIELDS else None
+        return default if value is None else value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Поля записи без пустых значений"""
+        return {field: getattr(self, field) for field in RESOURCE_FIELDS if getattr(self, field) is not None}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Resource):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in RESOURCE_FIELDS)
+
+    def __repr__(self) -> str:
+        return f"Resource({self.path!r}, type={self.type!r}, size={self.size!r})"
@@ -0,0 +1,314 @@
+"""
+Ограничение частоты запросов и скорости передачи с приоритетами
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional, Dict, Tuple, Iterator
+
+
+# Приоритеты запросов: меньшее значение обслуживается раньше
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+# Классы запросов к API
+ENDPOINT_READ = "read"
+ENDPOINT_WRITE = "write"
+ENDPOINT_LINK = "link"
+
+# Консервативные фиксированные лимиты (запросов в секунду, размер всплеска);
+# применяются только если переданы явно, например rate_limits=DEFAULT_RATE_LIMITS
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    ENDPOINT_READ: (20.0, 40.0),
+    ENDPOINT_WRITE: (10.0, 20.0),
+    ENDPOINT_LINK: (10.0, 20.0),
+}
+
+# Адаптивный лимит класса без фиксированного лимита: после ответа 429/503 частота
+# снижается вдвое от наблюдаемой, а каждые ADAPTIVE_RECOVERY_SECONDS без новых
+# отказов растет в ADAPTIVE_RECOVERY_FACTOR раз, пока не достигнет частоты, на
+# которой сервер начал отказывать; после этого лимит снимается
+ADAPTIVE_MIN_RATE = 1.0
+ADAPTIVE_RECOVERY_SECONDS = 2.0
+ADAPTIVE_RECOVERY_FACTOR = 1.25
+
+# Отказы чаще этого интервала (секунды) относятся к одной волне запросов
+ADAPTIVE_BACKOFF_INTERVAL = 1.0
+
+# Окно измерения частоты запросов класса в секундах; длиннее Retry-After,
+# чтобы пауза urllib3 перед повтором не занижала измеренную частоту
+RATE_WINDOW = 5.0
+
+
+class TokenBucket:
+    """
+    Ведро токенов, выдающее токены ожидающим потокам в порядке приоритета
+
+    Пока ждет более приоритетный поток, менее приоритетные не получают токены,
+    даже если их уже достаточно.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Скорость пополнения в токенах в секунду
+            capacity: Максимальное количество накопленных токенов
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """
+        Забирает токены без ожидания (для корутин, которые ждут через asyncio.sleep)
+
+        Баланс может уйти в минус; ожидающие потоки получат токены после его
+        восстановления. Приоритет при резервировании не учитывается.
+
+        Returns:
+            float: Сколько секунд подождать до использования токенов
+        """
+        with self._condition:
+            self._refill()
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def set_rate(self, rate: float, capacity: Optional[float] = None):
+        """Меняет скорость пополнения (и размер ведра) для ожидающих и будущих запросов"""
+        with self._condition:
+            self._refill()
+            self.rate = rate
+            if capacity is not None:
+                self.capacity = capacity
+                self._tokens = min(self._tokens, capacity)
+            self._condition.notify_all()
+
+    def acquire(self, amount: float = 1.0, priority: int = PRIORITY_NORMAL) -> float:
+        """
+        Забирает токены, ожидая их накопления
+
+        Запрос больше capacity выполняется при полном ведре и уводит баланс в минус,
+        поэтому крупные блоки данных не блокируются навсегда.
+
+        Args:
+            amount: Количество токенов
+            priority: Приоритет ожидающего потока
+
+        Returns:
+            float: Время ожидания в секундах
+        """
+        started = time.monotonic()
+        needed = min(amount, self.capacity)
+        with self._condition:
+            ticket = (priority, next(self._counter))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] == ticket and self._tokens >= needed:
+                        self._tokens -= amount
+                        return time.monotonic() - started
+                    if self._waiters[0] == ticket:
+                        timeout = (needed - self._tokens) / self.rate
+                    else:
+                        timeout = None
+                    self._condition.wait(timeout)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+
+class RequestScheduler:
+    """
+    Общий планировщик запросов клиента
+
+    Ограничивает частоту запросов к API отдельно для каждого класса
+    (чтение, изменение, получение ссылок) и суммарную скорость передачи данных.
+    Приоритет задается для текущего потока через priority().
+
+    Без фиксированных лимитов запросы не ограничиваются, пока сервер не
+    ответит 429/503 (report_throttled): тогда для класса вводится адаптивный
+    лимит, который постепенно снимается.
+
+    Приоритет действует только там, где запросы ждут в очереди к лимиту: при
+    фиксированных rate_limits, при bandwidth_limit и пока действует адаптивный
+    лимит после 429/503. В остальное время планировщик запросы не задерживает и
+    приоритет ни на что не влияет; от ожидания соединения в пуле интерактивные
+    запросы защищает отдельная сессия YandexDiskClient.
+    """
+
+    def __init__(self, rate_limits: Optional[Dict[str, Optional[Tuple[float, float]]]] = None,
+                 bandwidth_limit: Optional[float] = None, adaptive: bool = True):
+        """
+        Args:
+            rate_limits: Фиксированные лимиты (запросов в секунду, всплеск) по классу
+                запроса; значение None или отсутствие класса - без фиксированного лимита
+            bandwidth_limit: Максимальная суммарная скорость передачи в байтах в секунду
+                (None - без ограничения)
+            adaptive: Снижать частоту классов без фиксированного лимита после 429/503
+        """
+        self._buckets = {name: TokenBucket(*limit) for name, limit in (rate_limits or {}).items() if limit}
+        # Всплеск в одну секунду передачи
+        self._bandwidth = TokenBucket(bandwidth_limit, bandwidth_limit) if bandwidth_limit else None
+        self._local = threading.local()
+        self.adaptive = adaptive
+        # Класс -> адаптивный лимит, время его последнего изменения и частота отказа сервера
+        self._adaptive: Dict[str, TokenBucket] = {}
+        self._adjusted_at: Dict[str, float] = {}
+        self._ceiling: Dict[str, float] = {}
+        # Время последних запросов класса для измерения частоты
+        self._recent: Dict[str, deque] = {}
+        self._adaptive_lock = threading.Lock()
+
+    @property
+    def current_priority(self) -> int:
+        """Приоритет запросов текущего потока"""
+        return getattr(self._local, "priority", PRIORITY_NORMAL)
+
+    @contextmanager
+    def priority(self, priority: int) -> Iterator[None]:
+        """
+        Задает приоритет всех запросов текущего потока внутри блока with
+
+        Args:
+            priority: PRIORITY_INTERACTIVE, PRIORITY_NORMAL или PRIORITY_BACKGROUND
+        """
+        previous = self.current_priority
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    @staticmethod
+    def classify(method: str, endpoint: str) -> str:
+        """
+        Определяет класс запроса к API
+
+        Args:
+            method: HTTP метод
+            endpoint: Путь относительно base_url
+
+        Returns:
+            str: ENDPOINT_READ, ENDPOINT_WRITE или ENDPOINT_LINK
+        """
+        if endpoint in ("/resources/download", "/resources/upload"):
+            return ENDPOINT_LINK
+        if method.upper() in ("GET", "HEAD"):
+            return ENDPOINT_READ
+        return ENDPOINT_WRITE
+
+    def acquire_request(self, endpoint_class: str) -> float:
+        """
+        Ждет разрешения на запрос к API
+
+        Returns:
+            float: Время ожидания в секундах
+        """
+        bucket = self._buckets.get(endpoint_class)
+        if bucket is None and self.adaptive:
+            bucket = self._adaptive_bucket(endpoint_class)
+        return bucket.acquire(1, self.current_priority) if bucket else 0.0
+
+    def reserve_request(self, endpoint_class: str) -> float:
+        """
+        Резервирует запрос к API без блокировки потока (для асинхронного клиента)
+
+        Returns:
+            float: Сколько секунд подождать перед запросом
+        """
+        bucket = self._buckets.get(endpoint_class)
+        if bucket is None and self.adaptive:
+            bucket = self._adaptive_bucket(endpoint_class)
+        return bucket.reserve(1) if bucket else 0.0
+
+    def _adaptive_bucket(self, endpoint_class: str) -> Optional[TokenBucket]:
+        """Учитывает запрос в измерении частоты и возвращает адаптивный лимит класса"""
+        now = time.monotonic()
+        with self._adaptive_lock:
+            recent = self._recent.setdefault(endpoint_class, deque())
+            recent.append(now)
+            while recent[0] < now - RATE_WINDOW:
+                recent.popleft()
+            bucket = self._adaptive.get(endpoint_class)
+            if bucket is None or now - self._adjusted_at[endpoint_class] < ADAPTIVE_RECOVERY_SECONDS:
+                return bucket
+            rate = bucket.rate * ADAPTIVE_RECOVERY_FACTOR
+            self._adjusted_at[endpoint_class] = now
+            if rate >= self._ceiling[endpoint_class]:
+                # Частота вернулась к той, на которой сервер отказывал, - лимит снимается
+                del self._adaptive[endpoint_class]
+                bucket.set_rate(rate, rate)
+                return None
+            bucket.set_rate(rate, rate)
+            return bucket
+
+    def report_throttled(self, endpoint_class: str):
+        """
+        Сообщает об ответе 429/503 на запрос класса и снижает его частоту
+
+        Несколько отказов подряд (например, от параллельных запросов одной волны)
+        снижают частоту не чаще раза в ADAPTIVE_BACKOFF_INTERVAL.
+        """
+        if not self.adaptive or endpoint_class in self._buckets:
+            return
+        now = time.monotonic()
+        with self._adaptive_lock:
+            bucket = self._adaptive.get(endpoint_class)
+            if bucket is not None and now - self._adjusted_at[endpoint_class] < ADAPTIVE_BACKOFF_INTERVAL:
+                return
+            if bucket is None:
+                recent = [t for t in self._recent.get(endpoint_class, ()) if t >= now - RATE_WINDOW]
+                # Окно в начале работы короче RATE_WINDOW
+                span = max(now - recent[0], ADAPTIVE_BACKOFF_INTERVAL) if recent else RATE_WINDOW
+                observed = len(recent) / span
+                self._ceiling[endpoint_class] = max(observed, ADAPTIVE_MIN_RATE)
+                rate = max(ADAPTIVE_MIN_RATE, observed / 2)
+                self._adaptive[endpoint_class] = TokenBucket(rate, rate)
+            else:
+                rate = max(ADAPTIVE_MIN_RATE, bucket.rate / 2)
+                bucket.set_rate(rate, rate)
+            self._adjusted_at[endpoint_class] = now
+
+    def current_limits(self) -> Dict[str, float]:
+        """Действующие лимиты частоты по классам запросов (запросов в секунду)"""
+        limits = {name: bucket.rate for name, bucket in self._adaptive.items()}
+        limits.update({name: bucket.rate for name, bucket in self._buckets.items()})
+        return limits
+
+    def acquire_bytes(self, count: int) -> float:
+        """
+        Учитывает переданные байты в ограничении скорости
+
+        Returns:
+            float: Время ожидания в секундах
+        """
+        if self._bandwidth is None or count <= 0:
+            return 0.0
+        return self._bandwidth.acquire(count, self.current_priority)
+
+    def reserve_bytes(self, count: int) -> float:
+        """
+        Учитывает переданные байты без блокировки потока (для асинхронного клиента)
+
+        Returns:
+            float: Сколько секунд подождать перед следующим блоком
+        """
+        if self._bandwidth is None or count <= 0:
+            return 0.0
+        return self._bandwidth.reserve(count)
@@ -0,0 +1,298 @@
+"""
+Локальный индекс метаданных Яндекс.Диска для мгновенного поиска
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+
+import requests
+
+from yandex_disk.api_client import YandexDiskClient
+from yandex_disk.resource import Resource
+from yandex_disk.scheduler import PRIORITY_BACKGROUND
+
+
+# Путь к базе индекса по умолчанию
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".mri_pipeline", "disk_index.db")
+
+# Поля ресурса, сохраняемые в индексе
+INDEXED_FIELDS = ("path", "name", "size", "modified", "md5", "sha256", "mime_type")
+
+# Интервал полного обновления по листингу всего диска в секундах; между ними
+# фоновое обновление запрашивает только последние загруженные файлы
+FULL_REFRESH_INTERVAL = 24 * 3600
+
+# Сколько последних загрузок запрашивает refresh_recent
+RECENT_LIMIT = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    size INTEGER,
+    modified TEXT,
+    md5 TEXT,
+    sha256 TEXT,
+    mime_type TEXT,
+    sync_id INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS resources_fts USING fts5(
+    name, path, content='resources', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS resources_ai AFTER INSERT ON resources BEGIN
+    INSERT INTO resources_fts(rowid, name, path) VALUES (new.id, new.name, new.path);
+END;
+CREATE TRIGGER IF NOT EXISTS resources_ad AFTER DELETE ON resources BEGIN
+    INSERT INTO resources_fts(resources_fts, rowid, name, path) VALUES ('delete', old.id, old.name, old.path);
+END;
+CREATE TRIGGER IF NOT EXISTS resources_au AFTER UPDATE OF name, path ON resources BEGIN
+    INSERT INTO resources_fts(resources_fts, rowid, name, path) VALUES ('delete', old.id, old.name, old.path);
+    INSERT INTO resources_fts(rowid, name, path) VALUES (new.id, new.name, new.path);
+END;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _parse_time(value: Optional[str]) -> float:
+    """Время из ответа API (ISO 8601) в unix time; 0 если его нет"""
+    try:
+        return datetime.fromisoformat(value).timestamp() if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+class DiskIndex:
+    """
+    Индекс всех файлов диска в SQLite с полнотекстовым поиском по имени и пути
+
+    Индекс заполняется из плоского списка /resources/files. При обновлении
+    перезаписываются только изменившиеся строки, а файлы, которых больше нет
+    на диске, удаляются. Полное обновление читает весь список файлов, поэтому
+    фоновое обновление выполняет его раз в FULL_REFRESH_INTERVAL, а в остальное
+    время добавляет только недавно загруженные файлы (refresh_recent).
+    """
+
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH):
+        """
+        Args:
+            db_path: Путь к файлу базы (":memory:" для индекса в памяти)
+        """
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def close(self):
+        """Останавливает фоновое обновление и закрывает базу"""
+        self.stop_background_refresh()
+        with self._lock:
+            self._conn.close()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value: Any):
+        self._conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, str(value)))
+
+    @property
+    def last_refresh(self) -> Optional[float]:
+        """Время последнего полного обновления (unix time)"""
+        with self._lock:
+            value = self._get_meta("last_refresh")
+        return float(value) if value else None
+
+    def count(self) -> int:
+        """Количество файлов в индексе"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM resources").fetchone()[0]
+
+    @property
+    def last_recent_refresh(self) -> Optional[float]:
+        """Время последнего обновления по недавно загруженным файлам (unix time)"""
+        with self._lock:
+            value = self._get_meta("last_recent_refresh")
+        return float(value) if value else None
+
+    def _upsert_page(self, page: List[Resource], sync_id: int, stats: Dict[str, int]):
+        """Записывает изменившиеся файлы страницы, остальным обновляет метку синхронизации"""
+        rows = {item.path: tuple(getattr(item, field) for field in INDEXED_FIELDS) for item in page if item.path}
+        if not rows:
+            return
+        with self._lock, self._conn:
+            known = {
+                row["path"]: (row["modified"], row["md5"])
+                for row in self._conn.execute(
+                    "SELECT path, modified, md5 FROM resources WHERE path IN (%s)" % ",".join("?" * len(rows)),
+                    list(rows))
+            }
+            unchanged = [path for path, row in rows.items() if known.get(path) == (row[3], row[4])]
+            upserts = [row + (sync_id,) for path, row in rows.items() if known.get(path) != (row[3], row[4])]
+            # Неизменившиеся строки получают только новую метку синхронизации
+            self._conn.executemany("UPDATE resources SET sync_id = ? WHERE path = ?",
+                                   [(sync_id, path) for path in unchanged])
+            self._conn.executemany(
+                "INSERT INTO resources(path, name, size, modified, md5, sha256, mime_type, sync_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET name = excluded.name, size = excluded.size, "
+                "modified = excluded.modified, md5 = excluded.md5, sha256 = excluded.sha256, "
+                "mime_type = excluded.mime_type, sync_id = excluded.sync_id",
+                upserts)
+            stats["updated"] += sum(1 for row in upserts if row[0] in known)
+            stats["added"] += sum(1 for row in upserts if row[0] not in known)
+
+    def refresh(self, client: YandexDiskClient, page_size: int = 1000) -> Dict[str, int]:
+        """
+        Полностью обновляет индекс по плоскому списку файлов диска
+
+        Инкрементальна только запись в базу: список /resources/files каждый раз
+        читается целиком, и число запросов растет с количеством файлов на диске
+        (один запрос на page_size файлов). Для частых обновлений см. refresh_recent().
+
+        Args:
+            client: Клиент Яндекс.Диска
+            page_size: Размер страницы при пагинации
+
+        Returns:
+            Dict[str, int]: Количество добавленных, измененных и удаленных записей
+
+        Raises:
+            requests.exceptions.RequestException: При ошибке запроса списка
+        """
+        with self._lock:
+            sync_id = int(self._get_meta("sync_id") or 0) + 1
+        stats = {"added": 0, "updated": 0, "removed": 0}
+        for page in client.iter_all_files(page_size):
+            self._upsert_page(page, sync_id, stats)
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM resources WHERE sync_id != ?", (sync_id,))
+            stats["removed"] = cursor.rowcount
+            self._set_meta("sync_id", sync_id)
+            self._set_meta("last_refresh", time.time())
+        return stats
+
+    def refresh_recent(self, client: YandexDiskClient, limit: int = RECENT_LIMIT) -> Dict[str, int]:
+        """
+        Добавляет в индекс недавно загруженные файлы одним запросом /resources/last-uploaded
+
+        Новые и перезаписанные файлы появляются в поиске без полного листинга.
+        Удаления и перемещения видны только после следующего refresh().
+
+        Args:
+            client: Клиент Яндекс.Диска
+            limit: Сколько последних загрузок запросить
+
+        Returns:
+            Dict[str, int]: Количество добавленных и измененных записей; "complete" равно 0,
+            если все limit файлов загружены после прошлого обновления и часть могла не поместиться
+
+        Raises:
+            requests.exceptions.RequestException: При ошибке запроса
+        """
+        with self._lock:
+            sync_id = int(self._get_meta("sync_id") or 0)
+            since = max(float(self._get_meta("last_refresh") or 0), float(self._get_meta("last_recent_refresh") or 0))
+        started = time.time()
+        items = client.get_last_uploaded(limit)
+        stats = {"added": 0, "updated": 0, "removed": 0, "complete": 1}
+        self._upsert_page(items, sync_id, stats)
+        if len(items) >= limit and _parse_time(items[-1].modified) > since:
+            stats["complete"] = 0
+        with self._lock, self._conn:
+            self._set_meta("last_recent_refresh", started)
+        return stats
+
+    @staticmethod
+    def _build_match_query(query: str) -> str:
+        """Превращает пользовательский запрос в запрос FTS5 с поиском по префиксам"""
+        terms = re.findall(r"\w+", query, flags=re.UNICODE)
+        return " ".join(f'"{term}"*' for term in terms)
+
+    def search(self, query: str, limit: int = 500) -> List[Resource]:
+        """
+        Ищет файлы по словам из имени и пути
+
+        Args:
+            query: Строка поиска (например, "sub 01 T1w")
+            limit: Максимальное количество результатов
+
+        Returns:
+            List[Resource]: Найденные файлы
+        """
+        match = self._build_match_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.path, r.name, r.size, r.modified, r.md5, r.sha256, r.mime_type "
+                "FROM resources_fts JOIN resources r ON r.id = resources_fts.rowid "
+                "WHERE resources_fts MATCH ? ORDER BY rank LIMIT ?",
+                (match, limit)).fetchall()
+        return [Resource(row["name"], row["path"], "file", row["size"], row["modified"], row["md5"],
+                         row["sha256"], row["mime_type"]) for row in rows]
+
+    def start_background_refresh(self, client: YandexDiskClient, interval: float = 3600,
+                                 on_refreshed=None, full_interval: float = FULL_REFRESH_INTERVAL):
+        """
+        Запускает периодическое обновление индекса в фоновом потоке
+
+        Раз в interval запрашиваются недавно загруженные файлы (refresh_recent),
+        полный листинг диска (refresh) выполняется раз в full_interval и когда
+        недавних загрузок больше, чем помещается в один запрос.
+
+        Args:
+            client: Клиент Яндекс.Диска
+            interval: Интервал между обновлениями в секундах
+            on_refreshed: Вызывается из фонового потока со статистикой обновления
+            full_interval: Интервал между полными обновлениями в секундах
+        """
+        self.stop_background_refresh()
+        self._stop_event.clear()
+
+        def refresh_loop():
+            while not self._stop_event.is_set():
+                last_full = self.last_refresh
+                last = max(last_full or 0, self.last_recent_refresh or 0)
+                wait = 0 if last_full is None else max(0.0, last + interval - time.time())
+                if self._stop_event.wait(wait):
+                    return
+                try:
+                    with client.priority(PRIORITY_BACKGROUND):
+                        if last_full is None or time.time() - last_full >= full_interval:
+                            stats = self.refresh(client)
+                        else:
+                            stats = self.refresh_recent(client)
+                            if not stats.pop("complete"):
+                                stats = self.refresh(client)
+                    if on_refreshed:
+                        on_refreshed(stats)
+                except (requests.exceptions.RequestException, sqlite3.Error) as e:
+                    print(f"Ошибка обновления индекса: {e}")
+                    if self._stop_event.wait(min(interval, 300)):
+                        return
+
+        self._refresh_thread = threading.Thread(target=refresh_loop, daemon=True)
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self):
+        """Останавливает фоновое обновление"""
+        self._stop_event.set()
+        if self._refresh_thread and self._refresh_thread is not threading.current_thread():
+            self._refresh_thread.join(timeout=5)
+        self._refresh_thread = None
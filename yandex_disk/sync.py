@@ -0,0 +1,176 @@
+"""
+Инкрементальная синхронизация папки Яндекс.Диска с локальной папкой
+"""
+
+import json
+import os
+from typing import Optional, Dict, Any, List, Callable
+
+from yandex_disk.api_client import YandexDiskClient
+from yandex_disk.download_manager import DownloadManager, DownloadTask, STATUS_DONE
+from yandex_disk.folder_download import walk_tree, plan_folder_download
+from yandex_disk.resource import Resource
+
+
+# Имя файла манифеста в корне локальной папки
+MANIFEST_NAME = ".yadisk_manifest.json"
+
+# Поля ресурса, по которым определяется изменение файла
+MANIFEST_FIELDS = ("size", "modified", "md5", "sha256")
+
+
+class SyncResult:
+    """Итог синхронизации"""
+
+    def __init__(self):
+        self.downloaded: List[str] = []
+        self.skipped: List[str] = []
+        self.failed: List[str] = []
+        self.pruned: List[str] = []
+
+    def __str__(self):
+        return (f"скачано {len(self.downloaded)}, без изменений {len(self.skipped)}, "
+                f"ошибок {len(self.failed)}, удалено {len(self.pruned)}")
+
+
+def load_manifest(local_dir: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Читает локальный манифест синхронизации
+
+    Args:
+        local_dir: Локальная папка
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Метаданные файлов по относительному пути
+    """
+    path = os.path.join(local_dir, MANIFEST_NAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("files", {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Манифест {path} поврежден, выполняется полная проверка: {e}")
+        return {}
+
+
+def save_manifest(local_dir: str, remote_dir: str, files: Dict[str, Dict[str, Any]]):
+    """
+    Атомарно сохраняет манифест синхронизации
+
+    Args:
+        local_dir: Локальная папка
+        remote_dir: Синхронизируемая папка на диске
+        files: Метаданные файлов по относительному пути
+    """
+    path = os.path.join(local_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"remote_dir": remote_dir, "files": files}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def is_unchanged(resource: Resource, entry: Optional[Dict[str, Any]], local_path: str) -> bool:
+    """
+    Проверяет, совпадает ли локальная копия с файлом на диске
+
+    Сравниваются sha256, затем md5, затем пара (размер, дата изменения) из
+    манифеста; размер локального файла проверяется всегда.
+
+    Args:
+        resource: Ресурс из списка файлов API
+        entry: Запись манифеста или None
+        local_path: Путь к локальной копии
+
+    Returns:
+        bool: True если файл можно не скачивать
+    """
+    if entry is None:
+        return False
+    try:
+        if os.path.getsize(local_path) != resource.size:
+            return False
+    except OSError:
+        return False
+    for field in ("sha256", "md5"):
+        if getattr(resource, field) and entry.get(field):
+            return getattr(resource, field) == entry[field]
+    return (resource.size, resource.modified) == (entry.get("size"), entry.get("modified"))
+
+
+def sync_folder(client: YandexDiskClient, remote_dir: str, local_dir: str, max_workers: int = 4,
+                prune: bool = False, dry_run: bool = False,
+                on_task_done: Optional[Callable[[DownloadTask], None]] = None) -> SyncResult:
+    """
+    Скачивает только новые и измененные файлы папки
+
+    Повторный запуск по неизменившимся данным стоит только запросов списка файлов.
+
+    Args:
+        client: Клиент Яндекс.Диска
+        remote_dir: Папка на диске
+        local_dir: Локальная папка
+        max_workers: Количество одновременных скачиваний
+        prune: Удалять локальные файлы, удаленные с диска (только учтенные в манифесте)
+        dry_run: Только вычислить изменения, ничего не скачивая и не удаляя
+        on_task_done: Вызывается после скачивания каждого файла
+
+    Returns:
+        SyncResult: Итог синхронизации
+
+    Raises:
+        requests.exceptions.RequestException: При ошибке запроса списка файлов
+    """
+    result = SyncResult()
+    manifest = load_manifest(local_dir)
+    tree = walk_tree(client, remote_dir)
+    planned = plan_folder_download(tree, local_dir) if not dry_run else [
+        (remote_path, os.path.join(local_dir, *rel_path.split("/")), None) for remote_path, rel_path, _ in tree.files]
+
+    to_download = []
+    pending: Dict[str, tuple] = {}
+    for planned_item, (_, rel_path, resource) in zip(planned, tree.files):
+        local_path = planned_item[1]
+        if is_unchanged(resource, manifest.get(rel_path), local_path):
+            result.skipped.append(rel_path)
+            continue
+        to_download.append(planned_item)
+        pending[local_path] = (rel_path, resource)
+
+    remote_paths = {rel_path for _, rel_path, _ in tree.files}
+    stale = [rel_path for rel_path in manifest if rel_path not in remote_paths]
+
+    if dry_run:
+        result.downloaded = [rel_path for rel_path, _ in pending.values()]
+        result.pruned = stale if prune else []
+        return result
+
+    def on_done(task: DownloadTask):
+        rel_path, resource = pending[task.local_path]
+        if task.status == STATUS_DONE:
+            manifest[rel_path] = {field: getattr(resource, field) for field in MANIFEST_FIELDS}
+            result.downloaded.append(rel_path)
+        else:
+            result.failed.append(rel_path)
+        if on_task_done:
+            on_task_done(task)
+
+    try:
+        if to_download:
+            DownloadManager(client, max_workers=max_workers).download_all(to_download, on_task_done=on_done)
+        if prune:
+            for rel_path in stale:
+                local_path = os.path.join(local_dir, *rel_path.split("/"))
+                try:
+                    os.remove(local_path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Не удалось удалить {local_path}: {e}")
+                    continue
+                manifest.pop(rel_path, None)
+                result.pruned.append(rel_path)
+    finally:
+        # Манифест сохраняется и при прерывании, чтобы не перекачивать готовые файлы
+        save_manifest(local_dir, remote_dir, manifest)
+    return result
@@ -0,0 +1,149 @@
+"""
+Параллельная загрузка локальных папок на Яндекс.Диск
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, List, Tuple, Callable, Iterable
+
+import requests
+
+from yandex_disk.api_client import YandexDiskClient
+from yandex_disk.bulk import bulk_create_folders
+from yandex_disk.folder_download import walk_tree
+from yandex_disk.hashing import hash_file
+from yandex_disk.resource import Resource
+
+
+class UploadResult:
+    """Итог загрузки папки"""
+
+    def __init__(self):
+        self.uploaded: List[str] = []
+        self.skipped: List[str] = []
+        self.failed: List[str] = []
+
+    def __str__(self):
+        return (f"загружено {len(self.uploaded)}, без изменений {len(self.skipped)}, "
+                f"ошибок {len(self.failed)}")
+
+
+def scan_local_tree(local_dir: str) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Собирает относительные пути папок и файлов локального дерева
+
+    Args:
+        local_dir: Локальная папка
+
+    Returns:
+        Tuple: (относительные пути папок, пары (локальный путь, относительный путь) файлов);
+            относительные пути разделены "/"
+    """
+    dirs = []
+    files = []
+    for current, subdirs, names in os.walk(local_dir):
+        rel_dir = os.path.relpath(current, local_dir).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else rel_dir
+        subdirs.sort()
+        for name in subdirs:
+            dirs.append(f"{rel_dir}/{name}" if rel_dir else name)
+        for name in sorted(names):
+            files.append((os.path.join(current, name), f"{rel_dir}/{name}" if rel_dir else name))
+    return dirs, files
+
+
+def ensure_remote_folders(client: YandexDiskClient, remote_dir: str, rel_dirs: Iterable[str],
+                          max_workers: int = 8) -> bool:
+    """
+    Создает недостающие папки на диске пакетом (см. bulk_create_folders)
+
+    Args:
+        client: Клиент Яндекс.Диска
+        remote_dir: Корневая папка на диске (создается при необходимости)
+        rel_dirs: Относительные пути папок
+        max_workers: Количество одновременных запросов
+
+    Returns:
+        bool: True если все папки существуют
+    """
+    root = remote_dir.rstrip("/")
+    result = bulk_create_folders(client, [remote_dir] + [f"{root}/{rel_dir}" for rel_dir in rel_dirs],
+                                 max_workers=max_workers)
+    for item in result.failed:
+        print(f"Ошибка при создании папки {item.path}: {item.error}")
+    return not result.failed
+
+
+def remote_matches(local_path: str, resource: Optional[Resource]) -> bool:
+    """
+    Проверяет, совпадает ли файл на диске с локальным
+
+    Контрольные суммы считаются только если совпадает размер.
+
+    Args:
+        local_path: Путь к локальному файлу
+        resource: Ресурс из списка файлов API или None
+
+    Returns:
+        bool: True если загружать файл не нужно
+    """
+    if resource is None or not (resource.sha256 or resource.md5):
+        return False
+    try:
+        if os.path.getsize(local_path) != resource.size:
+            return False
+        return hash_file(local_path).matches(resource.hashes)
+    except OSError:
+        return False
+
+
+def upload_folder(client: YandexDiskClient, local_dir: str, remote_dir: str, max_workers: int = 8,
+                  overwrite: bool = True,
+                  on_file_done: Optional[Callable[[str, bool], None]] = None) -> UploadResult:
+    """
+    Загружает локальную папку на диск, пропуская файлы с совпадающей суммой
+
+    Args:
+        client: Клиент Яндекс.Диска
+        local_dir: Локальная папка (например, BIDS-датасет)
+        remote_dir: Папка на диске
+        max_workers: Количество одновременных загрузок
+        overwrite: Перезаписывать измененные файлы на диске
+        on_file_done: Вызывается с относительным путем и успехом после каждого файла
+
+    Returns:
+        UploadResult: Итог загрузки
+
+    Raises:
+        requests.exceptions.RequestException: При ошибке запроса списка файлов
+    """
+    result = UploadResult()
+    rel_dirs, files = scan_local_tree(local_dir)
+    try:
+        remote = {rel_path: resource for _, rel_path, resource in walk_tree(client, remote_dir).files}
+    except requests.exceptions.HTTPError as e:
+        if e.response is None or e.response.status_code != 404:
+            raise
+        remote = {}
+
+    if not ensure_remote_folders(client, remote_dir, rel_dirs, max_workers):
+        result.failed = [rel_path for _, rel_path in files]
+        return result
+
+    def upload_one(local_path: str, rel_path: str) -> Tuple[str, Optional[bool]]:
+        if remote_matches(local_path, remote.get(rel_path)):
+            return rel_path, None
+        ok = client.upload_file(local_path, f"{remote_dir.rstrip('/')}/{rel_path}", overwrite=overwrite)
+        return rel_path, ok
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(upload_one, local_path, rel_path) for local_path, rel_path in files]
+        for future in as_completed(futures):
+            rel_path, ok = future.result()
+            if ok is None:
+                result.skipped.append(rel_path)
+                continue
+            (result.uploaded if ok else result.failed).append(rel_path)
+            if on_file_done:
+                on_file_done(rel_path, ok)
+    return result